@@ -13,14 +13,18 @@ from . import (
     annotations,
     arg_spec,
     ast_annotator,
+    ast_cache,
     asynq_checker,
     boolability,
+    call_graph,
     checker,
     error_code,
     extensions,
     find_unused,
     functions,
     implementation,
+    lsp,
+    memory,
     name_check_visitor,
     node_visitor,
     options,
@@ -29,11 +33,15 @@ from . import (
     reexport,
     safe,
     runtime,
+    shards,
     shared_options,
     signature,
+    source_profile,
     stacked_scopes,
     suggested_type,
+    summaries,
     tests,
+    tracing,
     type_object,
     typeshed,
     typevar,
@@ -4,6 +4,14 @@ from pyanalyze.name_check_visitor import NameCheckVisitor
 
 
 def main() -> None:
+    if sys.argv[1:2] == ["lsp"]:
+        from pyanalyze import lsp
+
+        sys.exit(lsp.main(sys.argv[2:]))
+    if sys.argv[1:2] == ["merge"]:
+        from pyanalyze import shards
+
+        sys.exit(shards.main(sys.argv[2:]))
     sys.exit(NameCheckVisitor.main())
 
 
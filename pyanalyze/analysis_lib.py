@@ -7,12 +7,43 @@ Commonly useful components for static analysis tools.
 import ast
 import linecache
 import os
+import re
 import secrets
 import sys
 import types
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, List, Mapping, Optional, Set, Union
+from typing import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+# Directories that never contain code we want to check. These are skipped
+# during file discovery without looking inside them.
+DEFAULT_PRUNED_DIRECTORIES = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".tox",
+        ".nox",
+        ".mypy_cache",
+        ".pytest_cache",
+        "__pycache__",
+    }
+)
+# If a directory contains this file, it is a virtualenv and we skip it.
+_VIRTUALENV_MARKER = "pyvenv.cfg"
 
 
 def _all_files(
@@ -39,6 +70,180 @@ def files_with_extension_from_directory(
     return _all_files(dirname, filter_function=lambda fn: fn.endswith("." + extension))
 
 
+def _gitignore_pattern_to_regex(pattern: str) -> str:
+    pieces = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            pieces.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            pieces.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            pieces.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            pieces.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            contents = pattern[i + 1 : end]
+            if contents.startswith("!"):
+                contents = "^" + contents[1:]
+            pieces.append(f"[{contents}]")
+            i = end + 1
+        else:
+            pieces.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(pieces)
+
+
+@dataclass(frozen=True)
+class _ExcludeRule:
+    regex: Pattern[str]
+    negated: bool
+    directory_only: bool
+
+
+@dataclass
+class PathExcluder:
+    """Matches relative paths against gitignore-style exclude patterns.
+
+    The supported syntax is a subset of that of ``.gitignore`` files:
+
+    - Patterns without a slash (e.g. ``*_pb2.py``) match a file or directory
+      name at any depth.
+    - Patterns containing a slash (e.g. ``/build`` or ``docs/conf.py``) are
+      anchored to the root being walked.
+    - ``*`` and ``?`` do not match a slash; ``**`` matches any number of
+      directories.
+    - A trailing slash (e.g. ``generated/``) matches only directories.
+    - A leading ``!`` re-includes a path excluded by an earlier pattern.
+    - Blank lines and lines starting with ``#`` are ignored.
+
+    """
+
+    patterns: Sequence[str] = ()
+    rules: Sequence[_ExcludeRule] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        rules = []
+        for pattern in self.patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            negated = pattern.startswith("!")
+            if negated:
+                pattern = pattern[1:]
+            directory_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if "/" in pattern:
+                regex = "^" + _gitignore_pattern_to_regex(pattern.lstrip("/")) + "$"
+            else:
+                regex = "^(?:.*/)?" + _gitignore_pattern_to_regex(pattern) + "$"
+            rules.append(_ExcludeRule(re.compile(regex), negated, directory_only))
+        self.rules = rules
+
+    def is_excluded(self, relative_path: str, *, is_dir: bool) -> bool:
+        """Returns whether the path (relative to the walked root, using forward
+        slashes) is excluded."""
+        excluded = False
+        for rule in self.rules:
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.regex.match(relative_path):
+                excluded = not rule.negated
+        return excluded
+
+
+def walk_files(
+    roots: Iterable[Union[str, Path]],
+    *,
+    extension: str = "py",
+    exclude: Sequence[str] = (),
+    pruned_directories: Collection[str] = DEFAULT_PRUNED_DIRECTORIES,
+    filter_function: Optional[Callable[[str], bool]] = None,
+) -> Iterator[str]:
+    """Lazily yields all files with this extension under the given roots.
+
+    Roots that are not directories are yielded unchanged. Directories are walked
+    using :func:`os.scandir`, and subdirectories are skipped without being read
+    if they are in pruned_directories, are virtualenvs, or match one of the
+    gitignore-style exclude patterns (see :class:`PathExcluder`). Symlinks to
+    directories are not followed.
+
+    Paths are yielded in sorted order and without duplicates, so callers can start
+    processing them before the walk is complete.
+
+    """
+    excluder = PathExcluder(exclude)
+    suffix = "." + extension
+    seen = set()
+    for root in sorted(str(root) for root in roots):
+        if os.path.isdir(root):
+            paths = _walk_directory(
+                root, "", suffix, excluder, pruned_directories, filter_function
+            )
+        else:
+            paths = [root]
+        for path in paths:
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def _walk_directory(
+    path: str,
+    relative_path: str,
+    suffix: str,
+    excluder: PathExcluder,
+    pruned_directories: Collection[str],
+    filter_function: Optional[Callable[[str], bool]],
+) -> Iterator[str]:
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return
+    if relative_path and any(entry.name == _VIRTUALENV_MARKER for entry in entries):
+        return
+    # Sorting directories as if their name ended in a slash makes the traversal
+    # produce the same order as sorting the full paths.
+    keyed_entries: List[Tuple[str, "os.DirEntry[str]", bool]] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir:
+            if entry.is_symlink() or entry.name in pruned_directories:
+                continue
+            keyed_entries.append((entry.name + "/", entry, True))
+        elif entry.name.endswith(suffix):
+            if filter_function is not None and not filter_function(entry.name):
+                continue
+            keyed_entries.append((entry.name, entry, False))
+    keyed_entries.sort(key=lambda triple: triple[0])
+    for _, entry, is_dir in keyed_entries:
+        entry_relative_path = (
+            f"{relative_path}/{entry.name}" if relative_path else entry.name
+        )
+        if excluder.is_excluded(entry_relative_path, is_dir=is_dir):
+            continue
+        if is_dir:
+            yield from _walk_directory(
+                entry.path,
+                entry_relative_path,
+                suffix,
+                excluder,
+                pruned_directories,
+                filter_function,
+            )
+        else:
+            yield entry.path
+
+
 def get_indentation(line: str) -> int:
     """Returns the indentation of a line of code."""
     if len(line.lstrip()) == 0:
@@ -35,6 +35,7 @@ from typing import (
     Any,
     Container,
     ContextManager,
+    Dict,
     Generator,
     List,
     Mapping,
@@ -221,12 +222,29 @@ class Context:
 class RuntimeEvaluator(type_evaluation.Evaluator, Context):
     globals: Mapping[str, object] = field(repr=False)
     func: typing.Callable[..., Any]
+    # The globals of the function don't change, so the same expression always
+    # evaluates to the same value.
+    _type_cache: Dict[ast.AST, Value] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _value_cache: Dict[ast.AST, Value] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def evaluate_type(self, node: ast.AST) -> Value:
-        return type_from_ast(node, ctx=self)
+        try:
+            return self._type_cache[node]
+        except KeyError:
+            val = self._type_cache[node] = type_from_ast(node, ctx=self)
+            return val
 
     def evaluate_value(self, node: ast.AST) -> Value:
-        return value_from_ast(node, ctx=self, error_on_unrecognized=False)
+        try:
+            return self._value_cache[node]
+        except KeyError:
+            val = value_from_ast(node, ctx=self, error_on_unrecognized=False)
+            self._value_cache[node] = val
+            return val
 
     def get_name(self, node: ast.Name) -> Value:
         """Return the :class:`Value <pyanalyze.value.Value>` corresponding to a name."""
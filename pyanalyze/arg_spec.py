@@ -12,7 +12,9 @@ import enum
 import inspect
 import sys
 import textwrap
+import time
 import typing
+import weakref
 from dataclasses import dataclass, replace
 from types import FunctionType, MethodType, ModuleType
 from typing import (
@@ -47,11 +49,12 @@ from .extensions import CustomCheck, TypeGuard, get_type_evaluations
 from .extensions import get_overloads as pyanalyze_get_overloads
 from .find_unused import used
 from .functions import translate_vararg_type
-from .options import Options, PyObjectSequenceOption
+from .options import Options, PyObjectSequenceOption, StringSequenceOption
 from .safe import (
     all_of_type,
     get_fully_qualified_name,
     hasattr_static,
+    is_hashable,
     is_newtype,
     is_typing_name,
     safe_equals,
@@ -116,6 +119,9 @@ _ENUM_CALL = enum.Enum.__call__.__func__
 
 _SELF_PARAM = inspect.Parameter("__self", inspect.Parameter.POSITIONAL_ONLY)
 
+# Maximum number of entries in ArgSpecCache.annotation_cache
+_ANNOTATION_CACHE_SIZE = 10000
+
 
 @used  # exposed as an API
 @contextlib.contextmanager
@@ -186,6 +192,30 @@ def is_dot_asynq_function(obj: Any) -> bool:
     return getattr(obj, "__name__", None) in ("async", "asynq")
 
 
+# Parsed type evaluation functions. These are shared between checkers, so that the
+# source of each evaluation function is read and parsed only once per process.
+_EVALUATOR_NODES: (
+    "weakref.WeakKeyDictionary[Callable[..., Any], Optional[ast.FunctionDef]]"
+) = weakref.WeakKeyDictionary()
+
+
+def _get_evaluator_node(func: Callable[..., Any]) -> Optional[ast.FunctionDef]:
+    """Returns the AST for the given type evaluation function."""
+    try:
+        return _EVALUATOR_NODES[func]
+    except KeyError:
+        pass
+    lines, _ = inspect.getsourcelines(func)
+    code = textwrap.dedent("".join(lines))
+    body = ast.parse(code)
+    if body.body and isinstance(body.body[0], ast.FunctionDef):
+        node = body.body[0]
+    else:
+        node = None
+    _EVALUATOR_NODES[func] = node
+    return node
+
+
 @dataclass
 class AnnotationsContext(Context):
     arg_spec_cache: "ArgSpecCache"
@@ -304,6 +334,43 @@ class KnownSignatures(PyObjectSequenceOption[_SigProvider]):
     default_value = []
 
 
+class StubOnlyPackages(StringSequenceOption):
+    """Packages (e.g., "botocore" or "google.cloud") whose functions and classes are
+    resolved only from stubs. pyanalyze does not inspect the runtime objects from
+    these packages, which is faster for large third-party libraries. Objects without
+    a stub are treated as accepting any arguments."""
+
+    name = "stub_only_packages"
+    is_global = True
+
+
+@dataclass
+class StubOnlyStats:
+    """Time spent finding signatures, for the stub_only_packages report."""
+
+    stub_lookups: int = 0
+    stub_time: float = 0.0
+    # Objects from stub-only packages that have no stub
+    stub_misses: int = 0
+    runtime_lookups: int = 0
+    runtime_time: float = 0.0
+
+    def estimated_time_saved(self) -> float:
+        """Estimates how much time inspecting the runtime objects from stub-only
+        packages would have taken, based on the other objects we inspected."""
+        if not self.runtime_lookups:
+            return 0.0
+        average = self.runtime_time / self.runtime_lookups
+        return self.stub_lookups * average - self.stub_time
+
+    def __str__(self) -> str:
+        return (
+            f"Found signatures for {self.stub_lookups} objects from stub-only packages"
+            f" in {self.stub_time:.2f} s ({self.stub_misses} without stubs); skipping"
+            f" runtime inspection saved an estimated {self.estimated_time_saved():.2f} s"
+        )
+
+
 _Unwrapper = Callable[[type], type]
 
 
@@ -391,8 +458,15 @@ class ArgSpecCache:
         self.ctx = ctx
         self.known_argspecs = {}
         self.generic_bases_cache = {}
+        self.annotation_cache = {}
+        self.annotation_cache_hits = 0
+        self.annotation_cache_misses = 0
         self.default_context = AnnotationsContext(self)
         self.safe_bases = tuple(self.options.get_value_for(ClassesSafeToInstantiate))
+        self.stub_only_packages = tuple(self.options.get_value_for(StubOnlyPackages))
+        self._stub_only_modules: Dict[str, bool] = {}
+        self.stub_only_stats = StubOnlyStats()
+        self._in_uncached_get_argspec = False
 
         default_argspecs = dict(self.DEFAULT_ARGSPECS)
         for provider in _BUILTIN_KNOWN_SIGNATURES:
@@ -402,6 +476,63 @@ class ArgSpecCache:
 
         for obj, argspec in default_argspecs.items():
             self.known_argspecs[obj] = argspec
+        self._default_argspecs = default_argspecs
+
+    def trim_caches(self) -> None:
+        """Drops all cached signatures except the default ones."""
+        self.known_argspecs = dict(self._default_argspecs)
+        self.generic_bases_cache.clear()
+        self.annotation_cache.clear()
+
+    def type_from_runtime(
+        self,
+        annotation: object,
+        func_globals: Optional[Mapping[str, object]] = None,
+        *,
+        allow_unpack: bool = False,
+    ) -> Value:
+        """Converts a runtime annotation to a Value, caching the result.
+
+        Forward references in the annotation are resolved in func_globals, so the
+        cache is keyed by the identity of the globals as well as the annotation.
+        Unhashable annotations are not cached. The cache is cleared when it gets
+        large, so that it does not keep old modules alive indefinitely.
+
+        """
+        if not is_hashable(annotation):
+            return type_from_runtime(
+                annotation,
+                ctx=AnnotationsContext(self, func_globals),
+                allow_unpack=allow_unpack,
+            )
+        # Include the type so that annotations that compare equal but are of
+        # different types (e.g., typing.List[int] and list[int]) are kept apart,
+        # and the repr of generic aliases because Union equality ignores order.
+        if typing_extensions.get_args(annotation):
+            detail = repr(annotation)
+        else:
+            detail = None
+        key = (type(annotation), annotation, detail, id(func_globals), allow_unpack)
+        try:
+            _, value = self.annotation_cache[key]
+        except KeyError:
+            pass
+        else:
+            self.annotation_cache_hits += 1
+            return value
+        self.annotation_cache_misses += 1
+        value = type_from_runtime(
+            annotation,
+            ctx=AnnotationsContext(self, func_globals),
+            allow_unpack=allow_unpack,
+        )
+        # Keep a reference to the globals so that their id cannot be reused.
+        if len(self.annotation_cache) >= _ANNOTATION_CACHE_SIZE:
+            # Entries keep the globals of their module alive, so start over
+            # instead of growing without bound in long-running processes.
+            self.annotation_cache.clear()
+        self.annotation_cache[key] = (func_globals, value)
+        return value
 
     def from_signature(
         self,
@@ -438,9 +569,7 @@ class ArgSpecCache:
                 returns = AnyValue(AnySource.unannotated)
                 has_return_annotation = False
             else:
-                returns = type_from_runtime(
-                    sig.return_annotation, ctx=AnnotationsContext(self, func_globals)
-                )
+                returns = self.type_from_runtime(sig.return_annotation, func_globals)
                 has_return_annotation = True
             if is_async:
                 returns = make_coro_type(returns)
@@ -537,9 +666,8 @@ class ArgSpecCache:
     ) -> Value:
         if parameter.annotation is not inspect.Parameter.empty:
             kind = ParameterKind(parameter.kind)
-            ctx = AnnotationsContext(self, func_globals)
-            typ = type_from_runtime(
-                parameter.annotation, ctx=ctx, allow_unpack=kind.allow_unpack()
+            typ = self.type_from_runtime(
+                parameter.annotation, func_globals, allow_unpack=kind.allow_unpack()
             )
             return translate_vararg_type(kind, typ, self.ctx)
         # If this is the self argument of a method, try to infer the self type.
@@ -621,9 +749,30 @@ class ArgSpecCache:
         else:
             hashable = True
 
-        extended = self._uncached_get_argspec(
-            obj, impl, is_asynq, in_overload_resolution
-        )
+        if not self.stub_only_packages or self._in_uncached_get_argspec:
+            extended = self._uncached_get_argspec(
+                obj, impl, is_asynq, in_overload_resolution
+            )
+        else:
+            # Time only the outermost lookup, so that the stub_only_packages
+            # report can estimate the time spent inspecting each object.
+            is_stub_only = self._is_stub_only(obj)
+            start = time.perf_counter()
+            self._in_uncached_get_argspec = True
+            try:
+                extended = self._uncached_get_argspec(
+                    obj, impl, is_asynq, in_overload_resolution
+                )
+            finally:
+                self._in_uncached_get_argspec = False
+            elapsed = time.perf_counter() - start
+            stats = self.stub_only_stats
+            if is_stub_only:
+                stats.stub_lookups += 1
+                stats.stub_time += elapsed
+            else:
+                stats.runtime_lookups += 1
+                stats.runtime_time += elapsed
         if extended is None:
             return None
 
@@ -650,13 +799,8 @@ class ArgSpecCache:
             )
             if not isinstance(sig, Signature):
                 return None
-            lines, _ = inspect.getsourcelines(evaluation_func)
-            code = textwrap.dedent("".join(lines))
-            body = ast.parse(code)
-            if not body.body:
-                return None
-            evaluator_node = body.body[0]
-            if not isinstance(evaluator_node, ast.FunctionDef):
+            evaluator_node = _get_evaluator_node(evaluation_func)
+            if evaluator_node is None:
                 return None
             evaluator = RuntimeEvaluator(
                 evaluator_node,
@@ -712,6 +856,9 @@ class ArgSpecCache:
                 argspec, Composite(KnownValue(obj.__self__)), ctx=self.ctx
             )
 
+        if self._is_stub_only(obj):
+            return self._get_argspec_from_stub(obj)
+
         # Must be after the check for bound methods, because otherwise we
         # won't bind self correctly.
         if not in_overload_resolution:
@@ -969,6 +1116,37 @@ class ArgSpecCache:
 
         return None
 
+    def _is_stub_only(self, obj: object) -> bool:
+        if not self.stub_only_packages:
+            return False
+        module = safe_getattr(obj, "__module__", None)
+        if not isinstance(module, str):
+            return False
+        try:
+            return self._stub_only_modules[module]
+        except KeyError:
+            pass
+        is_stub_only = any(
+            module == package or module.startswith(package + ".")
+            for package in self.stub_only_packages
+        )
+        self._stub_only_modules[module] = is_stub_only
+        return is_stub_only
+
+    def _get_argspec_from_stub(self, obj: object) -> MaybeSignature:
+        if safe_isinstance(obj, type):
+            type_params = self.get_type_parameters(obj)
+        else:
+            type_params = []
+        allow_call = FunctionsSafeToCall.contains(obj, self.options)
+        argspec = self.ts_finder.get_argspec(
+            obj, allow_call=allow_call, type_params=type_params
+        )
+        if argspec is not None:
+            return argspec
+        self.stub_only_stats.stub_misses += 1
+        return self._make_any_sig(obj)
+
     def _maybe_make_overloaded_signature(
         self,
         overloads: Sequence[Callable[..., Any]],
@@ -1068,8 +1246,7 @@ class ArgSpecCache:
                 typ, type
             ), f"failed to extract typeshed bases for {typ!r}"
             bases = [
-                type_from_runtime(base, ctx=self.default_context)
-                for base in self.get_runtime_bases(typ)
+                self.type_from_runtime(base) for base in self.get_runtime_bases(typ)
             ]
             generic_bases = self._extract_bases(typ, bases)
             assert (
@@ -16,6 +16,7 @@ import types
 from typing import Optional, Type, Union
 
 from .analysis_lib import make_module
+from .ast_cache import parse_file
 from .error_code import ErrorCode
 from .find_unused import used
 from .importer import load_module_from_file
@@ -77,6 +78,7 @@ def annotate_file(
     verbose: bool = False,
     dump: bool = False,
     show_errors: bool = False,
+    ast_cache_dir: Union[str, "os.PathLike[str]", None] = None,
 ) -> ast.AST:
     """Annotate the code in a Python source file. Return an AST with extra `inferred_value`
     attributes.
@@ -102,6 +104,9 @@ def annotate_file(
     :param verbose: If True, more details are printed.
     :type verbose: bool
 
+    :param ast_cache_dir: If given, the parsed AST is cached in this directory
+                          and reused if the file has not changed.
+
     """
     filename = os.fspath(path)
     try:
@@ -111,10 +116,11 @@ def annotate_file(
             traceback.print_exc()
         mod = None
 
-    with open(filename, encoding="utf-8") as f:
-        code = f.read()
-    tree = ast.parse(code)
-    _annotate_module(filename, mod, tree, code, visitor_cls, show_errors=show_errors)
+    parsed = parse_file(filename, cache_dir=ast_cache_dir)
+    tree = parsed.tree
+    _annotate_module(
+        filename, mod, tree, parsed.contents, visitor_cls, show_errors=show_errors
+    )
     if dump:
         dump_annotated_code(tree)
     return tree
@@ -0,0 +1,212 @@
+"""
+
+On-disk cache of parsed ASTs.
+
+Parsing is a noticeable part of the cost of checking very large (often generated)
+modules. When a cache directory is configured (``--ast-cache-dir`` on the command
+line), pyanalyze stores the AST and the line splits of each file it parses, and
+later runs reuse them as long as the file is unchanged.
+
+An entry is reused only if the hash of the file's contents matches, because
+edits do not always change the file's modification time and size. Entries are
+specific to the Python version that created them, because the shape of the AST
+differs between versions.
+
+With ``--prefetch N``, a pool of threads reads and parses up to N files ahead of
+the file that is being checked, so that slow reads (for example, from a network
+filesystem) overlap with the analysis.
+
+"""
+
+import ast
+import collections
+import concurrent.futures
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Bump this when the format of cache entries changes.
+CACHE_VERSION = 1
+
+
+@dataclass
+class ParsedFile:
+    """The contents of a Python file, together with its AST."""
+
+    contents: str
+    tree: ast.Module
+    lines: List[str]
+
+
+@dataclass
+class _CacheEntry:
+    cache_version: int
+    python_version: int
+    path: str
+    mtime_ns: int
+    size: int
+    content_hash: str
+    tree: ast.Module
+    lines: List[str]
+
+
+def split_lines(contents: str) -> List[str]:
+    """Splits source code into lines, each ending in a newline."""
+    return [line + "\n" for line in contents.splitlines()]
+
+
+def parse_source(contents: str, filename: str) -> ParsedFile:
+    """Parses source code without consulting a cache."""
+    tree = ast.parse(contents.encode("utf-8"), filename)
+    return ParsedFile(contents, tree, split_lines(contents))
+
+
+def hash_contents(contents: str) -> str:
+    """Returns a short hash of the contents of a file."""
+    return hashlib.blake2b(contents.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class AstCache:
+    """Cache of parsed files, stored in the given directory."""
+
+    directory: Path
+    hits: int = 0
+    misses: int = 0
+
+    def parse_file(self, filename: str) -> ParsedFile:
+        """Reads and parses a file, using the cache if possible.
+
+        Raises OSError if the file cannot be read, UnicodeDecodeError if it is not
+        valid UTF-8, and SyntaxError if it cannot be parsed.
+
+        """
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        with open(path, encoding="utf-8") as f:
+            contents = f.read()
+        content_hash = hash_contents(contents)
+        entry = self._read_entry(path)
+        if entry is not None and entry.content_hash == content_hash:
+            self.hits += 1
+            if entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+                # The file was touched but not changed. Refresh the metadata.
+                entry.mtime_ns = stat.st_mtime_ns
+                entry.size = stat.st_size
+                self._write_entry(entry)
+            return ParsedFile(contents, entry.tree, entry.lines)
+        self.misses += 1
+        parsed = parse_source(contents, filename)
+        self._write_entry(
+            _CacheEntry(
+                cache_version=CACHE_VERSION,
+                python_version=sys.hexversion,
+                path=path,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                content_hash=content_hash,
+                tree=parsed.tree,
+                lines=parsed.lines,
+            )
+        )
+        return parsed
+
+    def _entry_path(self, path: str) -> Path:
+        key = hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest()
+        return self.directory / f"{key}.pickle"
+
+    def _read_entry(self, path: str) -> Optional[_CacheEntry]:
+        try:
+            with self._entry_path(path).open("rb") as f:
+                # Unpickling a large AST creates many objects at once, and the
+                # cyclic garbage collector would otherwise run repeatedly while
+                # it happens. The collector is global to the process, so leave it
+                # alone in prefetch threads while the main thread is checking.
+                gc_was_enabled = gc.isenabled()
+                toggle_gc = threading.current_thread() is threading.main_thread()
+                if toggle_gc:
+                    gc.disable()
+                try:
+                    entry = pickle.load(f)
+                finally:
+                    if toggle_gc and gc_was_enabled:
+                        gc.enable()
+        except Exception:
+            # Missing, corrupted, or created by an incompatible version.
+            return None
+        if (
+            not isinstance(entry, _CacheEntry)
+            or entry.cache_version != CACHE_VERSION
+            or entry.python_version != sys.hexversion
+            or entry.path != path
+        ):
+            return None
+        return entry
+
+    def _write_entry(self, entry: _CacheEntry) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that concurrent processes
+            # never see a partially written entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self._entry_path(entry.path))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, pickle.PicklingError, RecursionError):
+            # The cache is only an optimization; failing to write it is fine.
+            pass
+
+
+def parse_file(
+    filename: str, *, cache_dir: Union[str, "os.PathLike[str]", None] = None
+) -> ParsedFile:
+    """Reads and parses a file, using the AST cache in cache_dir if it is given."""
+    if cache_dir is None:
+        with open(filename, encoding="utf-8") as f:
+            contents = f.read()
+        return parse_source(contents, filename)
+    return AstCache(Path(cache_dir)).parse_file(filename)
+
+
+def prefetch_files(
+    filenames: Iterable[str],
+    *,
+    num_files: int,
+    cache_dir: Union[str, "os.PathLike[str]", None] = None,
+) -> Iterator[Tuple[str, "concurrent.futures.Future[ParsedFile]"]]:
+    """Reads and parses files in background threads, ahead of their use.
+
+    Yields (filename, future) pairs in the order of filenames. At most num_files
+    files beyond the one that was last yielded are read ahead. Errors from reading
+    or parsing a file are raised by the future's result() method.
+
+    """
+    pending: Deque[Tuple[str, "concurrent.futures.Future[ParsedFile]"]] = (
+        collections.deque()
+    )
+    with concurrent.futures.ThreadPoolExecutor(
+        num_files, thread_name_prefix="pyanalyze-prefetch"
+    ) as executor:
+        try:
+            for filename in filenames:
+                future = executor.submit(parse_file, filename, cache_dir=cache_dir)
+                pending.append((filename, future))
+                if len(pending) > num_files:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            # If the caller stops early, don't read the remaining files.
+            for _, future in pending:
+                future.cancel()
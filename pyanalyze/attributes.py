@@ -8,9 +8,9 @@ import ast
 import inspect
 import sys
 import types
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, ClassVar, Optional, Sequence, Tuple, Union
+from typing import Any, Callable, ClassVar, Dict, Optional, Sequence, Tuple, Union
 
 import asynq
 import qcore
@@ -95,6 +95,9 @@ class AttrContext:
     ) -> GenericBases:
         return {}
 
+    def get_attribute_cache(self) -> Optional["AttributeCache"]:
+        return None
+
 
 def get_root_value(val: Value) -> Value:
     if isinstance(val, AnnotatedValue):
@@ -500,9 +503,114 @@ class AnnotationsContext(Context):
         return self.attr_ctx.get_signature(callable)
 
 
+_MroResult = Tuple[Value, object, bool]
+_NO_ATTRIBUTE = object()
+
+
+def _get_defining_object(provider: object, attr: str) -> object:
+    try:
+        return provider.__dict__.get(attr, _NO_ATTRIBUTE)
+    except Exception:
+        return _NO_ATTRIBUTE
+
+
+@dataclass
+class AttributeCache:
+    """Bounded cache of attribute lookups on classes.
+
+    Looking up an attribute walks the MRO and consults typeshed and the
+    annotations of every base class. A :class:`pyanalyze.checker.Checker` keeps
+    one of these so that the result is shared across files. Only the lookup
+    through the MRO is cached: hooks such as :class:`KnownAttributeHook` and
+    :class:`ClassAttributeTransformer` are applied to the cached result on every
+    access.
+
+    Classes may be mutated while we are running, usually when a module is
+    imported. The cache is emptied whenever the set of imported modules changes,
+    and an entry found in the ``__dict__`` of a class is used only while that
+    class still holds the same object. Attributes found only through ``getattr()``
+    are not cached. When the cache is full, it is emptied.
+
+    Other mutations while no module is being imported are not detected: if a
+    class earlier in the MRO gains the attribute, or an attribute found in
+    typeshed or in annotations is later shadowed by an entry in the class
+    ``__dict__``, the cached result is used until the cache is emptied.
+
+    """
+
+    max_size: int = 16384
+    hits: int = 0
+    misses: int = 0
+    _num_modules: int = 0
+    _results: Dict[
+        Tuple[type, str, bool, bool, bool, bool], Tuple[_MroResult, object]
+    ] = field(default_factory=dict, repr=False)
+
+    def get_attribute_from_mro(
+        self, typ: type, ctx: AttrContext, on_class: bool
+    ) -> _MroResult:
+        num_modules = len(sys.modules)
+        if num_modules != self._num_modules:
+            self._results.clear()
+            self._num_modules = num_modules
+        key = (
+            typ,
+            ctx.attr,
+            on_class,
+            ctx.skip_mro,
+            ctx.skip_unwrap,
+            ctx.prefer_typeshed,
+        )
+        try:
+            result, defining_object = self._results[key]
+        except TypeError:
+            # unhashable metaclass
+            return _get_attribute_from_mro_uncached(typ, ctx, on_class)
+        except KeyError:
+            pass
+        else:
+            if (
+                defining_object is _NO_ATTRIBUTE
+                or _get_defining_object(result[1], ctx.attr) is defining_object
+            ):
+                self.hits += 1
+                return result
+        self.misses += 1
+        result = _get_attribute_from_mro_uncached(typ, ctx, on_class)
+        _, provider, from_dict = result
+        if from_dict:
+            defining_object = _get_defining_object(provider, ctx.attr)
+            if defining_object is _NO_ATTRIBUTE:
+                # Found by getattr() (e.g., on the metaclass or through
+                # __getattr__), so we cannot tell when it changes.
+                return result
+        else:
+            defining_object = _NO_ATTRIBUTE
+        if len(self._results) >= self.max_size:
+            self._results.clear()
+        self._results[key] = (result, defining_object)
+        return result
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
 def _get_attribute_from_mro(
     typ: object, ctx: AttrContext, on_class: bool
-) -> Tuple[Value, object, bool]:
+) -> _MroResult:
+    if safe_isinstance(typ, type):
+        cache = ctx.get_attribute_cache()
+        if cache is not None:
+            return cache.get_attribute_from_mro(typ, ctx, on_class)
+    return _get_attribute_from_mro_uncached(typ, ctx, on_class)
+
+
+def _get_attribute_from_mro_uncached(
+    typ: object, ctx: AttrContext, on_class: bool
+) -> _MroResult:
     # Then go through the MRO and find base classes that may define the attribute.
     if safe_isinstance(typ, type) and safe_issubclass(typ, Enum):
         # Special case, to avoid picking an attribute of Enum instances (e.g., name)
@@ -0,0 +1,158 @@
+"""
+
+Recording the calls made in the code that is checked.
+
+Pass ``--call-graph`` to write a table of call edges. Each edge has the qualified
+name of the caller (the function containing the call, or the module for calls at
+module level), the qualified name of the callee, and the file and line of the
+call. Each edge appears only once.
+
+The output format depends on the extension of the output file:
+
+- ``.db`` or ``.sqlite``: an SQLite database with a ``names`` table mapping
+  integer ids to qualified names, and an ``edges`` table with the columns
+  ``caller``, ``callee`` (ids in ``names``), ``filename`` and ``lineno``.
+- Anything else: a CSV file with the columns ``caller``, ``callee``, ``filename``
+  and ``lineno``.
+
+"""
+
+import csv
+import os
+import sqlite3
+import types
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .safe import safe_getattr
+
+# (caller, callee, filename, lineno), with names and filenames as indexes into
+# CallGraph.strings
+_Edge = Tuple[int, int, int, int]
+
+_SQLITE_EXTENSIONS = (".db", ".sqlite")
+
+
+def get_qualified_name(obj: object) -> Optional[str]:
+    """Returns a fully qualified name for a function, class, or module."""
+    if isinstance(obj, types.ModuleType):
+        return obj.__name__
+    qualname = safe_getattr(obj, "__qualname__", None)
+    if not isinstance(qualname, str):
+        return None
+    module = safe_getattr(obj, "__module__", None)
+    if module is None:
+        # Methods of builtin types
+        objclass = safe_getattr(obj, "__objclass__", None)
+        module = safe_getattr(objclass, "__module__", None)
+    if not isinstance(module, str):
+        return qualname
+    return f"{module}.{qualname}"
+
+
+@dataclass
+class CallGraph:
+    """A deduplicated table of call edges.
+
+    Names and filenames are interned, so each edge is stored as four integers.
+
+    """
+
+    strings: List[str] = field(default_factory=list)
+    _string_ids: Dict[str, int] = field(default_factory=dict, repr=False)
+    _edges: Set[_Edge] = field(default_factory=set, repr=False)
+
+    def record_call(self, caller: str, callee: str, filename: str, lineno: int) -> None:
+        self._edges.add(
+            (self._intern(caller), self._intern(callee), self._intern(filename), lineno)
+        )
+
+    def _intern(self, string: str) -> int:
+        try:
+            return self._string_ids[string]
+        except KeyError:
+            index = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+            return index
+
+    def merge(self, other: "CallGraph") -> None:
+        """Adds the edges of another graph, such as one from a worker process."""
+        for caller, callee, filename, lineno in other._edges:
+            self._edges.add(
+                (
+                    self._intern(other.strings[caller]),
+                    self._intern(other.strings[callee]),
+                    self._intern(other.strings[filename]),
+                    lineno,
+                )
+            )
+
+    def edges(self) -> Iterator[Tuple[str, str, str, int]]:
+        """Yields (caller, callee, filename, lineno) for each edge, in sorted order."""
+        strings = self.strings
+        for caller, callee, filename, lineno in sorted(
+            self._edges,
+            key=lambda edge: (
+                strings[edge[2]],
+                edge[3],
+                strings[edge[0]],
+                strings[edge[1]],
+            ),
+        ):
+            yield strings[caller], strings[callee], strings[filename], lineno
+
+    def write(self, path: str) -> None:
+        if os.path.splitext(path)[1] in _SQLITE_EXTENSIONS:
+            self._write_sqlite(path)
+        else:
+            self._write_csv(path)
+
+    def _write_csv(self, path: str) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["caller", "callee", "filename", "lineno"])
+            writer.writerows(self.edges())
+
+    def _write_sqlite(self, path: str) -> None:
+        if os.path.exists(path):
+            os.unlink(path)
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE names (id INTEGER PRIMARY KEY, name TEXT NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE TABLE edges (caller INTEGER NOT NULL, callee INTEGER NOT"
+                    " NULL, filename TEXT NOT NULL, lineno INTEGER NOT NULL)"
+                )
+                names = _number(
+                    name
+                    for caller, callee, _, _ in self.edges()
+                    for name in (caller, callee)
+                )
+                connection.executemany(
+                    "INSERT INTO names VALUES (?, ?)",
+                    ((index, name) for name, index in names.items()),
+                )
+                connection.executemany(
+                    "INSERT INTO edges VALUES (?, ?, ?, ?)",
+                    (
+                        (names[caller], names[callee], filename, lineno)
+                        for caller, callee, filename, lineno in self.edges()
+                    ),
+                )
+                connection.execute("CREATE INDEX edges_callee ON edges (callee)")
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        return len(self._edges)
+
+
+def _number(names: Iterable[str]) -> Dict[str, int]:
+    ids = {}
+    for name in names:
+        if name not in ids:
+            ids[name] = len(ids)
+    return ids
@@ -20,6 +20,7 @@ from typing import (
     Optional,
     Sequence,
     Set,
+    Sized,
     Tuple,
     Union,
 )
@@ -27,9 +28,11 @@ from typing import (
 import qcore
 
 from .arg_spec import ArgSpecCache, GenericBases
-from .attributes import AttrContext, get_attribute
+from .attributes import AttrContext, AttributeCache, get_attribute
+from .format_strings import FormatStringCache
+from .memory import MemoryTracker, get_current_rss, megabytes
 from .node_visitor import Failure
-from .options import Options, PyObjectSequenceOption
+from .options import BooleanOption, IntegerOption, Options, PyObjectSequenceOption
 from .reexport import ImplicitReexportTracker
 from .safe import is_instance_of_typing_name, is_typing_name, safe_getattr
 from .shared_options import VariableNameValues
@@ -44,8 +47,10 @@ from .signature import (
 )
 from .stacked_scopes import Composite
 from .suggested_type import CallableTracker
+from .summaries import ReturnSummaryStore
 from .type_object import TypeObject, get_mro
 from .typeshed import TypeshedFinder
+from .typevar import SolverCache
 from .value import (
     UNINITIALIZED_VALUE,
     AnnotatedValue,
@@ -87,6 +92,35 @@ class AdditionalBaseProviders(PyObjectSequenceOption[_BaseProvider]):
     name = "additional_base_providers"
 
 
+class LowMemory(BooleanOption):
+    """If True, pyanalyze reduces memory use on large runs by discarding most
+    per-file state as soon as each file has been checked and by periodically
+    dropping cached data. This makes checking somewhat slower."""
+
+    name = "low_memory"
+    is_global = True
+
+
+class MaxMemory(IntegerOption):
+    """Target for the peak memory use (resident set size) of the run, in megabytes.
+    In low-memory mode, caches are dropped whenever memory use exceeds this target.
+    At the end of the run, pyanalyze reports whether the target was met. 0 means
+    no target."""
+
+    name = "max_memory"
+    default_value = 0
+    is_global = True
+
+
+# In low-memory mode, drop caches after checking this many files even if we
+# are not above the memory target.
+_TRIM_INTERVAL = 100
+# The resident set size rarely goes down after objects are freed, so if memory
+# use is still above the target after dropping caches, we drop them again only
+# once it has grown by this fraction of the target.
+_TRIM_MARGIN = 0.1
+
+
 @dataclass
 class Checker:
     raw_options: InitVar[Optional[Options]] = None
@@ -95,6 +129,7 @@ class Checker:
     ts_finder: TypeshedFinder = field(init=False)
     reexport_tracker: ImplicitReexportTracker = field(init=False)
     callable_tracker: CallableTracker = field(init=False)
+    return_summaries: ReturnSummaryStore = field(init=False)
     type_object_cache: Dict[Union[type, super, str], TypeObject] = field(
         default_factory=dict, init=False, repr=False
     )
@@ -105,6 +140,21 @@ class Checker:
     type_alias_cache: Dict[object, TypeAlias] = field(default_factory=dict)
     _should_exclude_any: bool = False
     _has_used_any_match: bool = False
+    _files_since_trim: int = field(default=0, init=False, repr=False)
+    # RSS in bytes above which caches are dropped; None if there is no target
+    _memory_threshold: Optional[int] = field(default=None, init=False, repr=False)
+    format_string_cache: FormatStringCache = field(
+        default_factory=FormatStringCache, init=False, repr=False
+    )
+    typevar_solver_cache: SolverCache = field(
+        default_factory=SolverCache, init=False, repr=False
+    )
+    attribute_cache: AttributeCache = field(
+        default_factory=AttributeCache, init=False, repr=False
+    )
+    memory_tracker: Optional[MemoryTracker] = field(
+        default=None, init=False, repr=False
+    )
 
     def __post_init__(self, raw_options: Optional[Options]) -> None:
         if raw_options is None:
@@ -120,6 +170,7 @@ class Checker:
         )
         self.reexport_tracker = ImplicitReexportTracker(self.options)
         self.callable_tracker = CallableTracker()
+        self.return_summaries = ReturnSummaryStore(self.options)
 
         for vnv in self.options.get_value_for(VariableNameValues):
             for variable in vnv.varnames:
@@ -133,6 +184,71 @@ class Checker:
     def perform_final_checks(self) -> List[Failure]:
         return self.callable_tracker.check()
 
+    def record_file_completed(self, filename: str) -> None:
+        """Called after each file has been checked.
+
+        In low-memory mode, this periodically drops cached data. If a memory
+        report was requested, this samples memory use.
+
+        """
+        if self.memory_tracker is not None:
+            self.memory_tracker.record_file(filename)
+        if not self.options.get_value_for(LowMemory):
+            return
+        self._files_since_trim += 1
+        if self._files_since_trim >= _TRIM_INTERVAL or self._is_over_memory_target():
+            self.trim_caches()
+            self._update_memory_threshold()
+
+    def _is_over_memory_target(self) -> bool:
+        max_memory = self.options.get_value_for(MaxMemory)
+        if max_memory <= 0:
+            return False
+        if self._memory_threshold is None:
+            self._memory_threshold = megabytes(max_memory)
+        rss = get_current_rss()
+        return rss is not None and rss > self._memory_threshold
+
+    def _update_memory_threshold(self) -> None:
+        max_memory = self.options.get_value_for(MaxMemory)
+        if max_memory <= 0:
+            return
+        target = megabytes(max_memory)
+        rss = get_current_rss()
+        if rss is None or rss <= target:
+            self._memory_threshold = target
+        else:
+            self._memory_threshold = rss + int(target * _TRIM_MARGIN)
+
+    def trim_caches(self) -> None:
+        """Drops cached data that can be recomputed when needed."""
+        self._files_since_trim = 0
+        self.type_object_cache.clear()
+        self.type_alias_cache.clear()
+        self.format_string_cache.clear()
+        self.typevar_solver_cache.clear()
+        self.attribute_cache.clear()
+        self.arg_spec_cache.trim_caches()
+        self.ts_finder.trim_caches()
+
+    def get_caches(self) -> Dict[str, Sized]:
+        """Returns the caches kept by the checker, for memory reporting."""
+        return {
+            "Checker.type_object_cache": self.type_object_cache,
+            "Checker.type_alias_cache": self.type_alias_cache,
+            "Checker.vnv_map": self.vnv_map,
+            "Checker.format_string_cache": self.format_string_cache,
+            "Checker.typevar_solver_cache": self.typevar_solver_cache,
+            "Checker.attribute_cache": self.attribute_cache,
+            "ArgSpecCache.known_argspecs": self.arg_spec_cache.known_argspecs,
+            "ArgSpecCache.generic_bases_cache": (
+                self.arg_spec_cache.generic_bases_cache
+            ),
+            "ArgSpecCache.annotation_cache": self.arg_spec_cache.annotation_cache,
+            "TypeshedFinder._attribute_cache": self.ts_finder._attribute_cache,
+            "TypeshedFinder._assignment_cache": self.ts_finder._assignment_cache,
+        }
+
     def get_additional_bases(self, typ: Union[type, super]) -> Set[type]:
         bases = set()
         for provider in self.options.get_value_for(AdditionalBaseProviders):
@@ -287,6 +403,13 @@ class Checker:
         """Whether Any should be compatible only with itself."""
         return self._should_exclude_any
 
+    def get_typevar_solver_cache(self) -> Optional[SolverCache]:
+        # Solutions found while assuming that two types are compatible (when
+        # checking recursive protocols) may not hold in general.
+        if self.assumed_compatibilities:
+            return None
+        return self.typevar_solver_cache
+
     def signature_from_value(
         self,
         value: Value,
@@ -491,3 +614,6 @@ class CheckerAttrContext(AttrContext):
         self, typ: Union[type, str], generic_args: Sequence[Value]
     ) -> GenericBases:
         return self.checker.get_generic_bases(typ, generic_args)
+
+    def get_attribute_cache(self) -> Optional[AttributeCache]:
+        return self.checker.attribute_cache
@@ -5,7 +5,7 @@ Error codes used by test_scope.
 """
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, Iterator
+from typing import Dict, Iterable, Iterator, Tuple
 
 import pyanalyze
 
@@ -18,6 +18,11 @@ class Error:
     name: str
     description: str
 
+    def __reduce__(self) -> Tuple[object, ...]:
+        # The default pickle protocol cannot restore frozen dataclasses with
+        # __slots__, which breaks passing failures between processes.
+        return (Error, (self.name, self.description))
+
 
 class ErrorRegistry:
     errors: Dict[str, Error]
@@ -170,6 +175,7 @@ ErrorCode = ErrorRegistry(
         Error("generator_return", "Generator must return an iterable"),
         Error("unsafe_comparison", "Non-overlapping equality checks"),
         Error("must_use", "Value cannot be discarded"),
+        Error("analysis_timeout", "Analysis took longer than the configured budget"),
     ]
 )
 
@@ -10,6 +10,7 @@ import re
 from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import (
+    Any,
     Callable,
     Dict,
     Iterable,
@@ -399,19 +400,35 @@ def check_string_format(
     args: Value,
     on_error: Callable[..., None],
     ctx: CanAssignContext,
+    *,
+    cache: Optional["FormatStringCache"] = None,
 ) -> Tuple[Value, Optional[ast.expr]]:
-    """Checks that arguments to %-formatted strings are correct."""
-    if isinstance(format_str, bytes):
-        fs = PercentFormatString.from_bytes_pattern(format_str)
+    """Checks that arguments to %-formatted strings are correct.
+
+    If cache is given, it is used to avoid parsing the same format string repeatedly.
+
+    """
+    if cache is not None:
+        fs, lint_errors = cache.get_percent_format(format_str)
     else:
-        fs = PercentFormatString.from_pattern(format_str)
-    for err in fs.lint():
+        fs, lint_errors = _parse_percent_format(format_str)
+    for err in lint_errors:
         on_error(node, err, error_code=ErrorCode.bad_format_string)
     for err in fs.accept(args, ctx):
         on_error(node, err, error_code=ErrorCode.bad_format_string)
     return TypedValue(type(format_str)), maybe_replace_with_fstring(fs, args_node)
 
 
+def _parse_percent_format(
+    format_str: Union[str, bytes],
+) -> Tuple[PercentFormatString, Sequence[str]]:
+    if isinstance(format_str, bytes):
+        fs = PercentFormatString.from_bytes_pattern(format_str)
+    else:
+        fs = PercentFormatString.from_pattern(format_str)
+    return fs, tuple(fs.lint())
+
+
 def maybe_replace_with_fstring(
     fs: PercentFormatString, args_node: ast.expr
 ) -> Optional[ast.expr]:
@@ -680,3 +697,80 @@ def _parse_replacement_field(state: _ParserState) -> Union[str, ReplacementField
     else:
         arg_name = arg_name_str
     return ReplacementField(arg_name, tuple(index_attribute), conversion, format_spec)
+
+
+# Format strings that are so common that we parse them only once, when this
+# module is imported.
+_COMMON_PERCENT_FORMATS = {
+    (type(pattern), pattern): _parse_percent_format(pattern)
+    for pattern in ("%s", "%d", "%r", "%s: %s", b"%s", b"%d")
+}
+_COMMON_FORMATS = {
+    pattern: parse_format_string(pattern) for pattern in ("{}", "{!r}", "{}: {}")
+}
+
+
+@dataclass
+class FormatStringCache:
+    """Bounded cache of parsed format strings.
+
+    Code often uses the same format strings many times (for example, in logging
+    calls), so parsing each of them only once saves time. A :class:`pyanalyze.checker.Checker`
+    keeps one of these so that it is shared across files. When the cache is full,
+    the entries added first are dropped.
+
+    The parsed objects are shared between callers and must not be modified.
+
+    """
+
+    max_size: int = 4096
+    _percent_formats: Dict[
+        Tuple[type, Union[str, bytes]], Tuple[PercentFormatString, Sequence[str]]
+    ] = field(default_factory=dict, repr=False)
+    _formats: Dict[str, Tuple[FormatString, FormatErrors]] = field(
+        default_factory=dict, repr=False
+    )
+
+    def get_percent_format(
+        self, pattern: Union[str, bytes]
+    ) -> Tuple[PercentFormatString, Sequence[str]]:
+        """Returns the parsed %-format string and the errors found by linting it."""
+        # Include the type in the key so that we never compare str and bytes.
+        key = (type(pattern), pattern)
+        try:
+            return _COMMON_PERCENT_FORMATS[key]
+        except KeyError:
+            pass
+        try:
+            return self._percent_formats[key]
+        except KeyError:
+            pass
+        result = _parse_percent_format(pattern)
+        self._add(self._percent_formats, key, result)
+        return result
+
+    def get_format(self, pattern: str) -> Tuple[FormatString, FormatErrors]:
+        """Returns the parsed .format() string and any errors found while parsing it."""
+        try:
+            return _COMMON_FORMATS[pattern]
+        except KeyError:
+            pass
+        try:
+            return self._formats[pattern]
+        except KeyError:
+            pass
+        result = parse_format_string(pattern)
+        self._add(self._formats, pattern, result)
+        return result
+
+    def _add(self, cache: Dict[Any, Any], key: object, value: object) -> None:
+        if len(cache) >= self.max_size:
+            del cache[next(iter(cache))]
+        cache[key] = value
+
+    def clear(self) -> None:
+        self._percent_formats.clear()
+        self._formats.clear()
+
+    def __len__(self) -> int:
+        return len(self._percent_formats) + len(self._formats)
@@ -25,7 +25,6 @@ from .annotated_types import MaxLen, MinLen
 from .annotations import type_from_value
 from .error_code import ErrorCode
 from .extensions import assert_type, reveal_locals, reveal_type
-from .format_strings import parse_format_string
 from .predicates import IsAssignablePredicate
 from .safe import hasattr_static, is_union, safe_isinstance, safe_issubclass
 from .signature import (
@@ -1423,7 +1422,7 @@ def _str_format_impl(ctx: CallContext) -> Value:
     used_indices = set()
     used_kwargs = set()
     current_index = 0
-    parsed, errors = parse_format_string(template)
+    parsed, errors = ctx.visitor.checker.format_string_cache.get_format(template)
     if errors:
         _, message = errors[0]
         ctx.show_error(message, error_code=ErrorCode.incompatible_call)
@@ -10,7 +10,7 @@ import sys
 from functools import lru_cache
 from pathlib import Path
 from types import ModuleType
-from typing import Optional, Sequence, Tuple, cast
+from typing import List, Optional, Sequence, Tuple, cast
 
 
 @lru_cache()
@@ -28,27 +28,8 @@ def load_module_from_file(
     May throw any errors that happen while the file is being imported.
 
     """
-    # Attempt to get the location of the module relative to sys.path so we can import it
-    # somewhat properly
     abspath = Path(filename).resolve()
-    candidate_paths = []
-    path: Sequence[str] = import_paths if import_paths else sys.path
-    for sys_path_entry in path:
-        if not sys_path_entry:
-            continue
-        import_path = Path(sys_path_entry)
-        try:
-            relative_path = abspath.relative_to(import_path)
-        except ValueError:
-            continue
-
-        parts = [*relative_path.parts[:-1], relative_path.stem]
-        if not all(part.isidentifier() for part in parts):
-            continue
-        if parts[-1] == "__init__":
-            parts = parts[:-1]
-
-        candidate_paths.append((import_path, ".".join(parts)))
+    candidate_paths = _get_candidate_paths(abspath, import_paths)
 
     # First attempt to import only through paths that have __init__.py at every level
     # to avoid importing through unnecessary namespace packages.
@@ -64,14 +45,7 @@ def load_module_from_file(
                     )
                 return existing, is_compiled
             if restrict_init:
-                missing_init = False
-                for parent in abspath.parents:
-                    if parent == import_path:
-                        break
-                    if not directory_has_init(parent):
-                        missing_init = True
-                        break
-                if missing_init:
+                if _is_missing_init(abspath, import_path):
                     if verbose:
                         print(f"skipping {import_path} because of missing __init__.py")
                     continue
@@ -102,6 +76,60 @@ def load_module_from_file(
     return import_module(str(abspath), abspath), False
 
 
+def get_module_name(
+    filename: str, *, import_paths: Sequence[str] = ()
+) -> Optional[str]:
+    """Return the name under which :func:`load_module_from_file` would import
+    the given file, without importing it.
+
+    Returns None if the file is not on the import path.
+
+    """
+    abspath = Path(filename).resolve()
+    candidate_paths = _get_candidate_paths(abspath, import_paths)
+    for import_path, module_path in candidate_paths:
+        if module_path in sys.modules or not _is_missing_init(abspath, import_path):
+            return module_path
+    if candidate_paths:
+        return candidate_paths[0][1]
+    return None
+
+
+def _get_candidate_paths(
+    abspath: Path, import_paths: Sequence[str]
+) -> List[Tuple[Path, str]]:
+    # Attempt to get the location of the module relative to sys.path so we can import it
+    # somewhat properly
+    candidate_paths = []
+    path: Sequence[str] = import_paths if import_paths else sys.path
+    for sys_path_entry in path:
+        if not sys_path_entry:
+            continue
+        import_path = Path(sys_path_entry)
+        try:
+            relative_path = abspath.relative_to(import_path)
+        except ValueError:
+            continue
+
+        parts = [*relative_path.parts[:-1], relative_path.stem]
+        if not all(part.isidentifier() for part in parts):
+            continue
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+
+        candidate_paths.append((import_path, ".".join(parts)))
+    return candidate_paths
+
+
+def _is_missing_init(abspath: Path, import_path: Path) -> bool:
+    for parent in abspath.parents:
+        if parent == import_path:
+            return False
+        if not directory_has_init(parent):
+            return True
+    return False
+
+
 def import_module(module_path: str, filename: Path) -> ModuleType:
     """Import a file under an arbitrary module name."""
     spec = importlib.util.spec_from_file_location(module_path, filename)
@@ -0,0 +1,626 @@
+"""
+
+A Language Server Protocol server for pyanalyze.
+
+Start it with ``pyanalyze lsp`` (or ``python -m pyanalyze lsp``). The server talks
+to the editor over stdin and stdout. It keeps a single
+:class:`pyanalyze.checker.Checker` alive, so caches are shared across all checks,
+and supports:
+
+- diagnostics for open files, published when a file is opened or saved and after
+  edits (once the file has not been edited for a short while)
+- hovering over an expression to see the type pyanalyze inferred for it
+
+As on the command line, pyanalyze imports the code it checks. Unsaved edits are
+executed as a fresh copy of the module.
+
+"""
+
+import argparse
+import ast
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import types
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+import qcore
+
+from . import importer
+from .error_code import ErrorCode
+from .name_check_visitor import NameCheckVisitor
+from .node_visitor import Failure, VisitorError
+from .shared_options import ImportPaths
+from .value import Value
+
+# JSON-RPC and LSP error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+REQUEST_CANCELLED = -32800
+
+# LSP enums
+_TEXT_DOCUMENT_SYNC_FULL = 1
+_SEVERITY_ERROR = 1
+
+DEFAULT_DEBOUNCE = 0.3
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Reads a single JSON-RPC message from the stream.
+
+    Returns None at the end of the stream. Raises ValueError if the message is
+    malformed.
+
+    """
+    content_length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode("ascii").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    if content_length is None:
+        raise ValueError("Missing Content-Length header")
+    body = stream.read(content_length)
+    if len(body) < content_length:
+        return None
+    message = json.loads(body.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError(f"Invalid message: {message!r}")
+    return message
+
+
+def write_message(stream: BinaryIO, message: Mapping[str, Any]) -> None:
+    """Writes a JSON-RPC message to the stream."""
+    body = json.dumps(message).encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(body))
+    stream.write(body)
+    stream.flush()
+
+
+def uri_to_path(uri: str) -> str:
+    parsed = urllib.parse.urlparse(uri)
+    if parsed.scheme != "file":
+        return uri
+    return urllib.request.url2pathname(urllib.parse.unquote(parsed.path))
+
+
+def utf16_length(text: str) -> int:
+    """Returns the length of text in UTF-16 code units, which LSP positions count."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def utf16_to_byte_offset(line: str, character: int) -> int:
+    """Converts an LSP character offset into a UTF-8 offset, as used by the ast module."""
+    units = 0
+    for index, char in enumerate(line):
+        if units >= character:
+            return len(line[:index].encode("utf-8"))
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line.encode("utf-8"))
+
+
+def byte_offset_to_utf16(line: str, offset: int) -> int:
+    """Converts a UTF-8 offset, as used by the ast module, into an LSP character offset."""
+    return utf16_length(line.encode("utf-8")[:offset].decode("utf-8", errors="ignore"))
+
+
+class AnalysisCancelled(VisitorError):
+    """Raised inside the visitor when a newer version of the file arrives."""
+
+
+@dataclass
+class Document:
+    """A file open in the editor."""
+
+    uri: str
+    text: str
+    version: int
+    path: str = ""
+    # Module object created for module_version of the text
+    module: Optional[types.ModuleType] = field(default=None, repr=False)
+    module_version: Optional[int] = None
+    # Annotated AST from the last completed check, for hover
+    tree: Optional[ast.Module] = field(default=None, repr=False)
+    tree_version: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if not self.path:
+            self.path = uri_to_path(self.uri)
+
+    def lines(self) -> List[str]:
+        return self.text.splitlines()
+
+    def load_module(self, import_paths: Sequence[str]) -> types.ModuleType:
+        """Returns a module object for the current text.
+
+        If the file has not been edited since it was saved, it is imported normally.
+        Otherwise, the text is executed in a copy of the module, which replaces it in
+        sys.modules so that other files see the edited version.
+
+        """
+        if self.module is not None and self.module_version == self.version:
+            return self.module
+        if os.path.exists(self.path):
+            base, is_compiled = importer.load_module_from_file(
+                self.path, import_paths=import_paths
+            )
+            if is_compiled:
+                raise ImportError(f"{self.path} is already imported as compiled code")
+            if (
+                base is not None
+                and self.module is None
+                and _read_file(self.path) == self.text
+            ):
+                module = base
+            else:
+                base = base or self.module
+                module = self._execute(base)
+        else:
+            module = self._execute(self.module)
+        self.module = module
+        self.module_version = self.version
+        return module
+
+    def _execute(self, base: Optional[types.ModuleType]) -> types.ModuleType:
+        if base is not None:
+            module = types.ModuleType(base.__name__)
+            for attr in ("__file__", "__package__", "__spec__", "__path__"):
+                if hasattr(base, attr):
+                    setattr(module, attr, getattr(base, attr))
+        else:
+            module = types.ModuleType(Path(self.path).stem)
+            module.__file__ = self.path
+        exec(compile(self.text, self.path, "exec"), module.__dict__)
+        if base is not None and sys.modules.get(base.__name__) is base:
+            sys.modules[base.__name__] = module
+        return module
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+class _ServerVisitor(NameCheckVisitor):
+    """Visitor used by the server.
+
+    It loads the module from the editor's copy of the file and stops as soon as the
+    file is edited again.
+
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        document: Document,
+        cancel_event: threading.Event,
+        **kwargs: Any,
+    ) -> None:
+        self.document = document
+        self.cancel_event = cancel_event
+        super().__init__(*args, **kwargs)
+
+    def _load_module(self) -> Tuple[Optional[types.ModuleType], bool]:
+        import_paths = self.options.get_value_for(ImportPaths)
+        try:
+            module = self.document.load_module([str(p) for p in import_paths])
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            node = (
+                self.tree.body[0] if self.tree is not None and self.tree.body else None
+            )
+            self.show_error(
+                node,
+                f"Failed to import {self.filename} due to {e!r}",
+                error_code=ErrorCode.import_failed,
+            )
+            return None, False
+        return module, False
+
+    def visit(self, node: ast.AST) -> Value:
+        if self.cancel_event.is_set():
+            raise AnalysisCancelled(f"Check of {self.filename} was cancelled")
+        return super().visit(node)
+
+
+@dataclass
+class LanguageServer:
+    """Serves LSP requests read from input_stream.
+
+    Checks run on the thread that calls :meth:`serve`, while a background thread reads
+    messages, so that an edit can cancel the check of the previous version of a file.
+    After an edit, the file is checked once it has not changed for debounce seconds.
+
+    """
+
+    input_stream: BinaryIO
+    output_stream: BinaryIO
+    visitor_kwargs: Mapping[str, Any]
+    debounce: float = DEFAULT_DEBOUNCE
+    documents: Dict[str, Document] = field(default_factory=dict)
+    checks_completed: int = 0
+    checks_cancelled: int = 0
+    _queue: "queue.Queue[Optional[Dict[str, Any]]]" = field(
+        default_factory=queue.Queue, repr=False
+    )
+    # uri -> time at which the file should be checked
+    _pending: Dict[str, float] = field(default_factory=dict, repr=False)
+    _cancelled_requests: Set[object] = field(default_factory=set, repr=False)
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _checking_uri: Optional[str] = field(default=None, repr=False)
+    _shutdown_requested: bool = field(default=False, repr=False)
+    _exited: bool = field(default=False, repr=False)
+
+    def serve(self) -> int:
+        """Handles messages until the client exits. Returns the exit code."""
+        reader = threading.Thread(target=self._read_messages, daemon=True)
+        reader.start()
+        # Anything printed during checking would corrupt the protocol stream.
+        with contextlib.redirect_stdout(sys.stderr):
+            while not self._exited:
+                try:
+                    message = self._queue.get(timeout=self._time_until_next_check())
+                except queue.Empty:
+                    self._run_due_checks()
+                    continue
+                if message is None:
+                    break
+                self._handle_message(message)
+                if self._queue.empty():
+                    self._run_due_checks()
+        return 0 if self._shutdown_requested else 1
+
+    # Reading messages (on the background thread)
+
+    def _read_messages(self) -> None:
+        while True:
+            try:
+                message = read_message(self.input_stream)
+            except ValueError as e:
+                message = {"jsonrpc": "2.0", "method": "$/parseError", "params": str(e)}
+            if message is None:
+                self._queue.put(None)
+                return
+            self._note_incoming(message)
+            self._queue.put(message)
+
+    def _note_incoming(self, message: Mapping[str, Any]) -> None:
+        method = message.get("method")
+        try:
+            if method == "$/cancelRequest":
+                self._cancelled_requests.add(message.get("params", {}).get("id"))
+            elif method in ("textDocument/didChange", "textDocument/didClose"):
+                uri = message.get("params", {}).get("textDocument", {}).get("uri")
+                if uri is not None and uri == self._checking_uri:
+                    self._cancel_event.set()
+        except Exception:
+            # Malformed params; the main thread reports the error when it
+            # handles the message.
+            pass
+
+    # Dispatching
+
+    def _handle_message(self, message: Mapping[str, Any]) -> None:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if "id" not in message:
+            if method == "$/parseError":
+                self._send_error(None, PARSE_ERROR, str(params))
+            elif method == "exit":
+                self._exited = True
+            elif not self._shutdown_requested:
+                handler = self._notification_handlers.get(method)
+                if handler is not None:
+                    try:
+                        handler(self, params)
+                    except Exception:
+                        # There is no way to report errors in notifications to
+                        # the client, so just keep serving.
+                        traceback.print_exc(file=sys.stderr)
+            return
+        request_id = message["id"]
+        if not isinstance(request_id, (int, str)):
+            self._send_error(None, INVALID_REQUEST, f"Invalid id {request_id!r}")
+            return
+        if request_id in self._cancelled_requests:
+            self._cancelled_requests.discard(request_id)
+            self._send_error(request_id, REQUEST_CANCELLED, "Request cancelled")
+            return
+        if self._shutdown_requested:
+            self._send_error(request_id, INVALID_REQUEST, "Server is shutting down")
+            return
+        handler = self._request_handlers.get(method)
+        if handler is None:
+            self._send_error(request_id, METHOD_NOT_FOUND, f"Unknown method {method}")
+            return
+        try:
+            result = handler(self, params)
+        except (KeyError, TypeError) as e:
+            traceback.print_exc(file=sys.stderr)
+            self._send_error(request_id, INVALID_PARAMS, f"Invalid params: {e!r}")
+            return
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            self._send_error(request_id, INTERNAL_ERROR, f"Internal error: {e!r}")
+            return
+        self._send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    def _send(self, message: Mapping[str, Any]) -> None:
+        write_message(self.output_stream, message)
+
+    def _send_error(self, request_id: object, code: int, message: str) -> None:
+        self._send(
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": code, "message": message},
+            }
+        )
+
+    # Requests
+
+    def _initialize(self, params: Mapping[str, Any]) -> Dict[str, Any]:
+        return {
+            "capabilities": {
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": _TEXT_DOCUMENT_SYNC_FULL,
+                    "save": {"includeText": True},
+                },
+                "hoverProvider": True,
+            },
+            "serverInfo": {"name": "pyanalyze"},
+        }
+
+    def _shutdown(self, params: Mapping[str, Any]) -> None:
+        self._shutdown_requested = True
+        self._pending.clear()
+
+    def _hover(self, params: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return None
+        if document.tree_version != document.version:
+            # Hover should reflect the latest text, so check it now.
+            self._check_document(document)
+        if document.tree is None:
+            return None
+        position = params["position"]
+        lines = document.lines()
+        lineno = position["line"]
+        if lineno >= len(lines):
+            return None
+        col_offset = utf16_to_byte_offset(lines[lineno], position["character"])
+        found = _find_node(document.tree, lineno + 1, col_offset)
+        if found is None:
+            return None
+        value, start, end = found
+        return {
+            "contents": {"kind": "markdown", "value": f"```python\n{value}\n```"},
+            "range": {"start": _position(lines, *start), "end": _position(lines, *end)},
+        }
+
+    # Notifications
+
+    def _did_open(self, params: Mapping[str, Any]) -> None:
+        item = params["textDocument"]
+        document = Document(item["uri"], item["text"], item.get("version", 0))
+        self.documents[document.uri] = document
+        self._schedule_check(document.uri, delay=0)
+
+    def _did_change(self, params: Mapping[str, Any]) -> None:
+        item = params["textDocument"]
+        document = self.documents.get(item["uri"])
+        changes = params.get("contentChanges")
+        if document is None or not changes:
+            return
+        # We asked for full-document sync, so the last change has the whole text.
+        document.text = changes[-1]["text"]
+        document.version = item.get("version", document.version + 1)
+        self._schedule_check(document.uri, delay=self.debounce)
+
+    def _did_save(self, params: Mapping[str, Any]) -> None:
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return
+        if params.get("text") is not None and params["text"] != document.text:
+            document.text = params["text"]
+            document.version += 1
+        self._schedule_check(document.uri, delay=0)
+
+    def _did_close(self, params: Mapping[str, Any]) -> None:
+        uri = params["textDocument"]["uri"]
+        self.documents.pop(uri, None)
+        self._pending.pop(uri, None)
+        self._publish_diagnostics(uri, [], None)
+
+    _request_handlers = {
+        "initialize": _initialize,
+        "shutdown": _shutdown,
+        "textDocument/hover": _hover,
+    }
+    _notification_handlers = {
+        "textDocument/didOpen": _did_open,
+        "textDocument/didChange": _did_change,
+        "textDocument/didSave": _did_save,
+        "textDocument/didClose": _did_close,
+    }
+
+    # Checking
+
+    def _schedule_check(self, uri: str, *, delay: float) -> None:
+        # Rescheduling drops the check that was pending for an older version.
+        self._pending[uri] = time.monotonic() + delay
+
+    def _time_until_next_check(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return max(0.0, min(self._pending.values()) - time.monotonic())
+
+    def _run_due_checks(self) -> None:
+        now = time.monotonic()
+        for uri, due in sorted(self._pending.items(), key=lambda item: item[1]):
+            if due > now or not self._queue.empty():
+                # New messages may make this check stale, so handle them first.
+                break
+            self._check_document(self.documents[uri])
+
+    def _check_document(self, document: Document) -> None:
+        self._pending.pop(document.uri, None)
+        version = document.version
+        self._cancel_event.clear()
+        self._checking_uri = document.uri
+        try:
+            result = self._analyze(document)
+        except AnalysisCancelled:
+            self.checks_cancelled += 1
+            return
+        finally:
+            self._checking_uri = None
+        if self.documents.get(document.uri) is not document:
+            return
+        self.checks_completed += 1
+        diagnostics, tree = result
+        if tree is not None:
+            document.tree = tree
+            document.tree_version = version
+        if document.version == version:
+            self._publish_diagnostics(document.uri, diagnostics, version)
+
+    def _analyze(
+        self, document: Document
+    ) -> Tuple[List[Dict[str, Any]], Optional[ast.Module]]:
+        lines = document.lines()
+        try:
+            tree = ast.parse(document.text, document.path)
+        except SyntaxError as e:
+            lineno = e.lineno or 1
+            line = lines[lineno - 1] if 0 < lineno <= len(lines) else ""
+            character = utf16_length(line[: max((e.offset or 1) - 1, 0)])
+            start = {"line": lineno - 1, "character": character}
+            diagnostic = {
+                "range": {"start": start, "end": start},
+                "severity": _SEVERITY_ERROR,
+                "source": "pyanalyze",
+                "message": f"Failed to parse code: {e.msg}",
+            }
+            return [diagnostic], None
+        visitor = _ServerVisitor(
+            document.path,
+            document.text,
+            tree,
+            document=document,
+            cancel_event=self._cancel_event,
+            annotate=True,
+            **self.visitor_kwargs,
+        )
+        # Suggested fixes are not applied, so don't keep them around.
+        with qcore.override(_ServerVisitor, "_changes_for_fixer", None):
+            failures = visitor.check(ignore_missing_module=True)
+        return [_make_diagnostic(failure, lines) for failure in failures], tree
+
+    def _publish_diagnostics(
+        self, uri: str, diagnostics: List[Dict[str, Any]], version: Optional[int]
+    ) -> None:
+        params: Dict[str, Any] = {"uri": uri, "diagnostics": diagnostics}
+        if version is not None:
+            params["version"] = version
+        self._send(
+            {
+                "jsonrpc": "2.0",
+                "method": "textDocument/publishDiagnostics",
+                "params": params,
+            }
+        )
+
+
+def _position(lines: Sequence[str], lineno: int, col_offset: int) -> Dict[str, int]:
+    line = lines[lineno - 1] if 0 < lineno <= len(lines) else ""
+    return {"line": lineno - 1, "character": byte_offset_to_utf16(line, col_offset)}
+
+
+def _make_diagnostic(failure: Failure, lines: Sequence[str]) -> Dict[str, Any]:
+    lineno = failure.get("lineno", 1)
+    line = lines[lineno - 1] if 0 < lineno <= len(lines) else ""
+    start = _position(lines, lineno, failure.get("col_offset", 0))
+    # Failures record only where the error starts, so mark the rest of the line.
+    end = {"line": lineno - 1, "character": max(utf16_length(line), start["character"])}
+    diagnostic = {
+        "range": {"start": start, "end": end},
+        "severity": _SEVERITY_ERROR,
+        "source": "pyanalyze",
+        "message": failure["description"],
+    }
+    if "code" in failure:
+        diagnostic["code"] = failure["code"].name
+    return diagnostic
+
+
+def _find_node(
+    tree: ast.AST, lineno: int, col_offset: int
+) -> Optional[Tuple[Value, Tuple[int, int], Tuple[int, int]]]:
+    """Finds the innermost annotated expression containing the given position.
+
+    Returns its inferred value and its start and end positions.
+
+    """
+    best = None
+    for node in ast.walk(tree):
+        value = getattr(node, "inferred_value", None)
+        if not isinstance(node, ast.expr) or not isinstance(value, Value):
+            continue
+        if node.end_lineno is None or node.end_col_offset is None:
+            continue
+        start = (node.lineno, node.col_offset)
+        end = (node.end_lineno, node.end_col_offset)
+        if not (start <= (lineno, col_offset) < end):
+            continue
+        # Containing expressions start earlier or end later.
+        if best is None or start > best[1] or (start == best[1] and end < best[2]):
+            best = (value, start, end)
+    return best
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs the server on stdin and stdout."""
+    parser = argparse.ArgumentParser(
+        prog="pyanalyze lsp", description="Run pyanalyze as a language server."
+    )
+    parser.add_argument(
+        "--config-file", type=Path, help="Path to a pyproject.toml configuration file"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="Seconds to wait after an edit before checking the file",
+    )
+    args = parser.parse_args(argv)
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs(
+        {"config_file": args.config_file}
+    )
+    server = LanguageServer(
+        sys.stdin.buffer, sys.stdout.buffer, kwargs, debounce=args.debounce
+    )
+    return server.serve()
@@ -0,0 +1,246 @@
+"""
+
+Helpers for measuring the memory use of a pyanalyze run.
+
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Sized
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+_BYTES_PER_MB = 1024 * 1024
+
+
+def get_current_rss() -> Optional[int]:
+    """Returns the current resident set size of this process in bytes, if known."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss()
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_peak_rss(*, children: bool = False) -> Optional[int]:
+    """Returns the peak resident set size in bytes, if known.
+
+    If children is True, returns the peak of the largest terminated child process
+    (such as a worker used for --parallel) instead.
+
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    max_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return max_rss
+    return max_rss * 1024
+
+
+def format_size(size: Optional[int]) -> str:
+    """Formats a size in bytes for display."""
+    if size is None:
+        return "unknown"
+    return f"{size / _BYTES_PER_MB:.1f} MB"
+
+
+def megabytes(size_mb: int) -> int:
+    """Converts a size in megabytes to bytes."""
+    return size_mb * _BYTES_PER_MB
+
+
+# Objects of these types are shared with the rest of the program, so we do not
+# count them (or anything reachable only through them) towards a cache's size.
+_UNCOUNTED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.CodeType,
+    types.FrameType,
+)
+
+
+def get_deep_size(obj: object, seen: Optional[Set[int]] = None) -> int:
+    """Returns the approximate number of bytes used by obj and everything it refers to.
+
+    Classes, modules and functions are not counted. Objects whose id is in seen are
+    skipped, and the ids of all counted objects are added to it, so that measuring
+    several objects with the same set counts shared objects only once.
+
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _UNCOUNTED_TYPES):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current, 0)
+        pending += gc.get_referents(current)
+    return size
+
+
+@dataclass
+class FileMemoryUsage:
+    """Memory use sampled after checking a single file."""
+
+    filename: str
+    seconds: float
+    rss: Optional[int]
+    rss_growth: Optional[int]
+    traced: Optional[int] = None
+    traced_growth: Optional[int] = None
+    traced_peak: Optional[int] = None
+
+
+@dataclass
+class CacheUsage:
+    """Size of a cache at the end of the run."""
+
+    name: str
+    entries: int
+    size: int
+
+
+@dataclass
+class AllocationSite:
+    """A source line that allocated memory that is still in use."""
+
+    location: str
+    size: int
+    count: int
+
+
+@dataclass
+class MemoryTracker:
+    """Tracks memory use over a run and attributes it to files and caches.
+
+    If use_tracemalloc is True, :mod:`tracemalloc` is used to measure the memory
+    allocated by Python code more precisely than the resident set size allows.
+    This makes checking considerably slower.
+
+    """
+
+    use_tracemalloc: bool = True
+    files: List[FileMemoryUsage] = field(default_factory=list)
+    caches: List[CacheUsage] = field(default_factory=list)
+    top_allocations: List[AllocationSite] = field(default_factory=list)
+    _last_rss: Optional[int] = field(default=None, repr=False)
+    _last_traced: int = field(default=0, repr=False)
+    _last_time: float = field(default=0.0, repr=False)
+    _started_tracemalloc: bool = field(default=False, repr=False)
+
+    def start(self) -> None:
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._last_rss = get_current_rss()
+        if tracemalloc.is_tracing():
+            self._last_traced, _ = tracemalloc.get_traced_memory()
+        self._last_time = time.perf_counter()
+
+    def record_file(self, filename: str) -> None:
+        """Samples memory use after the given file has been checked."""
+        now = time.perf_counter()
+        rss = get_current_rss()
+        if rss is not None and self._last_rss is not None:
+            rss_growth = rss - self._last_rss
+        else:
+            rss_growth = None
+        usage = FileMemoryUsage(filename, now - self._last_time, rss, rss_growth)
+        if tracemalloc.is_tracing():
+            traced, traced_peak = tracemalloc.get_traced_memory()
+            usage.traced = traced
+            usage.traced_growth = traced - self._last_traced
+            usage.traced_peak = traced_peak
+            if sys.version_info >= (3, 9):
+                tracemalloc.reset_peak()
+            self._last_traced = traced
+        self.files.append(usage)
+        self._last_rss = rss
+        self._last_time = time.perf_counter()
+
+    def record_caches(
+        self, caches: Mapping[str, Sized], *, shared: Iterable[object] = ()
+    ) -> None:
+        """Records the number of entries in and the size of each cache.
+
+        Objects shared between caches are counted towards the first cache that
+        refers to them. Objects in shared (such as the objects owning the caches)
+        are not counted, nor is anything reachable only through them.
+
+        """
+        # Don't count the tracker's own data.
+        seen = {id(self), id(self.files), id(caches), *map(id, shared)}
+        for name, cache in caches.items():
+            self.caches.append(CacheUsage(name, len(cache), get_deep_size(cache, seen)))
+
+    def stop(self, *, num_allocation_sites: int = 25) -> None:
+        """Stops tracing and records the allocation sites using the most memory."""
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot()
+        for stat in snapshot.statistics("lineno")[:num_allocation_sites]:
+            frame = stat.traceback[0]
+            self.top_allocations.append(
+                AllocationSite(
+                    f"{frame.filename}:{frame.lineno}", stat.size, stat.count
+                )
+            )
+        self.stop_tracing()
+
+    def stop_tracing(self) -> None:
+        """Stops tracemalloc if this tracker started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "peak_rss": get_peak_rss(),
+            "final_rss": get_current_rss(),
+            "python_version": sys.version,
+            "files": [asdict(usage) for usage in self.files],
+            "caches": [asdict(usage) for usage in self.caches],
+            "top_allocations": [asdict(site) for site in self.top_allocations],
+        }
+
+    def write_report(self, output_file: str) -> None:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def display(self, *, num_files: int = 10) -> None:
+        """Prints a summary of the report."""
+        print(f"Peak memory use: {format_size(get_peak_rss())}")
+        growing_files = sorted(
+            (usage for usage in self.files if usage.rss_growth is not None),
+            key=lambda usage: usage.rss_growth,
+            reverse=True,
+        )
+        if growing_files:
+            print("Files with the largest memory growth:")
+            for usage in growing_files[:num_files]:
+                print(f"    {format_size(usage.rss_growth):>10}  {usage.filename}")
+        if self.caches:
+            print("Cache sizes:")
+            for cache in sorted(self.caches, key=lambda cache: -cache.size):
+                print(
+                    f"    {format_size(cache.size):>10}  {cache.name} "
+                    f"({cache.entries} entries)"
+                )
@@ -22,6 +22,7 @@ import os
 import os.path
 import pickle
 import sys
+import time
 import traceback
 import types
 import typing
@@ -42,9 +43,11 @@ from typing import (
     Iterator,
     List,
     Mapping,
+    NoReturn,
     Optional,
     Sequence,
     Set,
+    Sized,
     Tuple,
     Type,
     TypeVar,
@@ -58,7 +61,16 @@ import typeshed_client
 from qcore.testing import Anything
 from typing_extensions import Annotated, Protocol, get_args, get_origin
 
-from . import attributes, format_strings, importer, node_visitor, type_evaluation
+from . import (
+    attributes,
+    format_strings,
+    importer,
+    memory,
+    node_visitor,
+    source_profile,
+    tracing,
+    type_evaluation,
+)
 from .analysis_lib import get_attribute_path
 from .annotated_types import Ge, Gt, Le, Lt
 from .annotations import (
@@ -72,7 +84,8 @@ from .annotations import (
 from .arg_spec import ArgSpecCache, IgnoredCallees, UnwrapClass, is_dot_asynq_function
 from .asynq_checker import AsynqChecker
 from .boolability import Boolability, get_boolability
-from .checker import Checker, CheckerAttrContext
+from .call_graph import CallGraph, get_qualified_name
+from .checker import Checker, CheckerAttrContext, LowMemory, MaxMemory
 from .error_code import Error, ErrorCode
 from .extensions import (
     ParameterTypeGuard,
@@ -122,7 +135,15 @@ from .safe import (
     safe_isinstance,
     safe_issubclass,
 )
-from .shared_options import EnforceNoUnused, ImportPaths, Paths
+from .shards import (
+    AttributeData,
+    Shard,
+    ShardResult,
+    UnusedData,
+    parse_shard_argument,
+    select_files,
+)
+from .shared_options import EnforceNoUnused, ExcludedPaths, ImportPaths, Paths
 from .signature import (
     ANY_SIGNATURE,
     ARGS,
@@ -170,6 +191,7 @@ from .suggested_type import (
 )
 from .type_object import TypeObject, get_mro
 from .typeshed import TypeshedFinder
+from .typevar import SolverCache
 from .value import (
     NO_RETURN_VALUE,
     SYS_PLATFORM_EXTENSION,
@@ -473,6 +495,24 @@ class ForLoopAlwaysEntered(BooleanOption):
     name = "for_loop_always_entered"
 
 
+class FunctionTimeout(IntegerOption):
+    """Maximum number of seconds to spend checking a single function. If checking a
+    function takes longer, pyanalyze stops checking its body, infers its return type
+    as Any, and shows an analysis_timeout error. 0 means no limit."""
+
+    default_value = 0
+    name = "function_timeout"
+
+
+class FileTimeout(IntegerOption):
+    """Maximum number of seconds to spend checking a single file. If checking a file
+    takes longer, pyanalyze skips the remaining function bodies in the file and shows
+    an analysis_timeout error. 0 means no limit."""
+
+    default_value = 0
+    name = "file_timeout"
+
+
 class IgnoreNoneAttributes(BooleanOption):
     """If True, we ignore None when type checking attribute access on a Union
     type."""
@@ -656,6 +696,78 @@ class IgnoredTypesForAttributeChecking(PyObjectSequenceOption[type]):
     default_value = [object, abc.ABC]
 
 
+class _CompletedFileReporter(node_visitor.BaseNodeVisitor):
+    """Stand-in for a visitor whose file has been fully checked.
+
+    In low-memory mode, :class:`ClassAttributeChecker` keeps one of these instead of
+    the full visitor. It only retains what is needed to report errors on the given
+    lines: the settings and options, and the lines of the file that are shown as
+    context or that may contain ignore comments.
+
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        lines: List[str],
+        *,
+        options: Options,
+        settings: Optional[Mapping[node_visitor.ErrorCodeInstance, bool]] = None,
+        verbosity: int = logging.CRITICAL,
+        add_ignores: bool = False,
+        changes_for_fixer: Optional[Dict[str, List[node_visitor.Replacement]]] = None,
+    ) -> None:
+        super().__init__(
+            filename,
+            "",
+            ast.Module(body=[], type_ignores=[]),
+            settings,
+            verbosity=verbosity,
+            add_ignores=add_ignores,
+        )
+        self.options = options
+        self._changes_for_fixer = changes_for_fixer
+        self._cached_lines = lines
+
+    @classmethod
+    def from_visitor(
+        cls, visitor: "NameCheckVisitor", linenos: Iterable[int]
+    ) -> "_CompletedFileReporter":
+        return cls(
+            visitor.filename,
+            cls._get_needed_lines(visitor._lines(), linenos),
+            options=visitor.options,
+            settings=visitor.settings,
+            verbosity=visitor._logging_level,
+            add_ignores=visitor.add_ignores,
+            changes_for_fixer=visitor._changes_for_fixer,
+        )
+
+    @classmethod
+    def _get_needed_lines(cls, lines: List[str], linenos: Iterable[int]) -> List[str]:
+        needed = set()
+        # Leading comments may contain a file-level ignore.
+        for i, line in enumerate(lines):
+            needed.add(i)
+            if not line.startswith("#"):
+                break
+        for lineno in linenos:
+            # The previous line may contain an ignore comment.
+            start = max(lineno - max(cls.CONTEXT_LINES, 2), 1)
+            needed.update(range(start - 1, lineno + cls.CONTEXT_LINES))
+        last = min(max(needed, default=-1) + 1, len(lines))
+        return [line if i in needed else "\n" for i, line in enumerate(lines[:last])]
+
+    def is_enabled(self, error_code: node_visitor.ErrorCodeInstance) -> bool:
+        if not isinstance(error_code, Error):
+            return False
+        return self.options.is_error_code_enabled(error_code)
+
+    @classmethod
+    def get_description_for_error_code(cls, error_code: Error) -> str:
+        return error_code.description
+
+
 class ClassAttributeChecker:
     """Helper class to keep track of attributes that are read and set on instances."""
 
@@ -667,6 +779,7 @@ class ClassAttributeChecker:
         should_serialize: bool = False,
         options: Options = Options.from_option_list(),
         ts_finder: Optional[TypeshedFinder] = None,
+        low_memory: bool = False,
     ) -> None:
         self.options = options
         # we might not have examined all parent classes when looking for attributes set
@@ -679,6 +792,12 @@ class ClassAttributeChecker:
         self.all_failures = []
         self.types_with_dynamic_attrs = set()
         self.filename_to_visitor = {}
+        # In low-memory mode, we keep only the locations of attribute reads instead
+        # of their AST nodes, and replace visitors with a lightweight stand-in once
+        # their file has been checked.
+        self.low_memory = low_memory
+        # Dictionary from filename to line numbers where attributes are read
+        self.filename_to_linenos = collections.defaultdict(set)
         # Dictionary from type to list of (attr_name, node, filename) tuples
         self.attributes_read = collections.defaultdict(list)
         # Dictionary from type to set of attributes that are set on that class
@@ -717,8 +836,25 @@ class ClassAttributeChecker:
         self.filename_to_visitor[visitor.filename] = visitor
         serialized = self.serialize_type(typ)
         if serialized is not None:
+            if self.low_memory and isinstance(node, (ast.expr, ast.stmt)):
+                node = node_visitor._FakeNode(node.lineno, node.col_offset)
+                self.filename_to_linenos[visitor.filename].add(node.lineno)
             self.attributes_read[serialized].append((attr_name, node, visitor.filename))
 
+    def record_visitor_completed(self, visitor: "NameCheckVisitor") -> None:
+        """Records that the visitor has finished checking its file.
+
+        In low-memory mode, this drops the reference to the visitor so that its
+        per-file state can be freed.
+
+        """
+        if not self.low_memory or visitor.filename not in self.filename_to_visitor:
+            return
+        linenos = self.filename_to_linenos.pop(visitor.filename, ())
+        self.filename_to_visitor[visitor.filename] = (
+            _CompletedFileReporter.from_visitor(visitor, linenos)
+        )
+
     def record_attribute_set(
         self, typ: type, attr_name: str, node: ast.AST, value: Value
     ) -> None:
@@ -811,6 +947,16 @@ class ClassAttributeChecker:
                 return value
         return AnyValue(AnySource.inference)
 
+    def get_caches(self) -> Dict[str, Sized]:
+        """Returns the data kept by the attribute checker, for memory reporting."""
+        return {
+            "ClassAttributeChecker.attributes_read": self.attributes_read,
+            "ClassAttributeChecker.attributes_set": self.attributes_set,
+            "ClassAttributeChecker.attribute_values": self.attribute_values,
+            # Last, so that the size of each visitor excludes data counted above
+            "ClassAttributeChecker.filename_to_visitor": self.filename_to_visitor,
+        }
+
     def check_attribute_reads(self) -> None:
         """Checks that all recorded attribute reads refer to valid attributes.
 
@@ -891,7 +1037,11 @@ class ClassAttributeChecker:
             return (str(typ), "")
 
     def _check_attribute_read(
-        self, typ: type, attr_name: str, node: ast.AST, visitor: "NameCheckVisitor"
+        self,
+        typ: type,
+        attr_name: str,
+        node: ast.AST,
+        visitor: Union["NameCheckVisitor", _CompletedFileReporter],
     ) -> None:
         # class itself has the attribute
         if hasattr(typ, attr_name):
@@ -1075,6 +1225,19 @@ class CallSiteCollector:
             pass
 
 
+class _AnalysisTimeout(node_visitor.VisitorError):
+    """Raised when checking a function or file takes longer than its budget.
+
+    node is the function whose body should no longer be checked, or the statement
+    being checked when the budget ran out at module level.
+
+    """
+
+    def __init__(self, message: str, node: ast.AST) -> None:
+        super().__init__(message, ErrorCode.analysis_timeout)
+        self.node = node
+
+
 class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
     """Visitor class that infers the type and value of Python objects and detects errors."""
 
@@ -1083,11 +1246,16 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
     """Path (relative to this class's file) to a pyproject.toml config file."""
 
     _argspec_to_retval: Dict[int, Tuple[Value, MaybeSignature]]
+    _deadline: Optional[float]
+    _file_deadline: Optional[float]
+    _file_timed_out: bool
+    _function_deadlines: List[Tuple[Optional[float], FunctionDefNode]]
     _has_used_any_match: bool
     _method_cache: Dict[Type[ast.AST], Callable[[Any], Optional[Value]]]
     _name_node_to_statement: Optional[Dict[ast.AST, Optional[ast.AST]]]
     _should_exclude_any: bool
     _statement_types: Set[Type[ast.AST]]
+    _timed_out_functions: Set[ast.AST]
     ann_assign_type: Optional[Tuple[Optional[Value], bool]]
     annotate: bool
     arg_spec_cache: ArgSpecCache
@@ -1097,6 +1265,7 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
     being_assigned: Optional[Value]
     checker: Checker
     collector: Optional[CallSiteCollector]
+    call_graph: Optional[CallGraph]
     current_class: Optional[type]
     current_enum_members: Optional[Dict[object, str]]
     current_function: Optional[object]
@@ -1129,13 +1298,16 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         contents: str,
         tree: ast.Module,
         *,
-        settings: Optional[Mapping[Error, bool]] = None,
+        settings: Optional[Mapping[node_visitor.ErrorCodeInstance, bool]] = None,
         fail_after_first: bool = False,
         verbosity: int = logging.CRITICAL,
         unused_finder: Optional[UnusedObjectFinder] = None,
         module: Optional[types.ModuleType] = None,
         attribute_checker: Optional[ClassAttributeChecker] = None,
         collector: Optional[CallSiteCollector] = None,
+        call_graph: Optional[CallGraph] = None,
+        tracer: Optional[tracing.Tracer] = None,
+        source_profiler: Optional[source_profile.SourceProfiler] = None,
         annotate: bool = False,
         add_ignores: bool = False,
         checker: Checker,
@@ -1173,12 +1345,15 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         # true if we're in the body of a comprehension's loop
         self.in_comprehension_body = False
         self.options = checker.options
+        self.tracer = tracer
+        self.source_profiler = source_profiler
 
         if module is not None:
             self.module = module
             self.is_compiled = False
         else:
-            self.module, self.is_compiled = self._load_module()
+            with tracing.span(tracer, "import", tracing.PHASE, file=filename):
+                self.module, self.is_compiled = self._load_module()
 
         if self.module is not None and hasattr(self.module, "__name__"):
             module_path = tuple(self.module.__name__.split("."))
@@ -1213,6 +1388,7 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         self.in_annotation = False
         self.in_union_decomposition = False
         self.collector = collector
+        self.call_graph = call_graph
         self.import_name_to_node = {}
         self.future_imports = set()  # active future imports in this file
         self.return_values = []
@@ -1229,11 +1405,25 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         self._statement_types = set()
         self._has_used_any_match = False
         self._should_exclude_any = False
+        # Time budgets (see FunctionTimeout and FileTimeout). _deadline is the
+        # earliest deadline that currently applies, or None if there is none.
+        self._deadline = None
+        self._file_deadline = None
+        self._file_timed_out = False
+        self._function_deadlines = []
+        self._timed_out_functions = set()
         self._fill_method_cache()
 
     def get_local_return_value(self, sig: MaybeSignature) -> Optional[Value]:
         val, saved_sig = self._argspec_to_retval.get(id(sig), (None, None))
         if sig is not saved_sig:
+            if self.checker.return_summaries.enabled:
+                return self.checker.return_summaries.get_return_value(
+                    sig,
+                    current_module=(
+                        self.module.__name__ if self.module is not None else None
+                    ),
+                )
             return None
         return val
 
@@ -1269,6 +1459,9 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         """Whether Any should be compatible only with itself."""
         return self._should_exclude_any
 
+    def get_typevar_solver_cache(self) -> Optional[SolverCache]:
+        return self.checker.get_typevar_solver_cache()
+
     def get_generic_bases(
         self, typ: Union[type, str], generic_args: Sequence[Value] = ()
     ) -> GenericBases:
@@ -1347,22 +1540,31 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
             if self.module is None and not ignore_missing_module:
                 # If we could not import the module, other checks frequently fail.
                 return self.all_failures
-            with qcore.override(self, "state", VisitorState.collect_names):
-                self.visit(self.tree)
-            with qcore.override(self, "state", VisitorState.check_names):
-                self.visit(self.tree)
-            # This doesn't deal correctly with errors from the attribute checker. Therefore,
-            # leaving this check disabled by default for now.
-            self.show_errors_for_unused_ignores(ErrorCode.unused_ignore)
-            self.show_errors_for_bare_ignores(ErrorCode.bare_ignore)
-            if (
-                self.module is not None
-                and self.unused_finder is not None
-                and not self.has_file_level_ignore()
-            ):
-                self.unused_finder.record_module_visited(self.module)
-            if self.module is not None and self.module.__name__ is not None:
-                self.reexport_tracker.record_module_completed(self.module.__name__)
+            file_timeout = self.options.get_value_for(FileTimeout)
+            if file_timeout > 0:
+                self._file_deadline = time.monotonic() + file_timeout
+                self._update_deadline()
+            try:
+                with source_profile.checking(self.source_profiler, self):
+                    with qcore.override(
+                        self, "state", VisitorState.collect_names
+                    ), tracing.span(
+                        self.tracer, "collect", tracing.PHASE, file=self.filename
+                    ):
+                        self.visit(self.tree)
+                    with qcore.override(
+                        self, "state", VisitorState.check_names
+                    ), tracing.span(
+                        self.tracer, "check", tracing.PHASE, file=self.filename
+                    ):
+                        self.visit(self.tree)
+            except _AnalysisTimeout as e:
+                # The budget ran out in module-level code.
+                self.show_error(
+                    e.node, e.message, error_code=ErrorCode.analysis_timeout
+                )
+            with tracing.span(self.tracer, "report", tracing.PHASE, file=self.filename):
+                self._finish_check()
         except node_visitor.VisitorError:
             raise
         except Exception as e:
@@ -1371,20 +1573,48 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
                 f"{traceback.format_exc()}\nInternal error: {e!r}",
                 error_code=ErrorCode.internal_error,
             )
+        if self.attribute_checker is not None:
+            self.attribute_checker.record_visitor_completed(self)
+        self.checker.record_file_completed(self.filename)
         # Recover memory used for the AST. We keep the visitor object around later in order
         # to show ClassAttributeChecker errors, but those don't need the full AST.
         self.tree = None
-        self._lines.__cached_per_instance_cache__.clear()
+        self._cached_lines = None
         self._argspec_to_retval.clear()
         end_time = qcore.utime()
         message = f"{self.filename} took {(end_time - start_time) / qcore.SECOND:.2f} s"
         self.logger.log(logging.INFO, message)
         return self.all_failures
 
+    def _finish_check(self) -> None:
+        # This doesn't deal correctly with errors from the attribute checker. Therefore,
+        # leaving this check disabled by default for now.
+        self.show_errors_for_unused_ignores(ErrorCode.unused_ignore)
+        self.show_errors_for_bare_ignores(ErrorCode.bare_ignore)
+        if (
+            self.module is not None
+            and self.unused_finder is not None
+            and not self.has_file_level_ignore()
+        ):
+            self.unused_finder.record_module_visited(self.module)
+        if self.module is not None and self.module.__name__ is not None:
+            if self.checker.return_summaries.enabled:
+                self.checker.return_summaries.record_module_completed(
+                    self.module.__name__
+                )
+            if self.is_code_only:
+                self.reexport_tracker.record_module_completed(self.module.__name__)
+            else:
+                self.reexport_tracker.record_module_completed(
+                    self.module.__name__, filename=self.filename, contents=self.contents
+                )
+
     def visit(self, node: ast.AST) -> Value:
         """Visit a node and return the :class:`pyanalyze.value.Value` corresponding
         to the node."""
         # inline self.node_context.add and the superclass's visit() for performance
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._raise_timeout(node)
         node_type = type(node)
         method = self._method_cache[node_type]
         self.node_context.contexts.append(node)
@@ -1415,7 +1645,7 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
             ret = VOID
         if self.annotate:
             node.inferred_value = ret
-        if self.error_for_implicit_any:
+        if self.error_for_implicit_any and ret.contains_implicit_any():
             for val in ret.walk_values():
                 if isinstance(val, AnyValue) and val.source is not AnySource.explicit:
                     self._show_error_if_checking(
@@ -2034,7 +2264,17 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
             ), qcore.override(
                 self, "current_function_info", info
             ):
-                result = self._visit_function_body(info)
+                if self.tracer is None:
+                    result = self._visit_function_body_with_budget(node, info)
+                else:
+                    with self.tracer.span(
+                        node.name,
+                        tracing.FUNCTION,
+                        phase=self.state.name,
+                        file=self.filename,
+                        lineno=node.lineno,
+                    ):
+                        result = self._visit_function_body_with_budget(node, info)
 
         self.check_typeis(info)
 
@@ -2210,6 +2450,14 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         if sig is None or sig.has_return_value():
             return
         self._argspec_to_retval[id(sig)] = (return_value, sig)
+        if (
+            self.checker.return_summaries.enabled
+            and isinstance(val, KnownValue)
+            and self.module is not None
+        ):
+            self.checker.return_summaries.record_return_value(
+                self.module.__name__, val.val, return_value
+            )
 
     def _get_potential_function(self, node: FunctionDefNode) -> Optional[object]:
         scope_type = self.scopes.scope_type()
@@ -2246,6 +2494,83 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
                     result = self._visit_function_body(info)
             return compute_value_of_function(info, self, result=result.return_value)
 
+    def _visit_function_body_with_budget(
+        self, node: FunctionDefNode, function_info: FunctionInfo
+    ) -> FunctionResult:
+        """Visits the body of a function, stopping if it exceeds its time budget."""
+        function_timeout = self.options.get_value_for(FunctionTimeout)
+        if function_timeout <= 0 and self._file_deadline is None:
+            if not self._file_timed_out:
+                return self._visit_function_body(function_info)
+        if self._file_timed_out or node in self._timed_out_functions:
+            return self._timed_out_function_result(function_info)
+        if function_timeout > 0:
+            deadline = time.monotonic() + function_timeout
+        else:
+            deadline = None
+        self._function_deadlines.append((deadline, node))
+        self._update_deadline()
+        try:
+            return self._visit_function_body(function_info)
+        except _AnalysisTimeout as e:
+            if e.node is not node:
+                raise
+            self._timed_out_functions.add(node)
+            self.show_error(node, e.message, error_code=ErrorCode.analysis_timeout)
+            return self._timed_out_function_result(function_info)
+        finally:
+            self._function_deadlines.pop()
+            self._update_deadline()
+
+    def _timed_out_function_result(self, function_info: FunctionInfo) -> FunctionResult:
+        return FunctionResult(
+            AnyValue(AnySource.error),
+            [info.param for info in function_info.params],
+            # Avoid missing_return errors for functions we did not finish checking.
+            has_return=True,
+        )
+
+    def _update_deadline(self) -> None:
+        deadlines = [
+            deadline for deadline, _ in self._function_deadlines if deadline is not None
+        ]
+        if self._file_deadline is not None:
+            deadlines.append(self._file_deadline)
+        self._deadline = min(deadlines) if deadlines else None
+
+    def _raise_timeout(self, node: ast.AST) -> NoReturn:
+        now = time.monotonic()
+        if self._file_deadline is not None and now > self._file_deadline:
+            # Skip all remaining function bodies, starting with the outermost
+            # function we are in.
+            self._file_deadline = None
+            self._file_timed_out = True
+            self._update_deadline()
+            file_timeout = self.options.get_value_for(FileTimeout)
+            if self._function_deadlines:
+                _, function_node = self._function_deadlines[0]
+                raise _AnalysisTimeout(
+                    f"Checking {self.filename} took more than {file_timeout} s;"
+                    f" skipped the rest of {function_node.name} and all"
+                    " remaining functions",
+                    function_node,
+                )
+            raise _AnalysisTimeout(
+                f"Checking {self.filename} took more than {file_timeout} s;"
+                " skipped the rest of the file",
+                node,
+            )
+        for deadline, function_node in self._function_deadlines:
+            if deadline is not None and now > deadline:
+                function_timeout = self.options.get_value_for(FunctionTimeout)
+                raise _AnalysisTimeout(
+                    f"Checking function {function_node.name} took more than"
+                    f" {function_timeout} s; skipped the rest of its body",
+                    function_node,
+                )
+        # Deadlines that already ran out are removed as soon as they are handled.
+        assert False, "no deadline has passed"
+
     def _visit_function_body(self, function_info: FunctionInfo) -> FunctionResult:
         is_collecting = self._is_collecting()
         node = function_info.node
@@ -3770,6 +4095,7 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
                 right,
                 self._show_error_if_checking,
                 self,
+                cache=self.checker.format_string_cache,
             )
             if replacement_node is not None and isinstance(source_node, ast.BinOp):
                 replacement = self.replace_node(source_node, replacement_node)
@@ -4772,6 +5098,14 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
 
         if isinstance(node.target, ast.Name):
             lhs = self.composite_from_name(node.target, force_read=True)
+        elif isinstance(node.target, ast.Attribute):
+            # Read the current value of the attribute. Errors in node.target.value
+            # are not shown twice because errors are deduplicated per node.
+            load_target = ast.Attribute(
+                value=node.target.value, attr=node.target.attr, ctx=ast.Load()
+            )
+            ast.copy_location(load_target, node.target)
+            lhs = self.composite_from_attribute(load_target)
         else:
             lhs = Composite(AnyValue(AnySource.inference), None, node.target)
 
@@ -5481,7 +5815,9 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
             self.yield_checker.record_call(callee_wrapped, node)
             self.asynq_checker.check_call(callee_wrapped, node)
 
-        if self.collector is not None:
+        if self.collector is not None or (
+            self.call_graph is not None and self._is_checking()
+        ):
             callee_val = None
             if isinstance(callee_wrapped, UnboundMethodValue):
                 callee_val = callee_wrapped.get_method()
@@ -5499,7 +5835,10 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
                     else self.module
                 )
                 if caller is not None:
-                    self.collector.record_call(caller, callee_val)
+                    if self.collector is not None:
+                        self.collector.record_call(caller, callee_val)
+                    if self.call_graph is not None and self._is_checking():
+                        self._record_call_graph_edge(caller, callee_val, node)
 
         if (
             isinstance(callee_wrapped, KnownValue)
@@ -5662,6 +6001,17 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
                     return TypedValue(task_cls)
             return return_value
 
+    def _record_call_graph_edge(
+        self, caller: object, callee: object, node: ast.expr
+    ) -> None:
+        assert self.call_graph is not None
+        caller_name = get_qualified_name(caller)
+        callee_name = get_qualified_name(callee)
+        if caller_name is not None and callee_name is not None:
+            self.call_graph.record_call(
+                caller_name, callee_name, self.filename, node.lineno
+            )
+
     def signature_from_value(
         self, value: Value, node: Optional[ast.AST] = None
     ) -> MaybeSignature:
@@ -5804,6 +6154,52 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
             type=Path,
             help="Path to a pyproject.toml configuration file",
         )
+        parser.add_argument(
+            "--memory-report",
+            help=(
+                "Write a JSON report of memory use per file and per cache to this"
+                " file. This makes checking considerably slower."
+            ),
+        )
+        parser.add_argument(
+            "--call-graph",
+            dest="call_graph_output",
+            help=(
+                "Write the calls made in the checked code to this file, as an SQLite"
+                " database if it ends in .db or .sqlite and as CSV otherwise"
+            ),
+        )
+        parser.add_argument(
+            "--line-profile",
+            help=(
+                "Sample which functions and lines of the checked code take the most"
+                " time to check, print the slowest, and write a JSON report to this"
+                " file"
+            ),
+        )
+        parser.add_argument(
+            "--trace",
+            dest="trace_output",
+            help=(
+                "Write a timeline of the analysis of each file to this file, in the"
+                " Chrome trace event format"
+            ),
+        )
+        parser.add_argument(
+            "--shard",
+            type=parse_shard_argument,
+            help=(
+                "Check only part i of N (for example, 2/4) of the files, for splitting"
+                " a run across machines"
+            ),
+        )
+        parser.add_argument(
+            "--shard-output",
+            help=(
+                "Write the errors and the data needed for global checks to this file,"
+                " to be combined with 'pyanalyze merge'"
+            ),
+        )
         parser.add_argument(
             "--display-options",
             action="store_true",
@@ -5824,6 +6220,10 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         paths = checker.options.get_value_for(Paths)
         return tuple(str(path) for path in paths)
 
+    @classmethod
+    def get_exclude_patterns(cls, checker: Checker, **kwargs: Any) -> Sequence[str]:
+        return checker.options.get_value_for(ExcludedPaths)
+
     @classmethod
     def _get_default_settings(
         cls,
@@ -5878,65 +6278,221 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
     @classmethod
     def _run_on_files(
         cls,
-        files: List[str],
+        files: Iterable[str],
         *,
         checker: Checker,
         find_unused: bool = False,
         find_unused_attributes: bool = False,
         attribute_checker: Optional[ClassAttributeChecker] = None,
         unused_finder: Optional[UnusedObjectFinder] = None,
+        memory_report: Optional[str] = None,
+        call_graph_output: Optional[str] = None,
+        shard: Optional[Shard] = None,
+        shard_output: Optional[str] = None,
+        trace_output: Optional[str] = None,
+        line_profile: Optional[str] = None,
         **kwargs: Any,
     ) -> List[node_visitor.Failure]:
+        if shard is not None:
+            files = select_files(files, shard)
+        elif shard_output is not None:
+            files = sorted(files)
+        if call_graph_output is not None:
+            kwargs["call_graph"] = CallGraph()
+        if trace_output is not None:
+            kwargs["tracer"] = tracing.Tracer()
         attribute_checker_enabled = checker.options.is_error_code_enabled_anywhere(
             ErrorCode.attribute_is_never_set
         )
-        if attribute_checker is None:
-            inner_attribute_checker_obj = attribute_checker = ClassAttributeChecker(
-                enabled=attribute_checker_enabled,
-                should_check_unused_attributes=find_unused_attributes,
-                should_serialize=kwargs.get("parallel", False),
-                options=checker.options,
-                ts_finder=checker.ts_finder,
-            )
-        else:
-            inner_attribute_checker_obj = qcore.empty_context
-        if unused_finder is None:
-            unused_finder = UnusedObjectFinder(
-                checker.options,
-                enabled=find_unused or checker.options.get_value_for(EnforceNoUnused),
-                print_output=False,
-            )
-        with inner_attribute_checker_obj as inner_attribute_checker:
-            with unused_finder as inner_unused_finder:
-                all_failures = super()._run_on_files(
+        source_profiler = None
+        if line_profile is not None:
+            if kwargs.get("parallel", False):
+                print("Line profiles are not supported with --parallel")
+            else:
+                source_profiler = kwargs["source_profiler"] = (
+                    source_profile.SourceProfiler()
+                )
+                source_profiler.start()
+        memory_tracker = None
+        if memory_report is not None:
+            if kwargs.get("parallel", False):
+                print("Memory reports are not supported with --parallel")
+            else:
+                memory_tracker = checker.memory_tracker = memory.MemoryTracker()
+                memory_tracker.start()
+        try:
+            if attribute_checker is None:
+                attribute_checker = ClassAttributeChecker(
+                    enabled=attribute_checker_enabled,
+                    should_check_unused_attributes=find_unused_attributes,
+                    should_serialize=kwargs.get("parallel", False)
+                    or shard_output is not None,
+                    options=checker.options,
+                    ts_finder=checker.ts_finder,
+                    low_memory=checker.options.get_value_for(LowMemory)
+                    or shard_output is not None,
+                )
+                if shard_output is None:
+                    inner_attribute_checker_obj = attribute_checker
+                else:
+                    # The attribute reads are checked by "pyanalyze merge".
+                    inner_attribute_checker_obj = qcore.empty_context
+            else:
+                inner_attribute_checker_obj = qcore.empty_context
+            if unused_finder is None:
+                unused_finder = UnusedObjectFinder(
+                    checker.options,
+                    enabled=find_unused
+                    or checker.options.get_value_for(EnforceNoUnused),
+                    print_output=False,
+                )
+            if checker.return_summaries.enabled:
+                import_paths = checker.options.get_value_for(ImportPaths)
+                files = checker.return_summaries.order_files(
+                    files, import_paths=[str(path) for path in import_paths]
+                )
+            with inner_attribute_checker_obj as inner_attribute_checker:
+                with unused_finder as inner_unused_finder:
+                    all_failures = super()._run_on_files(
+                        files,
+                        attribute_checker=(
+                            attribute_checker
+                            if attribute_checker is not None
+                            else inner_attribute_checker
+                        ),
+                        unused_finder=inner_unused_finder,
+                        checker=checker,
+                        **kwargs,
+                    )
+            if shard_output is not None:
+                cls._write_shard_output(
+                    shard_output,
+                    shard or Shard(1, 1),
                     files,
+                    all_failures,
                     attribute_checker=(
-                        attribute_checker
-                        if attribute_checker is not None
-                        else inner_attribute_checker
+                        attribute_checker if attribute_checker_enabled else None
                     ),
-                    unused_finder=inner_unused_finder,
-                    checker=checker,
-                    **kwargs,
+                    find_unused_attributes=find_unused_attributes,
+                    unused_finder=unused_finder,
+                    call_graph=kwargs.get("call_graph"),
                 )
-        if unused_finder is not None:
-            for unused_object in unused_finder.get_unused_objects():
-                # Maybe we should switch to a shared structured format for errors
-                # so we can share code with normal errors better.
-                failure = str(unused_object)
-                print(unused_object)
-                all_failures.append(
-                    {
-                        "filename": node_visitor.UNUSED_OBJECT_FILENAME,
-                        "absolute_filename": node_visitor.UNUSED_OBJECT_FILENAME,
-                        "message": failure + "\n",
-                        "description": failure,
-                    }
+            elif unused_finder is not None:
+                for unused_object in unused_finder.get_unused_objects():
+                    # Maybe we should switch to a shared structured format for errors
+                    # so we can share code with normal errors better.
+                    failure = str(unused_object)
+                    print(unused_object)
+                    all_failures.append(
+                        {
+                            "filename": node_visitor.UNUSED_OBJECT_FILENAME,
+                            "absolute_filename": node_visitor.UNUSED_OBJECT_FILENAME,
+                            "message": failure + "\n",
+                            "description": failure,
+                        }
+                    )
+            if attribute_checker is not None:
+                all_failures += attribute_checker.all_failures
+            if call_graph_output is not None:
+                kwargs["call_graph"].write(call_graph_output)
+            if trace_output is not None:
+                kwargs["tracer"].write(trace_output)
+            if line_profile is not None and source_profiler is not None:
+                source_profiler.stop()
+                source_profiler.display()
+                source_profiler.write_report(line_profile)
+            if memory_report is not None and memory_tracker is not None:
+                checker.memory_tracker = None
+                cls._write_memory_report(
+                    memory_report, memory_tracker, checker, attribute_checker
                 )
-        if attribute_checker is not None:
-            all_failures += attribute_checker.all_failures
+        finally:
+            # Don't leave tracemalloc running if the run failed.
+            if memory_tracker is not None:
+                memory_tracker.stop_tracing()
+        cls._report_memory_use(checker, parallel=kwargs.get("parallel", False))
+        if checker.arg_spec_cache.stub_only_packages and not kwargs.get("parallel"):
+            print(checker.arg_spec_cache.stub_only_stats)
         return all_failures
 
+    @classmethod
+    def _write_shard_output(
+        cls,
+        output_file: str,
+        shard: Shard,
+        files: Sequence[str],
+        failures: List[node_visitor.Failure],
+        *,
+        attribute_checker: Optional[ClassAttributeChecker],
+        find_unused_attributes: bool,
+        unused_finder: UnusedObjectFinder,
+        call_graph: Optional[CallGraph],
+    ) -> None:
+        result = ShardResult(
+            shard=shard,
+            files=list(files),
+            failures=failures,
+            attribute_data=(
+                AttributeData.from_checker(attribute_checker)
+                if attribute_checker is not None
+                else None
+            ),
+            find_unused_attributes=find_unused_attributes,
+            unused_data=(
+                UnusedData.from_finder(unused_finder) if unused_finder.enabled else None
+            ),
+            call_graph=call_graph,
+        )
+        result.write(output_file)
+
+    @classmethod
+    def _write_memory_report(
+        cls,
+        output_file: str,
+        tracker: memory.MemoryTracker,
+        checker: Checker,
+        attribute_checker: Optional[ClassAttributeChecker],
+    ) -> None:
+        tracker.stop()
+        caches = checker.get_caches()
+        if attribute_checker is not None:
+            caches.update(attribute_checker.get_caches())
+        tracker.record_caches(
+            caches,
+            shared=[
+                checker,
+                checker.options,
+                checker.arg_spec_cache,
+                checker.ts_finder,
+                checker.reexport_tracker,
+                checker.callable_tracker,
+                attribute_checker,
+            ],
+        )
+        tracker.display()
+        tracker.write_report(output_file)
+
+    @classmethod
+    def _report_memory_use(cls, checker: Checker, *, parallel: bool) -> None:
+        max_memory = checker.options.get_value_for(MaxMemory)
+        if max_memory <= 0 and not checker.options.get_value_for(LowMemory):
+            return
+        peak = memory.get_peak_rss()
+        if parallel:
+            children_peak = memory.get_peak_rss(children=True)
+            if peak is not None and children_peak is not None:
+                peak = max(peak, children_peak)
+        message = f"Peak memory use: {memory.format_size(peak)}"
+        if max_memory > 0:
+            target = memory.megabytes(max_memory)
+            if peak is None:
+                message += f" (target: {memory.format_size(target)})"
+            elif peak <= target:
+                message += f" (within target of {memory.format_size(target)})"
+            else:
+                message += f" (exceeds target of {memory.format_size(target)})"
+        print(message)
+
     @classmethod
     def check_file_in_worker(
         cls,
@@ -5944,22 +6500,31 @@ class NameCheckVisitor(node_visitor.ReplacingNodeVisitor):
         attribute_checker: Optional[ClassAttributeChecker] = None,
         **kwargs: Any,
     ) -> Tuple[List[node_visitor.Failure], Any]:
-        failures = cls.check_file(
-            filename, attribute_checker=attribute_checker, **kwargs
+        with tracing.span(kwargs.get("tracer"), filename, tracing.FILE, file=filename):
+            failures = cls.check_file(
+                filename, attribute_checker=attribute_checker, **kwargs
+            )
+        return failures, (
+            attribute_checker,
+            kwargs.get("call_graph"),
+            kwargs.get("tracer"),
         )
-        return failures, attribute_checker
 
     @classmethod
     def merge_extra_data(
         cls,
         extra_data: Any,
         attribute_checker: Optional[ClassAttributeChecker] = None,
+        call_graph: Optional[CallGraph] = None,
+        tracer: Optional[tracing.Tracer] = None,
         **kwargs: Any,
     ) -> None:
-        if attribute_checker is None:
-            return
-        for checker in extra_data:
-            if checker is None:
+        for checker, worker_call_graph, worker_tracer in extra_data:
+            if call_graph is not None and worker_call_graph is not None:
+                call_graph.merge(worker_call_graph)
+            if tracer is not None and worker_tracer is not None:
+                tracer.merge(worker_tracer)
+            if checker is None or attribute_checker is None:
                 continue
             for serialized, attrs in checker.attributes_read.items():
                 attribute_checker.attributes_read[serialized] += attrs
@@ -15,14 +15,12 @@ import logging
 import os
 import os.path
 import re
-import subprocess
 import sys
 import tempfile
 from builtins import print as real_print
 from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum
-from pathlib import Path
 from types import ModuleType
 from typing import (
     Any,
@@ -33,6 +31,7 @@ from typing import (
     Mapping,
     Optional,
     Sequence,
+    Set,
     Tuple,
     Type,
     Union,
@@ -43,7 +42,7 @@ import qcore
 from ast_decompiler import decompile
 from typing_extensions import NotRequired, Protocol, TypedDict
 
-from . import analysis_lib, error_code
+from . import analysis_lib, ast_cache, error_code, tracing
 from .safe import safe_getattr, safe_isinstance
 
 Error = Dict[str, Any]
@@ -71,6 +70,9 @@ ITERATION_LIMIT = 150
 
 UNUSED_OBJECT_FILENAME = "<unused>"
 
+# Constructor kwargs used by check_sources() in parallel worker processes.
+_check_sources_worker_kwargs: Dict[str, Any] = {}
+
 
 class _PatchWithDescription(codemod.Patch):
     def __init__(
@@ -133,6 +135,43 @@ class Replacement:
     error_str: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class LineEdit:
+    """Replaces lines start_lineno through end_lineno (inclusive) with new_lines.
+
+    This is the form in which the --autofix option applies a :class:`Replacement`.
+
+    """
+
+    start_lineno: int
+    end_lineno: int
+    new_lines: Tuple[str, ...]
+
+    @classmethod
+    def from_replacement(
+        cls, replacement: Replacement, lines: Sequence[str]
+    ) -> Optional["LineEdit"]:
+        """Converts a replacement into an edit, given the lines it applies to.
+
+        Returns None if the replacement does not change the file.
+
+        """
+        if replacement.lines_to_add is None or not replacement.linenos_to_delete:
+            return None
+        to_delete = set(replacement.linenos_to_delete)
+        start, end = min(to_delete), max(to_delete)
+        # The added lines go after the last deleted line, so lines between the first
+        # and last deleted lines that are not themselves deleted come first.
+        kept = [lines[i - 1] for i in range(start, end + 1) if i not in to_delete]
+        return cls(start, end, (*kept, *replacement.lines_to_add))
+
+    def overlaps(self, other: "LineEdit") -> bool:
+        return (
+            self.start_lineno <= other.end_lineno
+            and other.start_lineno <= self.end_lineno
+        )
+
+
 class FileNotFoundError(Exception):
     pass
 
@@ -181,6 +220,7 @@ class BaseNodeVisitor(ast.NodeVisitor):
     tree: ast.Module
     all_failures: List[Failure]
     is_code_only: bool
+    _cached_lines: Optional[List[str]]
 
     def __init__(
         self,
@@ -219,6 +259,7 @@ class BaseNodeVisitor(ast.NodeVisitor):
         self.add_ignores = add_ignores
         self.caught_errors = None
         self.is_code_only = is_code_only
+        self._cached_lines = None
 
     def check(self) -> List[Failure]:
         """Runs the class's checks on a tree."""
@@ -243,9 +284,10 @@ class BaseNodeVisitor(ast.NodeVisitor):
             return
         self.logger.log(level, f"{qcore.safe_str(label)}: {qcore.safe_str(value)}")
 
-    @qcore.caching.cached_per_instance()
     def _lines(self) -> List[str]:
-        return [line + "\n" for line in self.contents.splitlines()]
+        if self._cached_lines is None:
+            self._cached_lines = ast_cache.split_lines(self.contents)
+        return self._cached_lines
 
     @qcore.caching.cached_per_instance()
     def has_file_level_ignore(
@@ -308,22 +350,34 @@ class BaseNodeVisitor(ast.NodeVisitor):
         filename: str,
         assert_passes: bool = True,
         include_tests: bool = False,
+        ast_cache_dir: Optional[str] = None,
+        prefetched: Optional["concurrent.futures.Future[ast_cache.ParsedFile]"] = None,
         **kwargs: Any,
     ) -> List[Failure]:
         """Run checks on a single file.
 
         include_tests and assert_passes are arguments here for compatibility with check_all_files.
 
+        If ast_cache_dir is given, parsed ASTs are cached in that directory and reused
+        for unchanged files. If prefetched is given, it is a future for the parsed file,
+        as produced by :func:`pyanalyze.ast_cache.prefetch_files`.
+
         """
         try:
-            with open(filename, encoding="utf-8") as f:
-                contents = f.read()
+            with tracing.span(
+                kwargs.get("tracer"), "parse", tracing.PHASE, file=filename
+            ):
+                if prefetched is not None:
+                    parsed = prefetched.result()
+                else:
+                    parsed = ast_cache.parse_file(filename, cache_dir=ast_cache_dir)
         except OSError:
             raise FileNotFoundError(repr(filename))
         except UnicodeDecodeError:
             raise FileNotFoundError(f"Failed to decode contents of {filename}")
-        tree = ast.parse(contents.encode("utf-8"), filename)
-        return cls(filename, contents, tree, **kwargs).check()
+        visitor = cls(filename, parsed.contents, parsed.tree, **kwargs)
+        visitor._cached_lines = parsed.lines
+        return visitor.check()
 
     @classmethod
     def check_all_files(
@@ -349,12 +403,12 @@ class BaseNodeVisitor(ast.NodeVisitor):
         else:
             environ_files = None
         if environ_files is not None:
-            return [
+            return sorted(
                 filename
                 for filename in environ_files
                 if not cls._should_ignore_module(filename)
                 and not filename.endswith(".so")
-            ]
+            )
         else:
             return sorted(
                 set(cls._get_all_python_files(include_tests=include_tests, **kwargs))
@@ -515,32 +569,31 @@ class BaseNodeVisitor(ast.NodeVisitor):
 
     @classmethod
     def _apply_changes(cls, changes: Dict[str, List[Replacement]]) -> None:
+        num_skipped = 0
         for filename, changeset in changes.items():
             with open(filename) as f:
                 lines = f.readlines()
-            lines = cls._apply_changes_to_lines(changeset, lines)
+            edits, skipped = _select_line_edits(changeset, lines)
+            num_skipped += len(skipped)
+            if not edits:
+                continue
             with open(filename, "w") as f:
-                f.write("".join(lines))
+                f.write("".join(_apply_line_edits(edits, lines)))
+        if num_skipped:
+            print(
+                f"Skipped {num_skipped} changes that overlap with other changes; run"
+                " again to apply them"
+            )
 
     @classmethod
     def _apply_changes_to_lines(
         cls, changes: List[Replacement], input_lines: Sequence[str]
     ) -> Sequence[str]:
-        # only apply the first change because that change might affect other fixes
-        # that test_scope came up for that file. So we break after finding first applicable fix.
-        lines = list(input_lines)
-        if changes:
-            change = changes[0]
-            additions = change.lines_to_add
-            if additions is not None:
-                lines_to_remove = change.linenos_to_delete
-                max_line = max(lines_to_remove)
-                # add the additions after the max_line
-                lines = [*lines[:max_line], *additions, *lines[max_line:]]
-                lines_to_remove = sorted(lines_to_remove, reverse=True)
-                for lineno in lines_to_remove:
-                    del lines[lineno - 1]
-        return lines
+        # Changes were computed for the original lines, so apply only changes that
+        # do not touch the same lines as an earlier change. The others may be found
+        # again in the next iteration.
+        edits, _ = _select_line_edits(changes, input_lines)
+        return _apply_line_edits(edits, input_lines)
 
     @classmethod
     def _get_default_settings(cls) -> Optional[Dict[ErrorCodeInstance, bool]]:
@@ -753,7 +806,10 @@ class BaseNodeVisitor(ast.NodeVisitor):
         if not files:
             return cls.check_all_files(**kwargs)
         else:
-            return cls._run_on_files(_get_all_files(files), **kwargs)
+            return cls._run_on_files(
+                _get_all_files(files, exclude=cls.get_exclude_patterns(**kwargs)),
+                **kwargs,
+            )
 
     @classmethod
     def _run_on_code(cls, code: str, **kwargs: Any) -> List[Failure]:
@@ -766,20 +822,120 @@ class BaseNodeVisitor(ast.NodeVisitor):
         kwargs.pop("find_unused", False)
         kwargs.pop("find_unused_attributes", False)
         kwargs.pop("assert_passes", False)
+        kwargs.pop("ast_cache_dir", None)
+        kwargs.pop("prefetch", None)
+        kwargs.pop("memory_report", None)
+        kwargs.pop("call_graph_output", None)
+        kwargs.pop("shard", None)
+        kwargs.pop("shard_output", None)
+        kwargs.pop("trace_output", None)
+        kwargs.pop("line_profile", None)
         return cls("<code>", code, tree, is_code_only=True, **kwargs).check()
 
+    @classmethod
+    def check_sources(
+        cls,
+        sources: Iterable[Tuple[str, str]],
+        *,
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Iterator[Tuple[str, List[Failure]]]:
+        """Checks many pieces of code in memory.
+
+        sources is an iterable of (name, code) pairs. The name is used as the filename
+        in errors. Yields a (name, failures) pair for each piece of code as soon as it
+        has been checked. As with the --code command-line option, the code is executed
+        before it is checked.
+
+        The constructor kwargs are prepared only once, so for subclasses that keep
+        global state (such as the :class:`pyanalyze.checker.Checker` used by
+        :class:`pyanalyze.name_check_visitor.NameCheckVisitor`) that state and its
+        caches are shared by all the code that is checked.
+
+        If parallel is True, the code is checked in a pool of up to max_workers
+        processes, each of which prepares its own constructor kwargs once. Results are
+        then yielded in the order in which they complete, and kwargs must be
+        pickleable.
+
+        """
+        if not parallel:
+            kwargs = cls.prepare_constructor_kwargs(kwargs)
+            for name, code in sources:
+                yield name, cls._check_source(name, code, kwargs)
+            return
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers or os.cpu_count(),
+            initializer=cls._init_check_sources_worker,
+            initargs=(kwargs,),
+        ) as executor:
+            futures = [
+                executor.submit(cls._check_source_in_worker, name, code)
+                for name, code in sources
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+    @classmethod
+    def _init_check_sources_worker(cls, kwargs: Mapping[str, Any]) -> None:
+        _check_sources_worker_kwargs.update(cls.prepare_constructor_kwargs(kwargs))
+
+    @classmethod
+    def _check_source_in_worker(cls, name: str, code: str) -> Tuple[str, List[Failure]]:
+        return name, cls._check_source(name, code, _check_sources_worker_kwargs)
+
+    @classmethod
+    def _check_source(
+        cls, name: str, code: str, kwargs: Mapping[str, Any]
+    ) -> List[Failure]:
+        try:
+            tree = ast.parse(code, name)
+        except SyntaxError as e:
+            description = f"Failed to parse code: {e}"
+            failure: Failure = {
+                "description": description,
+                "filename": name,
+                "absolute_filename": name,
+                "message": f"\n{description}\n",
+            }
+            if e.lineno is not None:
+                failure["lineno"] = e.lineno
+            return [failure]
+        return cls(name, code, tree, is_code_only=True, **kwargs).check()
+
     @classmethod
     def _run_on_files(cls, files: Iterable[str], **kwargs: Any) -> List[Failure]:
+        """Checks the given files in order.
+
+        files may be a lazy iterable (such as the output of
+        :func:`pyanalyze.analysis_lib.walk_files`), so checking starts before
+        all files have been discovered.
+
+        """
         all_failures = []
-        args = [(filename, kwargs) for filename in sorted(files)]
+        prefetch = kwargs.pop("prefetch", 0)
+        args = ((filename, kwargs) for filename in files)
         if kwargs.pop("parallel", False):
             extra_data = []
             with concurrent.futures.ProcessPoolExecutor(os.cpu_count()) as executor:
-                for failures, extra in executor.map(cls._check_file_single_arg, args):
+                for failures, extra, changes in executor.map(
+                    cls._check_file_and_collect_changes, args
+                ):
                     all_failures += failures
                     extra_data.append(extra)
+                    if cls._changes_for_fixer is not None:
+                        for filename, replacements in changes.items():
+                            cls._changes_for_fixer[filename] += replacements
             cls.merge_extra_data(extra_data, **kwargs)
         else:
+            if prefetch > 0:
+                # Read and parse the next files while the current one is checked.
+                args = (
+                    (filename, {**kwargs, "prefetched": future})
+                    for filename, future in ast_cache.prefetch_files(
+                        files, num_files=prefetch, cache_dir=kwargs.get("ast_cache_dir")
+                    )
+                )
             for failures, _ in map(cls._check_file_single_arg, args):
                 all_failures += failures
         all_failures += cls.perform_final_checks(kwargs)
@@ -798,6 +954,21 @@ class BaseNodeVisitor(ast.NodeVisitor):
             # back.
             sys.modules["__main__"] = main_module
 
+    @classmethod
+    def _check_file_and_collect_changes(
+        cls, args: Tuple[str, Dict[str, Any]]
+    ) -> Tuple[List[Failure], Any, Dict[str, List[Replacement]]]:
+        """Checks a file in a worker process.
+
+        Changes suggested for the fixer would otherwise stay in the worker, so they are
+        returned to the parent process together with the failures.
+
+        """
+        changes = collections.defaultdict(list)
+        with qcore.override(cls, "_changes_for_fixer", changes):
+            failures, extra = cls._check_file_single_arg(args)
+        return failures, extra, dict(changes)
+
     @classmethod
     def check_file_in_worker(
         cls, filename: str, **kwargs: Any
@@ -924,6 +1095,22 @@ class BaseNodeVisitor(ast.NodeVisitor):
                 "Suitable for integrating with other tools."
             ),
         )
+        parser.add_argument(
+            "--ast-cache-dir",
+            help=(
+                "Cache parsed ASTs in this directory and reuse them for files that"
+                " have not changed."
+            ),
+        )
+        parser.add_argument(
+            "--prefetch",
+            help=(
+                "Read and parse up to this many files in background threads while"
+                " checking the current file."
+            ),
+            type=int,
+            default=0,
+        )
         parser.add_argument(
             "--add-ignores",
             help=(
@@ -985,6 +1172,12 @@ class BaseNodeVisitor(ast.NodeVisitor):
     def get_default_directories(cls, **kwargs: Any) -> Sequence[str]:
         return (".",)
 
+    @classmethod
+    def get_exclude_patterns(cls, **kwargs: Any) -> Sequence[str]:
+        """Gitignore-style patterns for files and directories to skip when
+        discovering files to check."""
+        return ()
+
     @classmethod
     def _get_all_python_files(
         cls,
@@ -1001,10 +1194,11 @@ class BaseNodeVisitor(ast.NodeVisitor):
         By default, gives all Python files in the modules returned by get_default_modules.
 
         """
+        exclude = cls.get_exclude_patterns(**kwargs)
         if modules is None:
             dirs = cls.get_default_directories(**kwargs)
             if dirs:
-                yield from _get_all_files(dirs)
+                yield from _get_all_files(dirs, exclude=exclude)
                 return
             modules = cls.get_default_modules()
         enclosing_module_names = {module.__name__ for module in modules}
@@ -1021,17 +1215,15 @@ class BaseNodeVisitor(ast.NodeVisitor):
                 continue
             if cls._should_ignore_module(module_name):
                 continue
-            if module_name in enclosing_module_names or any(
-                module_name.startswith(f"{enclosing_module_name}.")
-                for enclosing_module_name in enclosing_module_names
-            ):
+            if _is_submodule_of_any(module_name, enclosing_module_names):
                 yield module.__file__.rstrip("c")
 
         if include_tests:
-            for module in modules:
-                dirname = os.path.dirname(module.__file__)
-                cmd = ["find", dirname, "-name", "test*.py"]
-                yield from subprocess.check_output(cmd).split()
+            yield from analysis_lib.walk_files(
+                [os.path.dirname(module.__file__) for module in modules],
+                exclude=exclude,
+                filter_function=lambda filename: filename.startswith("test"),
+            )
 
     @classmethod
     def _should_ignore_module(cls, module_name: str) -> bool:
@@ -1150,15 +1342,45 @@ def get_files_to_check_from_environ(
         return None
 
 
-def _get_all_files(lst: Iterable[str]) -> Iterable[str]:
+def _get_all_files(lst: Iterable[str], exclude: Sequence[str] = ()) -> Iterable[str]:
     """Finds all Python files from a list of command-line arguments."""
-    for entry in lst:
-        if os.path.isdir(entry):
-            yield from sorted(
-                analysis_lib.files_with_extension_from_directory("py", Path(entry))
-            )
+    return analysis_lib.walk_files(lst, exclude=exclude)
+
+
+def _is_submodule_of_any(module_name: str, enclosing_module_names: Set[str]) -> bool:
+    while True:
+        if module_name in enclosing_module_names:
+            return True
+        module_name, dot, _ = module_name.rpartition(".")
+        if not dot:
+            return False
+
+
+def _select_line_edits(
+    changes: Iterable[Replacement], lines: Sequence[str]
+) -> Tuple[List[LineEdit], List[LineEdit]]:
+    """Converts changes to edits, keeping only those that do not overlap an earlier
+    edit. Returns the selected and the skipped edits. Duplicate edits are dropped."""
+    selected = []
+    skipped = []
+    for change in changes:
+        edit = LineEdit.from_replacement(change, lines)
+        if edit is None or edit in selected:
+            continue
+        if any(edit.overlaps(other) for other in selected):
+            skipped.append(edit)
         else:
-            yield entry
+            selected.append(edit)
+    return selected, skipped
+
+
+def _apply_line_edits(edits: Iterable[LineEdit], lines: Sequence[str]) -> List[str]:
+    """Applies non-overlapping edits to lines."""
+    new_lines = list(lines)
+    # Start at the bottom so that earlier line numbers stay valid.
+    for edit in sorted(edits, key=lambda edit: edit.start_lineno, reverse=True):
+        new_lines[edit.start_lineno - 1 : edit.end_lineno] = edit.new_lines
+    return new_lines
 
 
 def _flushing_print(*args: Any, **kwargs: Any) -> None:
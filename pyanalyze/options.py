@@ -9,7 +9,7 @@ import functools
 import pathlib
 import sys
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import (
     Any,
@@ -239,6 +239,27 @@ class PathSequenceOption(ConfigOption[Sequence[Path]]):
         )
 
 
+class PathOption(ConfigOption[Optional[Path]]):
+    default_value: ClassVar[Optional[Path]] = None
+
+    @classmethod
+    def parse(
+        cls: "Type[PathOption]", data: object, source_path: Path
+    ) -> Optional[Path]:
+        if isinstance(data, str):
+            return (source_path.parent / data).resolve()
+        raise InvalidConfigOption.from_parser(cls, "string", data)
+
+    @classmethod
+    def create_command_line_option(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            f"--{cls.name.replace('_', '-')}",
+            type=pathlib.Path,
+            help=cls.__doc__,
+            default=argparse.SUPPRESS,
+        )
+
+
 class PyObjectSequenceOption(ConcatenatedOption[T]):
     """Represents a sequence of objects parsed as Python objects."""
 
@@ -278,10 +299,43 @@ class PyObjectSequenceOption(ConcatenatedOption[T]):
         )
 
 
+# Bit assigned to each error code in the enabled masks of Options. Error codes
+# may be registered at any time, so bits are assigned on first use.
+_ERROR_CODE_BITS: Dict[str, int] = {}
+
+
+def _error_code_bit(code: Error) -> int:
+    try:
+        return _ERROR_CODE_BITS[code.name]
+    except KeyError:
+        bit = 1 << len(_ERROR_CODE_BITS)
+        return _ERROR_CODE_BITS.setdefault(code.name, bit)
+
+
 @dataclass
 class Options:
+    """The configuration for a run, or for a single module within it.
+
+    Resolving an option means going through all the places it was set, so the
+    resolved values are cached. Options for a module are created once per
+    module path by :meth:`for_module` and then reused; each caches the values
+    of its options, and the enabled error codes as a bitmask. The underlying
+    option instances must not be changed after the Options object is created.
+
+    """
+
     options: Mapping[str, Sequence[ConfigOption[Any]]]
     module_path: ModulePath = ()
+    _values: Dict[Type[ConfigOption[Any]], Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _resolved_error_codes: int = field(default=0, init=False, repr=False, compare=False)
+    _enabled_error_codes: int = field(default=0, init=False, repr=False, compare=False)
+    _resolved_anywhere: int = field(default=0, init=False, repr=False, compare=False)
+    _enabled_anywhere: int = field(default=0, init=False, repr=False, compare=False)
+    _by_module: Dict[ModulePath, "Options"] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     @classmethod
     def from_option_list(
@@ -301,31 +355,49 @@ class Options:
         return Options(options)
 
     def for_module(self, module_path: ModulePath) -> "Options":
-        return Options(self.options, module_path)
+        try:
+            return self._by_module[module_path]
+        except KeyError:
+            pass
+        options = Options(self.options, module_path)
+        # All Options derived from the same configuration share this mapping.
+        options._by_module = self._by_module
+        self._by_module[module_path] = options
+        return options
 
     def get_value_for(self, option: Type[ConfigOption[T]]) -> T:
         try:
-            return self._get_value_for_no_default(option)
+            return self._values[option]
+        except KeyError:
+            pass
+        try:
+            value = self._get_value_for_no_default(option)
         except NotFound:
-            return option.default_value
+            value = option.default_value
+        self._values[option] = value
+        return value
 
     def _get_value_for_no_default(self, option: Type[ConfigOption[T]]) -> T:
         instances = [*self.options.get(option.name, ()), option(option.default_value)]
         return option.get_value_from_instances(instances, self.module_path)
 
     def is_error_code_enabled(self, code: Error) -> bool:
-        option = ConfigOption.registry[code.name]
-        try:
-            return self._get_value_for_no_default(option)
-        except NotFound:
-            return option.default_value
+        bit = _error_code_bit(code)
+        if not self._resolved_error_codes & bit:
+            if self.get_value_for(ConfigOption.registry[code.name]):
+                self._enabled_error_codes |= bit
+            self._resolved_error_codes |= bit
+        return bool(self._enabled_error_codes & bit)
 
     def is_error_code_enabled_anywhere(self, code: Error) -> bool:
-        option = ConfigOption.registry[code.name]
-        instances = self.options.get(option.name, ())
-        if any(instance.value for instance in instances):
-            return True
-        return option.default_value
+        bit = _error_code_bit(code)
+        if not self._resolved_anywhere & bit:
+            option = ConfigOption.registry[code.name]
+            instances = self.options.get(option.name, ())
+            if option.default_value or any(instance.value for instance in instances):
+                self._enabled_anywhere |= bit
+            self._resolved_anywhere |= bit
+        return bool(self._enabled_anywhere & bit)
 
     def display(self) -> None:
         print("Options:")
@@ -4,17 +4,27 @@ Functionality for dealing with implicit reexports.
 
 """
 
+import hashlib
+import json
+import os
+import sys
+import tempfile
 from ast import AST
 from collections import defaultdict
 from dataclasses import InitVar, dataclass, field
-from typing import Callable, Dict, List, Set, Tuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
+from .ast_cache import hash_contents
 from .error_code import ErrorCode
 from .node_visitor import ErrorContext
-from .options import Options, PyObjectSequenceOption
+from .options import Options, PathOption, PyObjectSequenceOption
 
 _ReexportConfigProvider = Callable[["ImplicitReexportTracker"], None]
 
+# Bump this when the format of cache entries or the way exports are computed changes.
+EXPORT_CACHE_VERSION = 1
+
 
 class ReexportConfig(PyObjectSequenceOption[_ReexportConfigProvider]):
     """Callbacks that can configure the :class:`ImplicitReexportTracker`,
@@ -24,6 +34,83 @@ class ReexportConfig(PyObjectSequenceOption[_ReexportConfigProvider]):
     is_global = True
 
 
+class ReexportCacheDir(PathOption):
+    """Directory in which to store the names exported by each module that is
+    checked. Later runs that check only some files use it to find implicit
+    reexports from modules they do not check."""
+
+    name = "reexport_cache_dir"
+    is_global = True
+
+
+@dataclass
+class ExportCache:
+    """On-disk cache of the names exported by each module.
+
+    Entries are keyed by module name and are only used if the hash of the module's
+    file matches the hash recorded with the entry. Names that a module gets from
+    star imports are not invalidated when the other module changes.
+
+    """
+
+    directory: Path
+    hits: int = 0
+    misses: int = 0
+
+    def load(self, module: str, filename: str) -> Optional[Set[str]]:
+        """Returns the names exported by module, if they were cached for the
+        current contents of filename."""
+        try:
+            with self._entry_path(module).open(encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(filename, encoding="utf-8") as f:
+                contents = f.read()
+            if (
+                entry["version"] == EXPORT_CACHE_VERSION
+                and entry["module"] == module
+                and entry["path"] == os.path.abspath(filename)
+                and entry["content_hash"] == hash_contents(contents)
+            ):
+                exports = set(entry["exports"])
+                self.hits += 1
+                return exports
+        except Exception:
+            # Missing, corrupted, or created by an incompatible version.
+            pass
+        self.misses += 1
+        return None
+
+    def store(
+        self, module: str, filename: str, contents: str, exports: Iterable[str]
+    ) -> None:
+        entry = {
+            "version": EXPORT_CACHE_VERSION,
+            "module": module,
+            "path": os.path.abspath(filename),
+            "content_hash": hash_contents(contents),
+            "exports": sorted(exports),
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that concurrent processes
+            # never see a partially written entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(temp_path, self._entry_path(module))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            # The cache is only an optimization; failing to write it is fine.
+            pass
+
+    def _entry_path(self, module: str) -> Path:
+        key = hashlib.blake2b(module.encode("utf-8"), digest_size=16).hexdigest()
+        return self.directory / f"{key}.json"
+
+
 @dataclass
 class ImplicitReexportTracker:
     options: InitVar[Options]
@@ -34,17 +121,41 @@ class ImplicitReexportTracker:
     used_reexports: Dict[str, List[Tuple[str, AST, ErrorContext]]] = field(
         default_factory=lambda: defaultdict(list)
     )
+    export_cache: Optional[ExportCache] = None
+    # Modules that we tried to load from the export cache
+    _looked_up_modules: Set[str] = field(default_factory=set, repr=False)
 
     def __post_init__(self, options: Options) -> None:
+        cache_dir = options.get_value_for(ReexportCacheDir)
+        if cache_dir is not None and self.export_cache is None:
+            self.export_cache = ExportCache(Path(cache_dir))
         for func in options.get_value_for(ReexportConfig):
             func(self)
 
     def record_exported_attribute(self, module: str, attr: str) -> None:
         self.module_to_reexports[module].add(attr)
 
-    def record_module_completed(self, module: str) -> None:
+    def record_module_completed(
+        self,
+        module: str,
+        *,
+        filename: Optional[str] = None,
+        contents: Optional[str] = None,
+    ) -> None:
+        """Records that a module has been checked.
+
+        If filename and contents (the code that was checked) are given, the module's
+        exports are saved to the export cache, if there is one.
+
+        """
         self.completed_modules.add(module)
         reexports = self.module_to_reexports[module]
+        if (
+            self.export_cache is not None
+            and filename is not None
+            and contents is not None
+        ):
+            self.export_cache.store(module, filename, contents, reexports)
         for attr, node, ctx in self.used_reexports[module]:
             if attr not in reexports:
                 self.show_error(module, attr, node, ctx)
@@ -52,17 +163,30 @@ class ImplicitReexportTracker:
     def record_attribute_accessed(
         self, module: str, attr: str, node: AST, ctx: ErrorContext
     ) -> None:
+        if module not in self.completed_modules:
+            self._load_from_cache(module)
         if module in self.completed_modules:
             if attr not in self.module_to_reexports[module]:
                 self.show_error(module, attr, node, ctx)
         else:
             self.used_reexports[module].append((attr, node, ctx))
 
+    def _load_from_cache(self, module: str) -> None:
+        if self.export_cache is None or module in self._looked_up_modules:
+            return
+        self._looked_up_modules.add(module)
+        filename = getattr(sys.modules.get(module), "__file__", None)
+        if not isinstance(filename, str) or not filename.endswith(".py"):
+            return
+        exports = self.export_cache.load(module, filename)
+        if exports is not None:
+            self.completed_modules.add(module)
+            self.module_to_reexports[module] |= exports
+
     def show_error(self, module: str, attr: str, node: AST, ctx: ErrorContext) -> None:
-        failure = ctx.show_error(
+        # show_error() adds the failure to ctx.all_failures
+        ctx.show_error(
             node,
             f"Attribute '{attr}' is not exported by module '{module}'",
             ErrorCode.implicit_reexport,
         )
-        if failure is not None:
-            ctx.all_failures.append(failure)
@@ -0,0 +1,406 @@
+"""
+
+Splitting a run across machines.
+
+``--shard i/N`` checks only the i-th of N parts of the files (counting from 1).
+Files are assigned to parts deterministically and balanced by file size, so each
+machine in a CI job can compute its own part from the same list of files.
+
+Some checks need to see all files at once. With ``--shard-output``, a sharded run
+does not perform these checks, and instead writes the data they need to a file,
+together with the errors found in the shard. ``pyanalyze merge`` combines these
+files, performs the global checks once, and reports all errors in a stable order.
+The global checks are:
+
+- ``attribute_is_never_set`` (the class attribute checker)
+- unused objects (``--find-unused``)
+- the call graph (``--call-graph``)
+
+Suggested parameter types and ``implicit_reexport`` errors are computed within
+each shard. Set ``reexport_cache_dir`` to a directory shared between shards to
+make the exports of modules checked in other shards available.
+
+"""
+
+import argparse
+import heapq
+import importlib
+import os
+import pickle
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import pyanalyze
+
+from .call_graph import CallGraph
+from .checker import Checker
+from .find_unused import UnusedObjectFinder
+from .node_visitor import UNUSED_OBJECT_FILENAME, Failure
+from .value import Value
+
+if TYPE_CHECKING:
+    from .name_check_visitor import ClassAttributeChecker
+
+# Bump this when the format of shard outputs changes.
+SHARD_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of count parts of a run. index counts from 1."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """Parses a shard given as "i/N"."""
+        index, slash, count = text.partition("/")
+        try:
+            shard = cls(int(index), int(count))
+        except ValueError:
+            shard = None
+        if not slash or shard is None or not 1 <= shard.index <= shard.count:
+            raise ValueError(f"Invalid shard {text!r} (expected i/N with 1 <= i <= N)")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard_argument(text: str) -> Shard:
+    """Parses the argument to ``--shard``."""
+    try:
+        return Shard.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def partition_files(files: Iterable[str], count: int) -> List[List[str]]:
+    """Splits files into count parts of similar total size.
+
+    The result depends only on the set of files and their sizes, not on the order
+    of files. Each part is sorted.
+
+    """
+    parts: List[List[str]] = [[] for _ in range(count)]
+    # (total size, index) for each part, so that ties go to the first part
+    loads = [(0, index) for index in range(count)]
+    sized_files = sorted(
+        ((_get_cost(filename), filename) for filename in set(files)),
+        key=lambda pair: (-pair[0], pair[1]),
+    )
+    for cost, filename in sized_files:
+        load, index = heapq.heappop(loads)
+        parts[index].append(filename)
+        heapq.heappush(loads, (load + cost, index))
+    return [sorted(part) for part in parts]
+
+
+def select_files(files: Iterable[str], shard: Shard) -> List[str]:
+    """Returns the files that belong to the given shard."""
+    return partition_files(files, shard.count)[shard.index - 1]
+
+
+def _get_cost(filename: str) -> int:
+    try:
+        size = os.path.getsize(filename)
+    except OSError:
+        size = 0
+    # Count each file as at least one byte, so empty files are spread out too.
+    return size + 1
+
+
+@dataclass
+class AttributeData:
+    """What the class attribute checker recorded in a shard.
+
+    Types are serialized as (module, name) pairs, and the nodes of attribute reads
+    are replaced by their locations.
+
+    """
+
+    attributes_read: Dict[object, List[Tuple[str, Any, str]]]
+    attributes_set: Dict[object, Set[str]]
+    attribute_values: Dict[object, Dict[str, Value]]
+    types_with_dynamic_attrs: Set[object]
+    classes_examined: Set[object]
+    modules_examined: Set[str]
+    # The lines of each file needed to report errors in it
+    file_lines: Dict[str, List[str]]
+
+    @classmethod
+    def from_checker(cls, checker: "ClassAttributeChecker") -> "AttributeData":
+        file_lines = {
+            filename: reporter._lines()
+            for filename, reporter in checker.filename_to_visitor.items()
+        }
+        return cls(
+            attributes_read=dict(checker.attributes_read),
+            attributes_set=dict(checker.attributes_set),
+            attribute_values=dict(checker.attribute_values),
+            types_with_dynamic_attrs=checker.types_with_dynamic_attrs,
+            classes_examined=checker.classes_examined,
+            modules_examined=checker.modules_examined,
+            file_lines=file_lines,
+        )
+
+    def merge_into(self, checker: "ClassAttributeChecker") -> None:
+        for serialized, attrs in self.attributes_read.items():
+            checker.attributes_read[serialized] += attrs
+        for serialized, attrs in self.attributes_set.items():
+            checker.attributes_set[serialized] |= attrs
+        for serialized, attrs in self.attribute_values.items():
+            for attr_name, value in attrs.items():
+                checker.merge_attribute_value(serialized, attr_name, value)
+        checker.types_with_dynamic_attrs |= self.types_with_dynamic_attrs
+        checker.classes_examined |= self.classes_examined
+        checker.modules_examined |= self.modules_examined
+        for filename, lines in self.file_lines.items():
+            reporter = pyanalyze.name_check_visitor._CompletedFileReporter(
+                filename, lines, options=checker.options
+            )
+            checker.filename_to_visitor[filename] = reporter
+
+
+@dataclass
+class UnusedData:
+    """What the unused object finder recorded in a shard, keyed by module name."""
+
+    usages: Dict[str, Dict[str, Set[str]]]
+    import_stars: Dict[str, Set[str]]
+    visited_modules: List[str]
+
+    @classmethod
+    def from_finder(cls, finder: UnusedObjectFinder) -> "UnusedData":
+        return cls(
+            usages={
+                owner.__name__: {attr: set(users) for attr, users in attrs.items()}
+                for owner, attrs in finder.usages.items()
+                # Usages recorded on classes are not used to find unused objects.
+                if isinstance(owner, ModuleType)
+            },
+            import_stars={
+                module.__name__: {importer.__name__ for importer in importers}
+                for module, importers in finder.import_stars.items()
+            },
+            visited_modules=[module.__name__ for module in finder.visited_modules],
+        )
+
+    def merge_into(self, finder: UnusedObjectFinder) -> None:
+        for module_name, attrs in self.usages.items():
+            module = _import_module(module_name)
+            if module is None:
+                continue
+            for attr, users in attrs.items():
+                finder.usages[module][attr] |= users
+        for module_name, importer_names in self.import_stars.items():
+            module = _import_module(module_name)
+            if module is None:
+                continue
+            for importer_name in importer_names:
+                importer = _import_module(importer_name)
+                if importer is not None:
+                    finder.record_import_star(module, importer)
+        for module_name in self.visited_modules:
+            module = _import_module(module_name)
+            if module is not None and module not in finder.visited_modules:
+                finder.record_module_visited(module)
+
+
+def _import_module(name: str) -> Optional[ModuleType]:
+    try:
+        return importlib.import_module(name)
+    except Exception:
+        # The module was importable in the shard but is not here; skip it.
+        return None
+
+
+@dataclass
+class ShardResult:
+    """The output of a sharded run, as written by ``--shard-output``."""
+
+    shard: Shard
+    files: List[str]
+    failures: List[Failure]
+    attribute_data: Optional[AttributeData] = None
+    find_unused_attributes: bool = False
+    unused_data: Optional[UnusedData] = None
+    call_graph: Optional[CallGraph] = None
+    version: int = field(default=SHARD_FORMAT_VERSION)
+
+    def write(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def read(cls, path: Union[str, "os.PathLike[str]"]) -> "ShardResult":
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+        if not isinstance(result, ShardResult):
+            raise ValueError(f"{path} does not contain shard results")
+        if result.version != SHARD_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} was written by an incompatible version of pyanalyze"
+            )
+        return result
+
+
+def sort_failures(failures: Iterable[Failure]) -> List[Failure]:
+    """Sorts failures by location, so that output does not depend on run order."""
+
+    def key(failure: Failure) -> Tuple[str, int, int, str, str]:
+        code = failure.get("code")
+        return (
+            failure["filename"],
+            failure.get("lineno", 0),
+            failure.get("col_offset", 0),
+            code.name if code is not None else "",
+            failure["description"],
+        )
+
+    return sorted(failures, key=key)
+
+
+def merge_results(
+    results: Sequence[ShardResult],
+    *,
+    checker: Checker,
+    call_graph_output: Optional[str] = None,
+) -> List[Failure]:
+    """Combines the results of all shards and performs the global checks.
+
+    Errors found by the global checks are printed as they are found. Returns the
+    errors from all shards together with those from the global checks.
+
+    """
+    _check_complete(results)
+    failures = [failure for result in results for failure in result.failures]
+
+    attribute_data = [
+        result.attribute_data for result in results if result.attribute_data is not None
+    ]
+    if attribute_data:
+        attribute_checker = pyanalyze.name_check_visitor.ClassAttributeChecker(
+            should_check_unused_attributes=any(
+                result.find_unused_attributes for result in results
+            ),
+            should_serialize=True,
+            options=checker.options,
+            ts_finder=checker.ts_finder,
+            low_memory=True,
+        )
+        with attribute_checker:
+            for data in attribute_data:
+                data.merge_into(attribute_checker)
+        failures += attribute_checker.all_failures
+
+    unused_data = [
+        result.unused_data for result in results if result.unused_data is not None
+    ]
+    if unused_data:
+        finder = UnusedObjectFinder(checker.options, enabled=True, print_output=False)
+        for data in unused_data:
+            data.merge_into(finder)
+        for unused_object in finder.get_unused_objects():
+            print(unused_object)
+            failures.append(
+                {
+                    "filename": UNUSED_OBJECT_FILENAME,
+                    "absolute_filename": UNUSED_OBJECT_FILENAME,
+                    "message": f"{unused_object}\n",
+                    "description": str(unused_object),
+                }
+            )
+
+    if call_graph_output is not None:
+        call_graph = CallGraph()
+        for result in results:
+            if result.call_graph is not None:
+                call_graph.merge(result.call_graph)
+        call_graph.write(call_graph_output)
+
+    return sort_failures(failures)
+
+
+def _check_complete(results: Sequence[ShardResult]) -> None:
+    if not results:
+        raise ValueError("No shard results given")
+    counts = {result.shard.count for result in results}
+    if len(counts) != 1:
+        raise ValueError(f"Shard results come from different shard counts: {counts}")
+    (count,) = counts
+    indexes = sorted(result.shard.index for result in results)
+    if indexes != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        if missing:
+            raise ValueError(f"Missing results for shards {missing} of {count}")
+        raise ValueError("Results for some shards were given more than once")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Merges the results of sharded runs."""
+    parser = argparse.ArgumentParser(
+        prog="pyanalyze merge",
+        description=(
+            "Combine the results of runs with --shard-output and perform the checks"
+            " that need to see all files."
+        ),
+    )
+    parser.add_argument(
+        "shard_outputs", nargs="+", type=Path, help="Files written by --shard-output"
+    )
+    parser.add_argument(
+        "--config-file", type=Path, help="Path to a pyproject.toml configuration file"
+    )
+    parser.add_argument(
+        "--json-output", help="Write all errors to this file in JSON format."
+    )
+    parser.add_argument(
+        "--markdown-output", help="Write all errors to this file in markdown format."
+    )
+    parser.add_argument(
+        "--call-graph",
+        dest="call_graph_output",
+        help="Write the combined call graph of all shards to this file",
+    )
+    args = parser.parse_args(argv)
+    visitor_cls = pyanalyze.name_check_visitor.NameCheckVisitor
+    try:
+        results = [ShardResult.read(path) for path in args.shard_outputs]
+        _check_complete(results)
+    except (OSError, ValueError, pickle.UnpicklingError) as e:
+        print(f"pyanalyze merge: {e}", file=sys.stderr)
+        return 2
+    # Errors found by the global checks are printed as they are found.
+    for failure in sort_failures(
+        failure for result in results for failure in result.failures
+    ):
+        sys.stderr.write(failure["message"])
+    kwargs = visitor_cls.prepare_constructor_kwargs({"config_file": args.config_file})
+    failures = merge_results(
+        results, checker=kwargs["checker"], call_graph_output=args.call_graph_output
+    )
+    print(
+        f"{len(failures)} errors in {sum(len(result.files) for result in results)}"
+        f" files checked in {len(results)} shards"
+    )
+    if args.markdown_output is not None and failures:
+        visitor_cls._write_markdown_report(args.markdown_output, failures)
+    if args.json_output is not None and failures:
+        visitor_cls._write_json_report(args.json_output, failures)
+    return 1 if failures else 0
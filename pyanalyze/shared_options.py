@@ -8,7 +8,12 @@ from types import ModuleType
 from typing import Callable
 
 from .error_code import DISABLED_BY_DEFAULT, ErrorCode
-from .options import BooleanOption, PathSequenceOption, PyObjectSequenceOption
+from .options import (
+    BooleanOption,
+    PathSequenceOption,
+    PyObjectSequenceOption,
+    StringSequenceOption,
+)
 from .value import VariableNameValue
 
 
@@ -20,6 +25,15 @@ class Paths(PathSequenceOption):
     should_create_command_line_option = False
 
 
+class ExcludedPaths(StringSequenceOption):
+    """Gitignore-style patterns for files and directories that pyanalyze should skip
+    when looking for files to check. Patterns are matched relative to each
+    directory being checked."""
+
+    name = "excluded_paths"
+    is_global = True
+
+
 class ImportPaths(PathSequenceOption):
     """Directories that pyanalyze may import from."""
 
@@ -11,6 +11,7 @@ import collections.abc
 import enum
 import inspect
 import itertools
+import sys
 from dataclasses import dataclass, field, replace
 from types import FunctionType, MethodType
 from typing import (
@@ -20,8 +21,10 @@ from typing import (
     ClassVar,
     Container,
     Dict,
+    FrozenSet,
     Iterable,
     List,
+    Mapping,
     NamedTuple,
     Optional,
     Sequence,
@@ -125,6 +128,13 @@ ELLIPSIS_COMPOSITE = Composite(AnyValue(AnySource.ellipsis_callable))
 # TODO turn on
 USE_CHECK_CALL_FOR_CAN_ASSIGN = False
 
+# Type checking creates a lot of signature objects, so we give them __slots__
+# where the dataclass module supports it.
+_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+# Shared by signatures without type variables; never mutated.
+_NO_TYPEVARS_OF_PARAMS: Mapping[str, List[TypeVarLike]] = {}
+_NO_TYPEVARS: FrozenSet[TypeVarLike] = frozenset()
+
 
 class MaximumPositionalArgs(IntegerOption):
     """If calls have more than this many positional arguments, attempt to
@@ -425,7 +435,7 @@ CAN_HAVE_DEFAULT = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class SigParameter:
     """Represents a single parameter to a callable."""
 
@@ -526,7 +536,18 @@ class SigParameter:
             assert False, self.kind
 
 
-@dataclass(frozen=True)
+# Unannotated parameters without a default (such as "self", "*args" and
+# "**kwargs") are very common, so signatures share a single object for each.
+_interned_parameters: Dict[SigParameter, SigParameter] = {}
+
+
+def _intern_parameter(param: SigParameter) -> SigParameter:
+    if param.default is not None or type(param.annotation) is not AnyValue:
+        return param
+    return _interned_parameters.setdefault(param, param)
+
+
+@dataclass(frozen=True, **_SLOTS)
 class Signature:
     """Represents the signature of a Python callable.
 
@@ -554,28 +575,42 @@ class Signature:
     """Type evaluator for this function."""
     deprecated: Optional[str] = None
     """Deprecation message for this callable."""
-    typevars_of_params: Dict[str, List[TypeVarLike]] = field(
-        init=False, default_factory=dict, repr=False, compare=False, hash=False
+    typevars_of_params: Mapping[str, List[TypeVarLike]] = field(
+        init=False, repr=False, compare=False, hash=False
+    )
+    all_typevars: FrozenSet[TypeVarLike] = field(
+        init=False, repr=False, compare=False, hash=False
     )
-    all_typevars: Set[TypeVarLike] = field(
-        init=False, default_factory=set, repr=False, compare=False, hash=False
+    _contains_typevars: bool = field(
+        init=False, default=False, repr=False, compare=False, hash=False
     )
 
     def __post_init__(self) -> None:
-        for param_name, param in self.parameters.items():
-            typevars = list(extract_typevars(param.annotation))
-            if typevars:
-                self.typevars_of_params[param_name] = typevars
-        return_typevars = list(extract_typevars(self.return_value))
-        if return_typevars:
-            self.typevars_of_params[self._return_key] = return_typevars
-        self.all_typevars.update(
-            {
+        contains_typevars = self.return_value.contains_typevars() or any(
+            param.annotation.contains_typevars() for param in self.parameters.values()
+        )
+        object.__setattr__(self, "_contains_typevars", contains_typevars)
+        typevars_of_params = {}
+        if contains_typevars:
+            for param_name, param in self.parameters.items():
+                typevars = list(extract_typevars(param.annotation))
+                if typevars:
+                    typevars_of_params[param_name] = typevars
+            return_typevars = list(extract_typevars(self.return_value))
+            if return_typevars:
+                typevars_of_params[self._return_key] = return_typevars
+        if typevars_of_params:
+            all_typevars = frozenset(
                 typevar
-                for tv_list in self.typevars_of_params.values()
+                for tv_list in typevars_of_params.values()
                 for typevar in tv_list
-            }
-        )
+            )
+            object.__setattr__(self, "typevars_of_params", typevars_of_params)
+            object.__setattr__(self, "all_typevars", all_typevars)
+        else:
+            # Most signatures are not generic, so they share these empty objects.
+            object.__setattr__(self, "typevars_of_params", _NO_TYPEVARS_OF_PARAMS)
+            object.__setattr__(self, "all_typevars", _NO_TYPEVARS)
         self.validate()
 
     def __hash__(self) -> int:
@@ -1740,6 +1775,8 @@ class Signature:
         return None
 
     def substitute_typevars(self, typevars: TypeVarMap) -> "Signature":
+        if not self._contains_typevars:
+            return self
         params = []
         for name, param in self.parameters.items():
             if param.kind is ParameterKind.PARAM_SPEC:
@@ -1871,7 +1908,7 @@ class Signature:
                     )
                     i += 1
             else:
-                param_dict[param.name] = param
+                param_dict[param.name] = _intern_parameter(param)
                 i += 1
         if deprecated is None and callable is not None:
             deprecated = safe_getattr(callable, "__deprecated__", None)
@@ -2274,7 +2311,7 @@ def _preprocess_kwargs_kv_pairs(
     return out_items, extra_value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class OverloadedSignature:
     """Represent an overloaded function."""
 
@@ -2562,7 +2599,7 @@ class OverloadedSignature:
 ConcreteSignature = Union[Signature, OverloadedSignature]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class BoundMethodSignature:
     """Signature for a method bound to a particular value."""
 
@@ -0,0 +1,176 @@
+"""
+
+Finding the parts of the checked code that are expensive to check.
+
+``--profile`` shows which functions in pyanalyze are slow. To find out instead
+which functions and lines of the checked code are slow to check, pass
+``--line-profile report.json``. A background thread then samples, at a fixed
+interval, the node that the visitor is visiting. At the end of the run, pyanalyze
+prints the functions and lines of the checked code that took the most time, and
+writes the full ranking as JSON. Adding annotations (or ignore comments) there
+often helps when type inference is expensive.
+
+The time between two samples is attributed to the innermost function and line
+being visited. Time spent visiting another function to infer its return value is
+attributed to that function. Line profiles are not supported with
+``--parallel``.
+
+"""
+
+import ast
+import collections
+import contextlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    ContextManager,
+    DefaultDict,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from .name_check_visitor import NameCheckVisitor
+
+DEFAULT_INTERVAL = 0.005
+
+# Name used for code outside of functions
+MODULE_LEVEL = "<module>"
+
+# (filename, lineno)
+_Line = Tuple[str, int]
+# (filename, qualified name, lineno of the definition)
+_Function = Tuple[str, str, int]
+
+
+@dataclass
+class SourceProfiler:
+    """Samples which part of the checked code is being visited."""
+
+    interval: float = DEFAULT_INTERVAL
+    line_times: DefaultDict[_Line, float] = field(
+        default_factory=lambda: collections.defaultdict(float)
+    )
+    function_times: DefaultDict[_Function, float] = field(
+        default_factory=lambda: collections.defaultdict(float)
+    )
+    num_samples: int = 0
+    _visitor: Optional["NameCheckVisitor"] = field(default=None, repr=False)
+    _last_sample: float = field(default=0.0, repr=False)
+    _stop_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._last_sample = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="pyanalyze-line-profile", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextlib.contextmanager
+    def checking(self, visitor: "NameCheckVisitor") -> Generator[None, None, None]:
+        """Attributes samples taken in the with block to the visitor's file."""
+        previous = self._visitor
+        self._visitor = visitor
+        self._last_sample = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._visitor = previous
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Attributes the time since the last sample to the node being visited."""
+        now = time.perf_counter()
+        elapsed = now - self._last_sample
+        self._last_sample = now
+        visitor = self._visitor
+        if visitor is None:
+            return
+        # Copy the stack, because the visitor keeps changing it while we look.
+        stack = list(visitor.node_context.contexts)
+        lineno = None
+        functions = []
+        for node in reversed(stack):
+            if lineno is None and isinstance(node, (ast.expr, ast.stmt)):
+                lineno = node.lineno
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions.append(node)
+            elif isinstance(node, ast.ClassDef) and functions:
+                functions.append(node)
+        if lineno is None:
+            return
+        filename = visitor.filename
+        self.num_samples += 1
+        self.line_times[(filename, lineno)] += elapsed
+        if functions:
+            name = ".".join(node.name for node in reversed(functions))
+            function = (filename, name, functions[0].lineno)
+        else:
+            function = (filename, MODULE_LEVEL, 0)
+        self.function_times[function] += elapsed
+
+    def top_functions(self, num: Optional[int] = None) -> List[Tuple[_Function, float]]:
+        return _rank(self.function_times)[:num]
+
+    def top_lines(self, num: Optional[int] = None) -> List[Tuple[_Line, float]]:
+        return _rank(self.line_times)[:num]
+
+    def to_json(self) -> Dict[str, object]:
+        return {
+            "interval": self.interval,
+            "num_samples": self.num_samples,
+            "functions": [
+                {"filename": filename, "name": name, "lineno": lineno, "time": seconds}
+                for (filename, name, lineno), seconds in self.top_functions()
+            ],
+            "lines": [
+                {"filename": filename, "lineno": lineno, "time": seconds}
+                for (filename, lineno), seconds in self.top_lines()
+            ],
+        }
+
+    def write_report(self, output_file: str) -> None:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def display(self, *, num: int = 20) -> None:
+        """Prints the most expensive functions and lines."""
+        print(f"Took {self.num_samples} samples of the checked code")
+        if self.function_times:
+            print("Functions that took the longest to check:")
+            for (filename, name, lineno), seconds in self.top_functions(num):
+                print(f"    {seconds:8.3f} s  {filename}:{lineno} {name}")
+        if self.line_times:
+            print("Lines that took the longest to check:")
+            for (filename, lineno), seconds in self.top_lines(num):
+                print(f"    {seconds:8.3f} s  {filename}:{lineno}")
+
+
+def _rank(times: Dict[Tuple, float]) -> List[Tuple[Tuple, float]]:
+    return sorted(times.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+def checking(
+    profiler: Optional[SourceProfiler], visitor: "NameCheckVisitor"
+) -> ContextManager[None]:
+    """Attributes samples to visitor if profiler is not None."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.checking(visitor)
@@ -0,0 +1,464 @@
+"""
+
+Summaries of the inferred return types of functions, shared across modules.
+
+Within a file, pyanalyze infers the return type of functions without a return
+annotation and uses it at call sites. When :class:`ReturnSummaries` is enabled,
+these inferred return types are also made available to other modules:
+
+- Files are checked in dependency order, as determined by the imports between
+  the files that are checked. Import cycles are broken deterministically, so
+  the result does not depend on the order in which files were passed.
+- Once a module has been checked, the return types inferred for its top-level
+  functions and methods become available to the modules checked after it.
+- If :class:`ReturnSummaryCacheDir` is set, the summaries are also stored on
+  disk and used for modules that are not checked in the same run. A stored
+  summary is used only while the module, the modules it imports, and the
+  modules whose summaries were used to compute it are unchanged.
+
+Only return types that can be stored on disk (literals of builtin types and
+types that can be found by name, including generics and unions of these) are
+recorded, so a summary means the same thing whether it was computed in this
+run or loaded from disk.
+
+"""
+
+import ast
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from dataclasses import InitVar, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .ast_cache import hash_contents
+from .importer import get_module_name
+from .options import BooleanOption, Options, PathOption
+from .safe import safe_getattr
+from .signature import BoundMethodSignature, MaybeSignature, Signature
+from .value import (
+    AnySource,
+    AnyValue,
+    GenericValue,
+    KnownValue,
+    MultiValuedValue,
+    SubclassValue,
+    TypedValue,
+    Value,
+)
+
+# Bump this when the format of cache entries or the way summaries are computed
+# changes.
+SUMMARY_CACHE_VERSION = 1
+
+_LITERAL_TYPES = (type(None), bool, int, float, str)
+
+
+class ReturnSummaries(BooleanOption):
+    """If True, the return types inferred for unannotated functions are used in
+    other modules. Files are checked in the order of the imports between them."""
+
+    name = "return_summaries"
+    is_global = True
+
+
+class ReturnSummaryCacheDir(PathOption):
+    """Directory in which to store the return types inferred for each module
+    that is checked, for use by later runs that do not check that module. Has
+    no effect unless return_summaries is enabled."""
+
+    name = "return_summary_cache_dir"
+    is_global = True
+
+
+def encode_value(value: Value) -> Optional[object]:
+    """Converts a value to JSON-compatible data, or returns None if that is not
+    possible."""
+    # Subclasses of these values carry more information, so they are not
+    # supported.
+    if isinstance(value, AnyValue):
+        return {"any": value.source.name}
+    elif isinstance(value, KnownValue) and type(value) is KnownValue:
+        if type(value.val) in _LITERAL_TYPES:
+            return {"known": value.val}
+    elif isinstance(value, GenericValue) and type(value) is GenericValue:
+        typ = _encode_type(value.typ)
+        args = [encode_value(arg) for arg in value.args]
+        if typ is not None and all(arg is not None for arg in args):
+            return {"generic": typ["type"], "args": args}
+    elif isinstance(value, TypedValue) and type(value) is TypedValue:
+        return _encode_type(value.typ)
+    elif (
+        isinstance(value, SubclassValue)
+        and isinstance(value.typ, TypedValue)
+        and type(value.typ) is TypedValue
+    ):
+        typ = _encode_type(value.typ.typ)
+        if typ is not None:
+            return {"subclass": typ["type"]}
+    elif isinstance(value, MultiValuedValue):
+        members = [encode_value(member) for member in value.vals]
+        if all(member is not None for member in members):
+            return {"union": members}
+    return None
+
+
+def decode_value(data: object) -> Optional[Value]:
+    """Converts the output of :func:`encode_value` back into a value.
+
+    Returns None if the data is invalid or refers to a type that cannot be found.
+
+    """
+    if not isinstance(data, dict):
+        return None
+    if "any" in data:
+        source = AnySource.__members__.get(data["any"])
+        return AnyValue(source) if source is not None else None
+    elif "known" in data:
+        if type(data["known"]) not in _LITERAL_TYPES:
+            return None
+        return KnownValue(data["known"])
+    elif "type" in data:
+        typ = _decode_type(data["type"])
+        return TypedValue(typ) if typ is not None else None
+    elif "generic" in data:
+        typ = _decode_type(data["generic"])
+        args = [decode_value(arg) for arg in data["args"]]
+        if typ is None or any(arg is None for arg in args):
+            return None
+        return GenericValue(typ, args)
+    elif "subclass" in data:
+        typ = _decode_type(data["subclass"])
+        return SubclassValue(TypedValue(typ)) if typ is not None else None
+    elif "union" in data:
+        members = [decode_value(member) for member in data["union"]]
+        if any(member is None for member in members):
+            return None
+        return MultiValuedValue(members)
+    return None
+
+
+def _encode_type(typ: object) -> Optional[Dict[str, List[str]]]:
+    module = safe_getattr(typ, "__module__", None)
+    qualname = safe_getattr(typ, "__qualname__", None)
+    if not isinstance(module, str) or not isinstance(qualname, str):
+        return None
+    if _decode_type([module, qualname]) is not typ:
+        return None
+    return {"type": [module, qualname]}
+
+
+def _decode_type(data: object) -> Optional[type]:
+    if not isinstance(data, list) or len(data) != 2:
+        return None
+    module, qualname = data
+    obj = sys.modules.get(module)
+    if obj is None or "<locals>" in qualname:
+        return None
+    for attr in qualname.split("."):
+        obj = safe_getattr(obj, attr, None)
+    if not isinstance(obj, type):
+        return None
+    return obj
+
+
+@dataclass
+class ImportGraph:
+    """The imports between the files that are checked in a run."""
+
+    module_to_file: Dict[str, str] = field(default_factory=dict)
+    module_to_hash: Dict[str, str] = field(default_factory=dict)
+    dependencies: Dict[str, Set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def make(
+        cls, files: Iterable[str], *, import_paths: Sequence[str] = ()
+    ) -> "ImportGraph":
+        graph = cls()
+        trees = {}
+        for filename in files:
+            module = get_module_name(filename, import_paths=import_paths)
+            if module is None or module in graph.module_to_file:
+                continue
+            try:
+                with open(filename, encoding="utf-8") as f:
+                    contents = f.read()
+            except (OSError, UnicodeDecodeError):
+                contents = ""
+            try:
+                trees[module] = ast.parse(contents)
+            except (SyntaxError, ValueError):
+                pass
+            graph.module_to_file[module] = filename
+            graph.module_to_hash[module] = hash_contents(contents)
+        for module, filename in graph.module_to_file.items():
+            tree = trees.get(module)
+            is_package = os.path.basename(filename) == "__init__.py"
+            imported = _get_imported_modules(tree, module, is_package=is_package)
+            graph.dependencies[module] = {
+                dep for dep in imported if dep in graph.module_to_file and dep != module
+            }
+        return graph
+
+    def ordered_files(self) -> List[str]:
+        """Returns the files so that each file comes after the files it imports.
+
+        Files in an import cycle are ordered by module name.
+
+        """
+        ordered = []
+        seen = set()
+
+        def visit(module: str) -> None:
+            # Iterative DFS to avoid hitting the recursion limit on long import chains.
+            stack = [(module, iter(sorted(self.dependencies[module])))]
+            seen.add(module)
+            while stack:
+                current, deps = stack[-1]
+                for dep in deps:
+                    if dep not in seen:
+                        seen.add(dep)
+                        stack.append((dep, iter(sorted(self.dependencies[dep]))))
+                        break
+                else:
+                    stack.pop()
+                    ordered.append(self.module_to_file[current])
+
+        for module in sorted(self.module_to_file):
+            if module not in seen:
+                visit(module)
+        return ordered
+
+    def get_fingerprint(self, module: str) -> Dict[str, str]:
+        """Returns the content hashes of the module and all modules it imports,
+        directly or indirectly."""
+        fingerprint = {}
+        to_visit = [module]
+        while to_visit:
+            current = to_visit.pop()
+            if current in fingerprint:
+                continue
+            fingerprint[current] = self.module_to_hash[current]
+            to_visit += self.dependencies.get(current, ())
+        return fingerprint
+
+
+def _get_imported_modules(
+    tree: Optional[ast.AST], module: str, *, is_package: bool
+) -> Set[str]:
+    if tree is None:
+        return set()
+    imported = set()
+    package = module if is_package else module.rpartition(".")[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split(".") if package else []
+                if node.level - 1 > len(parts):
+                    continue
+                base_parts = parts[: len(parts) - (node.level - 1)]
+                if node.module:
+                    base_parts.append(node.module)
+                base = ".".join(base_parts)
+            else:
+                base = node.module or ""
+            if not base:
+                continue
+            imported.add(base)
+            # "from package import module"
+            for alias in node.names:
+                imported.add(f"{base}.{alias.name}")
+    # Importing a submodule also runs its parent packages.
+    for name in list(imported):
+        while "." in name:
+            name = name.rpartition(".")[0]
+            imported.add(name)
+    return imported
+
+
+@dataclass
+class ReturnSummaryStore:
+    """Inferred return types of functions, keyed by module and qualified name.
+
+    The :class:`pyanalyze.checker.Checker` keeps one of these.
+
+    """
+
+    options: InitVar[Options]
+    enabled: bool = False
+    cache_dir: Optional[Path] = None
+    graph: Optional[ImportGraph] = None
+    hits: int = 0
+    misses: int = 0
+    _summaries: Dict[str, Dict[str, Value]] = field(default_factory=dict, repr=False)
+    # Summaries for modules that are still being checked
+    _pending: Dict[str, Dict[str, Value]] = field(default_factory=dict, repr=False)
+    # Content hashes of the files that the summaries of a module depend on
+    _fingerprints: Dict[str, Dict[str, str]] = field(default_factory=dict, repr=False)
+    # Fingerprints of the summaries used by modules that are still being checked
+    _used: Dict[str, Dict[str, str]] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self, options: Options) -> None:
+        self.enabled = options.get_value_for(ReturnSummaries)
+        if self.cache_dir is None:
+            self.cache_dir = options.get_value_for(ReturnSummaryCacheDir)
+
+    def order_files(
+        self, files: Iterable[str], *, import_paths: Sequence[str] = ()
+    ) -> List[str]:
+        """Builds the import graph for the files and returns them in dependency
+        order."""
+        files = list(files)
+        graph = self.graph = ImportGraph.make(files, import_paths=import_paths)
+        ordered = graph.ordered_files()
+        # Files that are not on the import path go last, in their original order.
+        in_graph = set(graph.module_to_file.values())
+        return ordered + [filename for filename in files if filename not in in_graph]
+
+    def record_return_value(self, module: str, function: object, value: Value) -> None:
+        """Records the inferred return value of a function defined in a module
+        that is being checked."""
+        key = _get_key(function)
+        if key is None or key[0] != module or encode_value(value) is None:
+            return
+        self._pending.setdefault(module, {})[key[1]] = value
+
+    def record_module_completed(self, module: str) -> None:
+        """Makes the summaries for a module available to other modules."""
+        summaries = self._pending.pop(module, {})
+        self._summaries[module] = summaries
+        # The summaries may also depend on those of modules outside this run,
+        # which the import graph does not cover.
+        fingerprint = self._used.pop(module, {})
+        if self.graph is not None and module in self.graph.module_to_file:
+            fingerprint.update(self.graph.get_fingerprint(module))
+            self._fingerprints[module] = fingerprint
+            if self.cache_dir is not None:
+                self._store(module, fingerprint, summaries)
+        else:
+            self._fingerprints[module] = fingerprint
+
+    def get_return_value(
+        self, sig: MaybeSignature, *, current_module: Optional[str] = None
+    ) -> Optional[Value]:
+        """Returns the return value recorded for the function with this
+        signature, if any.
+
+        Functions in current_module, the module being checked, are ignored.
+
+        """
+        if isinstance(sig, BoundMethodSignature):
+            sig = sig.signature
+        if not isinstance(sig, Signature):
+            return None
+        key = _get_key(sig.callable)
+        if key is None:
+            return None
+        module, qualname = key
+        if module == current_module:
+            return None
+        try:
+            summaries = self._summaries[module]
+        except KeyError:
+            if self.graph is not None and module in self.graph.module_to_file:
+                # Checked later in this run; don't use possibly outdated data
+                # from disk.
+                return None
+            summaries = self._summaries[module] = self._load(module)
+        value = summaries.get(qualname)
+        if value is not None and current_module is not None:
+            self._used.setdefault(current_module, {}).update(
+                self._fingerprints.get(module, {})
+            )
+        return value
+
+    def _load(self, module: str) -> Dict[str, Value]:
+        if self.cache_dir is None:
+            return {}
+        try:
+            with self._entry_path(module).open(encoding="utf-8") as f:
+                entry = json.load(f)
+            if (
+                entry["version"] == SUMMARY_CACHE_VERSION
+                and entry["module"] == module
+                and all(
+                    _hash_module_file(name) == content_hash
+                    for name, content_hash in entry["files"].items()
+                )
+            ):
+                summaries = {}
+                for qualname, data in entry["returns"].items():
+                    value = decode_value(data)
+                    if value is not None:
+                        summaries[qualname] = value
+                self._fingerprints[module] = dict(entry["files"])
+                self.hits += 1
+                return summaries
+        except Exception:
+            # Missing, corrupted, or created by an incompatible version.
+            pass
+        self.misses += 1
+        return {}
+
+    def _store(
+        self, module: str, fingerprint: Dict[str, str], summaries: Dict[str, Value]
+    ) -> None:
+        assert self.cache_dir is not None
+        entry = {
+            "version": SUMMARY_CACHE_VERSION,
+            "module": module,
+            "files": fingerprint,
+            "returns": {
+                qualname: encode_value(value)
+                for qualname, value in sorted(summaries.items())
+            },
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that concurrent processes
+            # never see a partially written entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(temp_path, self._entry_path(module))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            # The cache is only an optimization; failing to write it is fine.
+            pass
+
+    def _entry_path(self, module: str) -> Path:
+        assert self.cache_dir is not None
+        key = hashlib.blake2b(module.encode("utf-8"), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+
+def _get_key(function: object) -> Optional[Tuple[str, str]]:
+    module = safe_getattr(function, "__module__", None)
+    qualname = safe_getattr(function, "__qualname__", None)
+    if not isinstance(module, str) or not isinstance(qualname, str):
+        return None
+    if "<locals>" in qualname:
+        return None
+    return module, qualname
+
+
+def _hash_module_file(module: str) -> Optional[str]:
+    filename = safe_getattr(sys.modules.get(module), "__file__", None)
+    if not isinstance(filename, str):
+        return None
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return hash_contents(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
@@ -1,6 +1,12 @@
 import ast
+from pathlib import Path
 
-from .analysis_lib import get_indentation, get_line_range_for_node
+from .analysis_lib import (
+    PathExcluder,
+    get_indentation,
+    get_line_range_for_node,
+    walk_files,
+)
 
 
 def test_get_indentation() -> None:
@@ -42,3 +48,50 @@ def test_get_line_range_for_node() -> None:
     assert [6, 7, 8, 9, 10] == get_line_range_for_node(tree.body[2], lines)
     assert [13, 14] == get_line_range_for_node(tree.body[3], lines)
     assert [16, 17, 18, 19, 20, 21] == get_line_range_for_node(tree.body[4], lines)
+
+
+def test_path_excluder() -> None:
+    excluder = PathExcluder(["*_pb2.py", "/build", "generated/", "!keep_pb2.py"])
+    assert excluder.is_excluded("a/b/foo_pb2.py", is_dir=False)
+    assert not excluder.is_excluded("a/b/keep_pb2.py", is_dir=False)
+    assert excluder.is_excluded("build", is_dir=True)
+    assert not excluder.is_excluded("a/build", is_dir=True)
+    assert excluder.is_excluded("a/generated", is_dir=True)
+    assert not excluder.is_excluded("a/generated", is_dir=False)
+
+    excluder = PathExcluder(["a/**/c.py", "docs/*.py", "# comment", ""])
+    assert excluder.is_excluded("a/c.py", is_dir=False)
+    assert excluder.is_excluded("a/b/b/c.py", is_dir=False)
+    assert excluder.is_excluded("docs/conf.py", is_dir=False)
+    assert not excluder.is_excluded("docs/sub/conf.py", is_dir=False)
+
+
+def test_walk_files(tmp_path: Path) -> None:
+    for relative in [
+        "a.py",
+        "a/b.py",
+        "a/c.txt",
+        "a.b/c.py",
+        "pkg/test_x.py",
+        "pkg/skip_pb2.py",
+        ".git/hooks.py",
+        "env/lib/site.py",
+        "build/out.py",
+    ]:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    (tmp_path / "env" / "pyvenv.cfg").write_text("")
+
+    found = list(walk_files([tmp_path], exclude=["*_pb2.py", "/build"]))
+    expected = ["a.b/c.py", "a.py", "a/b.py", "pkg/test_x.py"]
+    assert found == [str(tmp_path / relative) for relative in expected]
+    assert found == sorted(found)
+
+    found = list(
+        walk_files(
+            [tmp_path / "pkg", tmp_path / "a.py", tmp_path / "pkg"],
+            filter_function=lambda filename: filename.startswith("test"),
+        )
+    )
+    assert found == [str(tmp_path / "a.py"), str(tmp_path / "pkg" / "test_x.py")]
@@ -1,13 +1,22 @@
 # static analysis: ignore
 import functools
+import textwrap
 from dataclasses import dataclass
-from typing import List, NewType, TypeVar
+from typing import List, NewType, TypeVar, Union
 
+import pytest
 from asynq import asynq
 
-from .arg_spec import is_dot_asynq_function
+from .arg_spec import ArgSpecCache, StubOnlyPackages, is_dot_asynq_function
 from .checker import Checker
-from .signature import BoundMethodSignature, ParameterKind, Signature, SigParameter
+from .options import Options
+from .signature import (
+    ANY_SIGNATURE,
+    BoundMethodSignature,
+    ParameterKind,
+    Signature,
+    SigParameter,
+)
 from .stacked_scopes import Composite
 from .test_name_check_visitor import (
     ConfiguredNameCheckVisitor,
@@ -439,3 +448,77 @@ class TestPytestRaises(TestNameCheckVisitorBase):
                 pass
 
             pytest.raises()  # E: incompatible_call
+
+
+def test_trim_caches() -> None:
+    def f(x: int) -> None:
+        pass
+
+    checker = Checker()
+    asc = checker.arg_spec_cache
+    sig = asc.get_argspec(f)
+    assert f in asc.known_argspecs
+
+    checker.trim_caches()
+    assert f not in asc.known_argspecs
+    assert all(obj in asc.known_argspecs for obj in ArgSpecCache.DEFAULT_ARGSPECS)
+    assert asc.get_argspec(f) == sig
+
+
+def test_annotation_cache() -> None:
+    checker = Checker()
+    asc = checker.arg_spec_cache
+    hits, misses = asc.annotation_cache_hits, asc.annotation_cache_misses
+    assert asc.type_from_runtime(List[int]) == GenericValue(list, [TypedValue(int)])
+    assert asc.type_from_runtime(List[int]) == GenericValue(list, [TypedValue(int)])
+    assert asc.annotation_cache_hits == hits + 1
+    assert asc.annotation_cache_misses == misses + 1
+
+    # Forward references are resolved in the given globals.
+    assert asc.type_from_runtime("X", {"X": int}) == TypedValue(int)
+    assert asc.type_from_runtime("X", {"X": str}) == TypedValue(str)
+
+    # Unions that compare equal are not conflated.
+    assert asc.type_from_runtime(Union[int, str]) == MultiValuedValue(
+        [TypedValue(int), TypedValue(str)]
+    )
+    assert asc.type_from_runtime(Union[str, int]) == MultiValuedValue(
+        [TypedValue(str), TypedValue(int)]
+    )
+
+
+def test_annotation_cache_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("pyanalyze.arg_spec._ANNOTATION_CACHE_SIZE", 2)
+    asc = Checker().arg_spec_cache
+    asc.annotation_cache.clear()
+    for _ in range(5):
+        assert asc.type_from_runtime("X", {"X": int}) == TypedValue(int)
+        assert len(asc.annotation_cache) <= 2
+
+
+def test_stub_only_packages() -> None:
+    from . import tests
+
+    checker = Checker(
+        raw_options=Options.from_option_list(
+            [StubOnlyPackages(["textwrap", "pyanalyze.tests"])]
+        )
+    )
+    asc = checker.arg_spec_cache
+    stats = asc.stub_only_stats
+
+    # Resolved from typeshed
+    sig = asc.get_argspec(textwrap.dedent)
+    assert isinstance(sig, Signature)
+    assert sig.parameters["text"].annotation == TypedValue(str)
+
+    # No stub, so we do not look at the runtime signature.
+    assert asc.get_argspec(tests.cached_fn) == ANY_SIGNATURE
+    assert stats.stub_lookups == 2
+    assert stats.stub_misses == 1
+
+    # Other modules are still inspected at runtime.
+    runtime_lookups = stats.runtime_lookups
+    assert asc.get_argspec(ClassWithCall) != ANY_SIGNATURE
+    assert stats.runtime_lookups > runtime_lookups
+    assert stats.stub_lookups == 2
@@ -0,0 +1,123 @@
+import ast
+import gc
+import os
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from .ast_cache import AstCache, parse_file, prefetch_files
+from .test_name_check_visitor import run_on_files, write_modules
+
+
+def test_ast_cache(tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    source = tmp_path / "mod.py"
+    source.write_text("x = 1\ny = 2\n")
+
+    cache = AstCache(cache_dir)
+    parsed = cache.parse_file(str(source))
+    assert parsed.lines == ["x = 1\n", "y = 2\n"]
+    assert isinstance(parsed.tree.body[0], ast.Assign)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    cached = cache.parse_file(str(source))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert ast.dump(cached.tree) == ast.dump(parsed.tree)
+    assert cached.lines == parsed.lines
+
+    # Touching the file without changing it still hits the cache.
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.parse_file(str(source))
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    source.write_text("x = 3\n")
+    changed = cache.parse_file(str(source))
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert changed.lines == ["x = 3\n"]
+    assert ast.dump(changed.tree) == ast.dump(ast.parse("x = 3\n"))
+
+    # An edit that keeps the size and modification time is noticed.
+    stat = source.stat()
+    source.write_text("x = 4\n")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    changed = cache.parse_file(str(source))
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert ast.dump(changed.tree) == ast.dump(ast.parse("x = 4\n"))
+
+    # A corrupted entry is ignored.
+    for entry in cache_dir.iterdir():
+        entry.write_bytes(b"garbage")
+    assert parse_file(str(source), cache_dir=cache_dir).lines == ["x = 4\n"]
+
+
+def test_no_cache(tmp_path: Path) -> None:
+    source = tmp_path / "mod.py"
+    source.write_text("x = 1\r\n")
+    parsed = parse_file(str(source))
+    assert parsed.contents == "x = 1\n"
+    assert parsed.lines == ["x = 1\n"]
+
+
+def test_prefetch_files(tmp_path: Path) -> None:
+    paths = []
+    for i in range(5):
+        source = tmp_path / f"mod{i}.py"
+        source.write_text(f"x = {i}\n")
+        paths.append(str(source))
+    paths.insert(2, str(tmp_path / "missing.py"))
+    read = []
+
+    def filenames() -> Iterator[str]:
+        for path in paths:
+            read.append(path)
+            yield path
+
+    prefetched = prefetch_files(filenames(), num_files=2)
+    filename, future = next(prefetched)
+    assert filename == paths[0]
+    assert future.result().lines == ["x = 0\n"]
+    # Only a bounded number of files are read ahead.
+    assert read == paths[:3]
+
+    results = list(prefetched)
+    assert [filename for filename, _ in results] == paths[1:]
+    with pytest.raises(OSError):
+        results[1][1].result()
+    assert [future.result().lines for _, future in results[2:]] == [
+        [f"x = {i}\n"] for i in range(2, 5)
+    ]
+
+
+def test_prefetch_leaves_gc_alone(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache_dir = tmp_path / "cache"
+    source = tmp_path / "mod.py"
+    source.write_text("x = 1\n")
+    parse_file(str(source), cache_dir=cache_dir)
+
+    calls = []
+    monkeypatch.setattr(gc, "disable", lambda: calls.append("disable"))
+    [(_, future)] = prefetch_files([str(source)], num_files=1, cache_dir=cache_dir)
+    assert future.result().lines == ["x = 1\n"]
+    # The garbage collector is global, so it is not disabled from other threads.
+    assert calls == []
+    assert parse_file(str(source), cache_dir=cache_dir).lines == ["x = 1\n"]
+    assert calls == ["disable"]
+
+
+def test_run_with_prefetch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    modules = {
+        f"prefetch_mod{i}": f"def f():\n    return undefined{i}\n" for i in range(3)
+    }
+    paths = write_modules(tmp_path, monkeypatch, modules)
+
+    def run(prefetch: int) -> List[Tuple[str, int]]:
+        failures = run_on_files(paths, prefetch=prefetch)
+        return [(failure["filename"], failure["lineno"]) for failure in failures]
+
+    expected = [(str(path), 2) for path in paths]
+    assert run(0) == expected
+    assert run(2) == expected
@@ -420,3 +420,52 @@ class TestClassAttributeTransformer(TestNameCheckVisitorBase):
 
         def capybara(c: Capybara):
             assert_is_value(c.foo, TypedValue(str))
+
+
+def test_attribute_cache() -> None:
+    from .checker import Checker
+
+    class Capybara:
+        weight = 42
+
+    class Hydrochoerus(Capybara):
+        pass
+
+    checker = Checker()
+    cache = checker.attribute_cache
+    instance = TypedValue(Hydrochoerus)
+    assert checker.get_attribute_from_value(instance, "weight") == KnownValue(42)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert checker.get_attribute_from_value(instance, "weight") == KnownValue(42)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Looking the attribute up on the class is a different lookup.
+    assert checker.get_attribute_from_value(
+        KnownValue(Hydrochoerus), "weight"
+    ) == KnownValue(42)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Changing the class attribute is noticed.
+    Capybara.weight = 43
+    assert checker.get_attribute_from_value(instance, "weight") == KnownValue(43)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # Other changes are not noticed until the cache is emptied.
+    Hydrochoerus.weight = 44
+    assert checker.get_attribute_from_value(instance, "weight") == KnownValue(43)
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.clear()
+    assert checker.get_attribute_from_value(instance, "weight") == KnownValue(44)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    # Attributes found only through getattr() are not cached.
+    class Meta(type):
+        size = 1
+
+    class Rodent(metaclass=Meta):
+        pass
+
+    assert checker.get_attribute_from_value(KnownValue(Rodent), "size") == KnownValue(1)
+    Meta.size = 2
+    assert checker.get_attribute_from_value(KnownValue(Rodent), "size") == KnownValue(2)
+    assert cache.hits == 2
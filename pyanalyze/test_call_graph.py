@@ -0,0 +1,112 @@
+# static analysis: ignore
+import csv
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from .call_graph import CallGraph, get_qualified_name
+from .name_check_visitor import NameCheckVisitor
+from .test_name_check_visitor import run_on_files, write_modules
+
+CODE = """
+def capybara():
+    return hydrochoerus()
+
+
+def hydrochoerus():
+    return len([])
+
+
+class Kerodon:
+    def eat(self):
+        capybara()
+        capybara()
+
+
+capybara()
+"""
+
+
+def _run(path: Path, output: Path) -> None:
+    run_on_files([path], call_graph_output=str(output))
+
+
+@pytest.fixture
+def source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    [path] = write_modules(tmp_path, monkeypatch, {"call_graph_example": CODE})
+    return path
+
+
+EXPECTED = [
+    ("call_graph_example.capybara", "call_graph_example.hydrochoerus", 3),
+    ("call_graph_example.hydrochoerus", "builtins.len", 7),
+    ("call_graph_example.Kerodon.eat", "call_graph_example.capybara", 12),
+    ("call_graph_example.Kerodon.eat", "call_graph_example.capybara", 13),
+    ("call_graph_example", "call_graph_example.capybara", 16),
+]
+
+
+def _read_csv(path: Path) -> List[Tuple[str, str, int]]:
+    with path.open(newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["caller", "callee", "filename", "lineno"]
+    return [(caller, callee, int(lineno)) for caller, callee, _, lineno in rows[1:]]
+
+
+def test_csv(source: Path, tmp_path: Path) -> None:
+    output = tmp_path / "calls.csv"
+    _run(source, output)
+    assert _read_csv(output) == EXPECTED
+
+
+def test_sqlite(source: Path, tmp_path: Path) -> None:
+    output = tmp_path / "calls.db"
+    _run(source, output)
+    connection = sqlite3.connect(str(output))
+    try:
+        rows = connection.execute(
+            "SELECT caller.name, callee.name, edges.lineno FROM edges"
+            " JOIN names AS caller ON caller.id = edges.caller"
+            " JOIN names AS callee ON callee.id = edges.callee"
+            " ORDER BY edges.lineno"
+        ).fetchall()
+    finally:
+        connection.close()
+    assert rows == EXPECTED
+
+
+def test_merge_from_workers(source: Path) -> None:
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs({})
+    # Each worker records calls in its own copy of the graph.
+    extra_data = []
+    for _ in range(2):
+        _, extra = NameCheckVisitor.check_file_in_worker(
+            str(source), call_graph=CallGraph(), **kwargs
+        )
+        extra_data.append(extra)
+    call_graph = CallGraph()
+    NameCheckVisitor.merge_extra_data(extra_data, call_graph=call_graph)
+    assert [
+        (caller, callee, lineno) for caller, callee, _, lineno in call_graph.edges()
+    ] == EXPECTED
+
+
+def test_merge() -> None:
+    first = CallGraph()
+    first.record_call("a", "b", "a.py", 1)
+    second = CallGraph()
+    second.record_call("c", "a", "c.py", 2)
+    second.record_call("a", "b", "a.py", 1)
+    first.merge(second)
+    assert len(first) == 2
+    assert list(first.edges()) == [("a", "b", "a.py", 1), ("c", "a", "c.py", 2)]
+
+
+def test_get_qualified_name() -> None:
+    assert get_qualified_name(sys) == "sys"
+    assert get_qualified_name(CallGraph.merge) == "pyanalyze.call_graph.CallGraph.merge"
+    assert get_qualified_name(list.append) == "builtins.list.append"
+    assert get_qualified_name(42) is None
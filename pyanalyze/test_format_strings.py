@@ -3,6 +3,7 @@ from .error_code import ErrorCode
 from .format_strings import (
     ConversionSpecifier,
     FormatString,
+    FormatStringCache,
     IndexOrAttribute,
     PercentFormatString,
     ReplacementField,
@@ -191,6 +192,31 @@ def test_lint():
     )
 
 
+def test_format_string_cache():
+    cache = FormatStringCache(max_size=2)
+    fs, errors = cache.get_percent_format("%k")
+    assert fs == PercentFormatString.from_pattern("%k")
+    assert errors == ("invalid conversion specifier in %k",)
+    assert cache.get_percent_format("%k")[0] is fs
+
+    bytes_fs, _ = cache.get_percent_format(b"%k")
+    assert bytes_fs == PercentFormatString.from_bytes_pattern(b"%k")
+    assert cache.get_percent_format("%s") == (
+        PercentFormatString.from_pattern("%s"),
+        (),
+    )
+
+    assert cache.get_format("{x}") == parse_format_string("{x}")
+    assert cache.get_format("{}") == parse_format_string("{}")
+    assert len(cache) == 3
+
+    # The oldest entry is dropped when the cache is full.
+    cache.get_percent_format("%(a)s")
+    assert cache.get_percent_format("%k")[0] is not fs
+    cache.clear()
+    assert len(cache) == 0
+
+
 class TestAccept(object):
     def assert_errors(self, obj, arg, expected):
         actual = list(obj.accept(arg, CTX))
@@ -0,0 +1,228 @@
+# static analysis: ignore
+import ast
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from .lsp import (
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    AnalysisCancelled,
+    Document,
+    LanguageServer,
+    _ServerVisitor,
+    byte_offset_to_utf16,
+    read_message,
+    utf16_to_byte_offset,
+    write_message,
+)
+from .name_check_visitor import NameCheckVisitor
+
+CODE = """
+def f() -> int:
+    return "x"
+
+
+value = f()
+"""
+
+
+class _Client:
+    """Drives a LanguageServer over pipes, like an editor would."""
+
+    def __init__(self, *, debounce: float = 0.3) -> None:
+        server_in, self._to_server = os.pipe()
+        self._from_server, server_out = os.pipe()
+        self.server = LanguageServer(
+            os.fdopen(server_in, "rb"),
+            os.fdopen(server_out, "wb"),
+            NameCheckVisitor.prepare_constructor_kwargs({}),
+            debounce=debounce,
+        )
+        self._output = os.fdopen(self._to_server, "wb")
+        self._input = os.fdopen(self._from_server, "rb")
+        self._messages: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._next_id = 0
+        self.exit_code: Optional[int] = None
+        self._server_thread = threading.Thread(target=self._serve, daemon=True)
+        self._server_thread.start()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _serve(self) -> None:
+        self.exit_code = self.server.serve()
+        self.server.output_stream.close()
+
+    def _read(self) -> None:
+        while True:
+            message = read_message(self._input)
+            self._messages.put(message)
+            if message is None:
+                return
+
+    def notify(self, method: str, params: Dict[str, Any]) -> None:
+        write_message(
+            self._output, {"jsonrpc": "2.0", "method": method, "params": params}
+        )
+
+    def request(self, method: str, params: Dict[str, Any]) -> int:
+        self._next_id += 1
+        write_message(
+            self._output,
+            {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params},
+        )
+        return self._next_id
+
+    def receive(self) -> Dict[str, Any]:
+        message = self._messages.get(timeout=60)
+        assert message is not None, "server closed the connection"
+        return message
+
+    def response(self, request_id: int) -> Dict[str, Any]:
+        message = self.receive()
+        assert message.get("id") == request_id, message
+        return message
+
+    def close(self) -> None:
+        self.response(self.request("shutdown", {}))
+        self.notify("exit", {})
+        self._server_thread.join(timeout=60)
+        self._output.close()
+
+
+def _open(client: _Client, path: Path, text: str) -> str:
+    path.write_text(text)
+    uri = path.as_uri()
+    client.notify(
+        "textDocument/didOpen",
+        {
+            "textDocument": {
+                "uri": uri,
+                "languageId": "python",
+                "version": 1,
+                "text": text,
+            }
+        },
+    )
+    return uri
+
+
+def _codes(diagnostics: List[Dict[str, Any]]) -> List[str]:
+    return [diagnostic["code"] for diagnostic in diagnostics]
+
+
+def test_diagnostics_and_hover(tmp_path: Path) -> None:
+    client = _Client()
+    init = client.response(client.request("initialize", {"capabilities": {}}))
+    assert init["result"]["capabilities"]["hoverProvider"] is True
+    client.notify("initialized", {})
+
+    uri = _open(client, tmp_path / "lsp_diagnostics.py", CODE)
+    published = client.receive()
+    assert published["method"] == "textDocument/publishDiagnostics"
+    params = published["params"]
+    assert params["uri"] == uri
+    assert params["version"] == 1
+    assert _codes(params["diagnostics"]) == ["incompatible_return_value"]
+    assert params["diagnostics"][0]["range"]["start"] == {"line": 2, "character": 4}
+
+    hover_id = client.request(
+        "textDocument/hover",
+        {"textDocument": {"uri": uri}, "position": {"line": 5, "character": 9}},
+    )
+    hover = client.response(hover_id)["result"]
+    assert hover["contents"]["value"] == "```python\nint\n```"
+    assert hover["range"] == {
+        "start": {"line": 5, "character": 8},
+        "end": {"line": 5, "character": 11},
+    }
+
+    error = client.response(client.request("textDocument/definition", {}))
+    assert error["error"]["code"] == METHOD_NOT_FOUND
+
+    client.notify("textDocument/didClose", {"textDocument": {"uri": uri}})
+    assert client.receive()["params"] == {"uri": uri, "diagnostics": []}
+    client.close()
+    assert client.exit_code == 0
+
+
+def test_edits_are_debounced(tmp_path: Path) -> None:
+    client = _Client(debounce=0.2)
+    uri = _open(client, tmp_path / "lsp_edits.py", CODE)
+    assert _codes(client.receive()["params"]["diagnostics"]) == [
+        "incompatible_return_value"
+    ]
+
+    fixed = CODE.replace('"x"', "1")
+    for version, text in [(2, CODE + "\n"), (3, fixed)]:
+        client.notify(
+            "textDocument/didChange",
+            {
+                "textDocument": {"uri": uri, "version": version},
+                "contentChanges": [{"text": text}],
+            },
+        )
+    # Only the latest version is checked, and the unsaved text is used.
+    params = client.receive()["params"]
+    assert params["version"] == 3
+    assert params["diagnostics"] == []
+    client.close()
+    assert client.server.checks_completed == 2
+
+
+def test_malformed_messages(tmp_path: Path) -> None:
+    client = _Client()
+    client.response(client.request("initialize", {"capabilities": {}}))
+    error = client.response(client.request("textDocument/hover", {}))
+    assert error["error"]["code"] == INVALID_PARAMS
+    client.notify("textDocument/didOpen", {})
+    # params that are not an object
+    write_message(
+        client._output,
+        {"jsonrpc": "2.0", "method": "textDocument/didChange", "params": [1]},
+    )
+    write_message(
+        client._output, {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": [1]}
+    )
+
+    # The server keeps answering requests.
+    uri = _open(client, tmp_path / "lsp_malformed.py", CODE)
+    assert client.receive()["params"]["uri"] == uri
+    hover_id = client.request(
+        "textDocument/hover",
+        {"textDocument": {"uri": uri}, "position": {"line": 5, "character": 9}},
+    )
+    assert "result" in client.response(hover_id)
+    client.close()
+    assert client.exit_code == 0
+
+
+def test_cancelled_check(tmp_path: Path) -> None:
+    path = tmp_path / "lsp_cancelled.py"
+    path.write_text(CODE)
+    document = Document(path.as_uri(), CODE, 1)
+    assert document.path == str(path)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    visitor = _ServerVisitor(
+        document.path,
+        CODE,
+        ast.parse(CODE),
+        document=document,
+        cancel_event=cancel_event,
+        **NameCheckVisitor.prepare_constructor_kwargs({}),
+    )
+    with pytest.raises(AnalysisCancelled):
+        visitor.check()
+
+
+def test_offsets() -> None:
+    line = "x = 'é𝔘' + y"
+    assert utf16_to_byte_offset(line, 5) == 5
+    assert utf16_to_byte_offset(line, 6) == 7
+    assert utf16_to_byte_offset(line, 8) == 11
+    assert byte_offset_to_utf16(line, 11) == 8
+    assert byte_offset_to_utf16(line, len(line.encode("utf-8"))) == 13
@@ -0,0 +1,113 @@
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from .checker import Checker, LowMemory, MaxMemory
+from .memory import MemoryTracker, get_deep_size, megabytes
+from .node_visitor import BaseNodeVisitor
+from .options import Options
+from .test_name_check_visitor import ConfiguredNameCheckVisitor
+
+
+def test_get_deep_size() -> None:
+    shared = ["x" * 1000]
+    first = [shared]
+    second = [shared]
+    assert get_deep_size(first) > sys.getsizeof(shared[0])
+    assert get_deep_size(first) == get_deep_size(second)
+
+    seen = set()
+    first_size = get_deep_size(first, seen)
+    assert get_deep_size(second, seen) == sys.getsizeof(second)
+    assert first_size > sys.getsizeof(shared[0])
+
+    # Classes and modules are not counted.
+    assert get_deep_size([MemoryTracker, sys]) == sys.getsizeof([MemoryTracker, sys])
+
+
+def test_trim_above_target(monkeypatch: pytest.MonkeyPatch) -> None:
+    rss = megabytes(200)
+    monkeypatch.setattr("pyanalyze.checker.get_current_rss", lambda: rss)
+    checker = Checker(Options.from_option_list([LowMemory(True), MaxMemory(100)]))
+    trims: List[str] = []
+    original_trim = checker.trim_caches
+
+    def trim_caches() -> None:
+        trims.append("trim")
+        original_trim()
+
+    monkeypatch.setattr(checker, "trim_caches", trim_caches)
+    checker.record_file_completed("first.py")
+    assert len(trims) == 1
+    # Memory use stays above the target, but caches are not dropped after every
+    # file.
+    for i in range(10):
+        checker.record_file_completed(f"file{i}.py")
+    assert len(trims) == 1
+
+    # They are dropped again once memory use grows further.
+    rss = megabytes(220)
+    checker.record_file_completed("last.py")
+    assert len(trims) == 2
+
+
+def test_memory_tracker(tmp_path: Path) -> None:
+    tracker = MemoryTracker()
+    tracker.start()
+    data = []
+    data.append(bytearray(10**6))
+    tracker.record_file("a.py")
+    tracker.record_file("b.py")
+    tracker.stop()
+    tracker.record_caches({"data": data})
+
+    first, second = tracker.files
+    assert first.filename == "a.py"
+    assert first.traced_growth >= 10**6
+    assert abs(second.traced_growth) < 10**6
+    [cache] = tracker.caches
+    assert cache.name == "data"
+    assert cache.entries == 1
+    assert cache.size > 10**6
+
+    output = tmp_path / "report.json"
+    tracker.write_report(str(output))
+    report = json.loads(output.read_text())
+    assert [usage["filename"] for usage in report["files"]] == ["a.py", "b.py"]
+    assert report["caches"] == [{"name": "data", "entries": 1, "size": cache.size}]
+    assert report["top_allocations"]
+
+
+def test_memory_report(tmp_path: Path) -> None:
+    source = tmp_path / "memory_report_example.py"
+    source.write_text("class Capybara:\n    def eat(self) -> None:\n        pass\n")
+    output = tmp_path / "report.json"
+    kwargs = ConfiguredNameCheckVisitor.prepare_constructor_kwargs({})
+    ConfiguredNameCheckVisitor._run_on_files(
+        [str(source)], memory_report=str(output), **kwargs
+    )
+    report = json.loads(output.read_text())
+    assert [usage["filename"] for usage in report["files"]] == [str(source)]
+    cache_names = {cache["name"] for cache in report["caches"]}
+    assert "Checker.type_object_cache" in cache_names
+    assert "ClassAttributeChecker.filename_to_visitor" in cache_names
+    assert kwargs["checker"].memory_tracker is None
+
+
+def test_memory_report_failed_run(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail(*args: object, **kwargs: object) -> None:
+        raise RuntimeError("capybara")
+
+    monkeypatch.setattr(BaseNodeVisitor, "_run_on_files", fail)
+    kwargs = ConfiguredNameCheckVisitor.prepare_constructor_kwargs({})
+    with pytest.raises(RuntimeError):
+        ConfiguredNameCheckVisitor._run_on_files(
+            [], memory_report=str(tmp_path / "report.json"), **kwargs
+        )
+    assert not tracemalloc.is_tracing()
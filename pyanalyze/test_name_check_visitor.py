@@ -2,8 +2,15 @@
 import ast
 import collections
 import os
+import sys
+import textwrap
+import time
 import types
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Sequence, Union
+from unittest import mock
 
+import pytest
 from asynq import AsyncTask, FutureBase
 
 from . import test_node_visitor
@@ -13,10 +20,14 @@ from .error_code import DISABLED_IN_TESTS, ErrorCode
 from .implementation import assert_is_value, dump_value
 from .name_check_visitor import (
     ClassAttributeChecker,
+    FileTimeout,
+    FunctionTimeout,
     NameCheckVisitor,
     _get_task_cls,
     _static_hasattr,
 )
+from .node_visitor import ErrorCodeInstance, Failure
+from .options import ConfigOption
 from .test_config import CONFIG_PATH
 from .test_node_visitor import assert_fails, assert_passes
 from .tests import (
@@ -158,6 +169,46 @@ def _make_module(code_str: str) -> types.ModuleType:
     return make_module(code_str, extra_scope)
 
 
+def write_modules(
+    directory: Path, monkeypatch: pytest.MonkeyPatch, modules: Mapping[str, str]
+) -> List[Path]:
+    """Writes top-level modules to files in directory and makes them importable
+    for the rest of the test.
+
+    modules maps module names to their code.
+
+    """
+    monkeypatch.syspath_prepend(str(directory))
+    paths = []
+    for name, code in modules.items():
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        path = directory / f"{name}.py"
+        path.write_text(code)
+        paths.append(path)
+    return paths
+
+
+def run_on_files(
+    files: Iterable[Union[str, Path]],
+    *,
+    settings: Optional[Mapping[ErrorCodeInstance, bool]] = None,
+    extra_options: Sequence[ConfigOption[Any]] = (),
+    **kwargs: Any,
+) -> List[Failure]:
+    """Checks the files with the default options, as on the command line.
+
+    Additional keyword arguments are passed to ``NameCheckVisitor._run_on_files``.
+
+    """
+    constructor_kwargs = {} if settings is None else {"settings": settings}
+    kwargs.update(
+        NameCheckVisitor.prepare_constructor_kwargs(
+            constructor_kwargs, extra_options=extra_options
+        )
+    )
+    return NameCheckVisitor._run_on_files([str(file) for file in files], **kwargs)
+
+
 # ===================================================
 # Tests for specific functionality.
 # ===================================================
@@ -2281,3 +2332,121 @@ class TestMustUse(TestNameCheckVisitorBase):
 
         def capybara() -> None:
             gen()  # E: must_use
+
+
+def test_check_sources() -> None:
+    sources = [
+        ("good", "def f(x: int) -> int:\n    return x\n"),
+        ("bad", "def f(x: int) -> str:\n    return x\n"),
+        ("syntax_error", "def f(\n"),
+    ]
+    results = dict(ConfiguredNameCheckVisitor.check_sources(sources))
+    assert results["good"] == []
+    assert [failure["code"] for failure in results["bad"]] == [
+        ErrorCode.incompatible_return_value
+    ]
+    assert results["bad"][0]["filename"] == "bad"
+    [failure] = results["syntax_error"]
+    assert "Failed to parse code" in failure["description"]
+
+    parallel_results = dict(
+        ConfiguredNameCheckVisitor.check_sources(
+            sources[:2], parallel=True, max_workers=2
+        )
+    )
+    assert parallel_results["good"] == []
+    assert [failure["code"] for failure in parallel_results["bad"]] == [
+        ErrorCode.incompatible_return_value
+    ]
+
+
+def test_low_memory_attribute_checker() -> None:
+    code = textwrap.dedent(
+        """\
+        # A comment
+        class Capybara:
+            def eat(self):
+                pass
+
+            def method(self):
+                self.eat()
+                return self.doesnt_exist
+        """
+    )
+    mod = _make_module(code)
+    kwargs = ConfiguredNameCheckVisitor.prepare_constructor_kwargs({})
+
+    def run(low_memory: bool) -> List[Failure]:
+        with ClassAttributeChecker(
+            options=kwargs["checker"].options, low_memory=low_memory
+        ) as attribute_checker:
+            visitor = ConfiguredNameCheckVisitor(
+                mod.__name__,
+                code,
+                ast.parse(code),
+                module=mod,
+                attribute_checker=attribute_checker,
+                **kwargs,
+            )
+            assert visitor.check() == []
+            if low_memory:
+                stub = attribute_checker.filename_to_visitor[mod.__name__]
+                assert stub is not visitor
+                assert stub._lines()[0] == "# A comment\n"
+        return attribute_checker.all_failures
+
+    [failure] = run(low_memory=True)
+    assert failure["code"] == ErrorCode.attribute_is_never_set
+    assert failure["lineno"] == 8
+    assert failure["message"] == run(low_memory=False)[0]["message"]
+
+
+def _fake_clock(step: float) -> Callable[[], float]:
+    now = time.monotonic()
+
+    def clock() -> float:
+        nonlocal now
+        now += step
+        return now
+
+    return clock
+
+
+def test_analysis_timeout() -> None:
+    code = textwrap.dedent(
+        """
+        def f() -> int:
+            return "not an int"
+
+        def g(x: int) -> str:
+            return x
+        """
+    )
+
+    def run(*options: object) -> List[Failure]:
+        kwargs = ConfiguredNameCheckVisitor.prepare_constructor_kwargs(
+            {}, extra_options=options
+        )
+        visitor = ConfiguredNameCheckVisitor(
+            "<test>", code, ast.parse(code), module=_make_module(code), **kwargs
+        )
+        # Every time the visitor looks at the clock, a second passes.
+        with mock.patch("time.monotonic", _fake_clock(1)):
+            return visitor.check()
+
+    assert [failure["code"] for failure in run()] == [
+        ErrorCode.incompatible_return_value,
+        ErrorCode.incompatible_return_value,
+    ]
+
+    failures = run(FunctionTimeout(1))
+    assert [failure["code"] for failure in failures] == [
+        ErrorCode.analysis_timeout,
+        ErrorCode.analysis_timeout,
+    ]
+    assert "function f took more than 1 s" in failures[0]["description"]
+    assert "function g took more than 1 s" in failures[1]["description"]
+
+    [failure] = run(FileTimeout(1))
+    assert failure["code"] == ErrorCode.analysis_timeout
+    assert "Checking <test> took more than 1 s" in failure["description"]
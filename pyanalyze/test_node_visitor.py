@@ -14,11 +14,14 @@ from ast_decompiler import decompile
 
 from .node_visitor import (
     BaseNodeVisitor,
+    LineEdit,
     NodeTransformer,
     Replacement,
     ReplaceNodeTransformer,
     ReplacingNodeVisitor,
     VisitorError,
+    _apply_line_edits,
+    _select_line_edits,
 )
 
 
@@ -387,6 +390,34 @@ class TestHouseDivided(BaseNodeVisitorTester):
     def test_repeat(self):
         self.assert_is_changed("50 / 2\n", "50 ** 2\n", repeat=True)
 
+    def test_multiple_lines(self):
+        self.assert_is_changed("50 / 2\nx = 3 / 4\n", "50 * 2\nx = 3 * 4\n")
+
+    def test_parallel_autofix(self, tmp_path):
+        paths = [tmp_path / f"divided{i}.py" for i in range(3)]
+        for path in paths:
+            path.write_text("50 / 2\nx = 3 / 4\n")
+        HouseDivided._run_and_apply_changes(
+            {"files": [str(tmp_path)], "parallel": True}, autofix=True
+        )
+        for path in paths:
+            assert path.read_text() == "50 * 2\nx = 3 * 4\n"
+
+
+def test_select_line_edits():
+    lines = ["a\n", "b\n", "c\n", "d\n"]
+    changes = [
+        Replacement([1, 3], ["x\n"]),
+        Replacement([2], ["y\n"]),
+        Replacement([4], ["z\n"]),
+        Replacement([4], ["z\n"]),
+        Replacement([4], None),
+    ]
+    selected, skipped = _select_line_edits(changes, lines)
+    assert selected == [LineEdit(1, 3, ("b\n", "x\n")), LineEdit(4, 4, ("z\n",))]
+    assert skipped == [LineEdit(2, 2, ("y\n",))]
+    assert _apply_line_edits(selected, lines) == ["b\n", "x\n", "z\n"]
+
 
 def assert_code_equal(expected, actual):
     """Asserts that two pieces of code are equal, and prints a nice diff if they are not."""
@@ -187,6 +187,16 @@ class TestAugAssign(TestNameCheckVisitorBase):
             x += 2
             assert_is_value(x, KnownValue(3))
 
+    @assert_passes()
+    def test_attribute(self):
+        class Capybara:
+            def __init__(self) -> None:
+                self.weight = 1
+
+            def eat(self, amount: int) -> None:
+                self.weight += amount
+                assert_is_value(self.weight, TypedValue(int))
+
 
 class TestCompare(TestNameCheckVisitorBase):
     @assert_passes()
@@ -0,0 +1,33 @@
+# static analysis: ignore
+from .error_code import ErrorCode
+from .name_check_visitor import UnionSimplificationLimit
+from .options import ConfigOption, Options
+
+
+def test_for_module() -> None:
+    options = Options.from_option_list(
+        [
+            UnionSimplificationLimit(10),
+            UnionSimplificationLimit(20, applicable_to=("capybara",)),
+            ConfigOption.registry["bad_global"](
+                False, applicable_to=("capybara", "kerodon")
+            ),
+        ]
+    )
+    capybara = options.for_module(("capybara",))
+    kerodon = options.for_module(("capybara", "kerodon"))
+    assert options.for_module(("capybara",)) is capybara
+    assert kerodon.for_module(("capybara",)) is capybara
+
+    assert options.get_value_for(UnionSimplificationLimit) == 10
+    assert capybara.get_value_for(UnionSimplificationLimit) == 20
+    assert kerodon.get_value_for(UnionSimplificationLimit) == 20
+    # Cached values are returned on later lookups.
+    assert kerodon.get_value_for(UnionSimplificationLimit) == 20
+
+    for _ in range(2):
+        assert capybara.is_error_code_enabled(ErrorCode.bad_global)
+        assert not kerodon.is_error_code_enabled(ErrorCode.bad_global)
+        assert kerodon.is_error_code_enabled_anywhere(ErrorCode.bad_global)
+        assert not kerodon.is_error_code_enabled(ErrorCode.implicit_reexport)
+        assert not kerodon.is_error_code_enabled_anywhere(ErrorCode.implicit_reexport)
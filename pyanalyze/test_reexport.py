@@ -0,0 +1,61 @@
+# static analysis: ignore
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from .error_code import ErrorCode
+from .name_check_visitor import NameCheckVisitor
+from .node_visitor import Failure
+from .reexport import ReexportCacheDir
+from .test_name_check_visitor import write_modules
+
+EXPORTER = """
+from os import path
+
+exported = 1
+"""
+
+USER = """
+import reexport_exporter
+
+print(reexport_exporter.exported)
+print(reexport_exporter.path)
+"""
+
+
+def _check(files: List[Path], cache_dir: Path) -> List[Failure]:
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs(
+        {"settings": {ErrorCode.implicit_reexport: True}},
+        extra_options=[ReexportCacheDir(cache_dir)],
+    )
+    failures = []
+    for file in files:
+        failures += NameCheckVisitor.check_file(str(file), **kwargs)
+    return failures
+
+
+def _codes(failures: List[Failure]) -> List[str]:
+    return [failure["code"].name for failure in failures]
+
+
+def test_export_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    exporter, user = write_modules(
+        tmp_path, monkeypatch, {"reexport_exporter": EXPORTER, "reexport_user": USER}
+    )
+    cache_dir = tmp_path / "cache"
+
+    # Without the exporting module, we cannot tell what it exports.
+    assert _check([user], cache_dir) == []
+
+    # Checking the exporting module records its exports...
+    assert _codes(_check([exporter, user], cache_dir)) == ["implicit_reexport"]
+
+    # ... so later runs can use them without checking it again.
+    failures = _check([user], cache_dir)
+    assert _codes(failures) == ["implicit_reexport"]
+    assert "'path' is not exported" in failures[0]["description"]
+
+    # A changed module is not looked up in the cache.
+    exporter.write_text(EXPORTER + "\npath = path\n")
+    assert _check([user], cache_dir) == []
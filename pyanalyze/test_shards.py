@@ -0,0 +1,129 @@
+# static analysis: ignore
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from .error_code import ErrorCode
+from .name_check_visitor import NameCheckVisitor
+from .node_visitor import UNUSED_OBJECT_FILENAME, Failure
+from .shards import Shard, ShardResult, main, merge_results, partition_files
+from .test_name_check_visitor import run_on_files, write_modules
+
+DEFINER = """
+class Capybara:
+    def eat(self):
+        return self.food + self.drink
+"""
+
+# Larger than DEFINER, so that the two files end up in different shards.
+SETTER = """
+from shard_definer import Capybara
+
+
+def feed(capybara: Capybara) -> None:
+    # Without this module, the attribute checker cannot see that food is set.
+    capybara.food = "grass"
+"""
+
+
+def test_parse() -> None:
+    assert Shard.parse("2/4") == Shard(2, 4)
+    assert str(Shard(2, 4)) == "2/4"
+    for text in ("0/4", "5/4", "2", "a/b", "1/0"):
+        with pytest.raises(ValueError):
+            Shard.parse(text)
+
+
+def test_partition_files(tmp_path: Path) -> None:
+    files = []
+    for i, size in enumerate([100, 10, 10, 50, 40, 0, 0]):
+        path = tmp_path / f"file{i}.py"
+        path.write_text("x" * size)
+        files.append(str(path))
+
+    parts = partition_files(files, 2)
+    assert parts == partition_files(reversed(files), 2)
+    assert sorted(file for part in parts for file in part) == sorted(files)
+    assert all(part == sorted(part) for part in parts)
+    sizes = [sum(Path(file).stat().st_size for file in part) for part in parts]
+    assert sorted(sizes) == [100, 110]
+
+    assert partition_files(files, 3)[2] != []
+    assert partition_files([], 2) == [[], []]
+
+
+def _locations(failures: List[Failure]) -> List[Tuple[str, str, int]]:
+    return [
+        (Path(failure["filename"]).name, failure["code"].name, failure["lineno"])
+        for failure in failures
+    ]
+
+
+@pytest.fixture
+def sources(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    paths = write_modules(
+        tmp_path, monkeypatch, {"shard_definer": DEFINER, "shard_setter": SETTER}
+    )
+    return [str(path) for path in paths]
+
+
+def test_shards(sources: List[str], tmp_path: Path) -> None:
+    settings = {ErrorCode.attribute_is_never_set: True}
+    unsharded = run_on_files(sources, settings=settings)
+    assert _locations(unsharded) == [("shard_definer.py", "attribute_is_never_set", 4)]
+
+    outputs = []
+    for index in (1, 2):
+        output = tmp_path / f"shard{index}.pickle"
+        failures = run_on_files(
+            sources, settings=settings, shard=Shard(index, 2), shard_output=str(output)
+        )
+        # The attribute checker runs only when merging.
+        assert failures == []
+        outputs.append(output)
+
+    results = [ShardResult.read(output) for output in outputs]
+    assert [result.files for result in results] == [[sources[1]], [sources[0]]]
+
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs({"settings": settings})
+    merged = merge_results(results, checker=kwargs["checker"])
+    assert _locations(merged) == _locations(unsharded)
+    assert merged[0]["message"] == unsharded[0]["message"]
+
+    with pytest.raises(ValueError, match=r"Missing results for shards \[2\]"):
+        merge_results(results[:1], checker=kwargs["checker"])
+
+
+def test_main(sources: List[str], tmp_path: Path) -> None:
+    output = tmp_path / "shard.pickle"
+    run_on_files(sources, shard_output=str(output))
+    assert ShardResult.read(output).shard == Shard(1, 1)
+
+    # drink is never set
+    assert main([str(output)]) == 1
+    assert main([str(output), str(output)]) == 2
+    assert main([str(tmp_path / "missing.pickle")]) == 2
+
+
+def test_find_unused(sources: List[str], tmp_path: Path) -> None:
+    def descriptions(failures: List[Failure]) -> List[str]:
+        return sorted(
+            failure["description"]
+            for failure in failures
+            if failure["filename"] == UNUSED_OBJECT_FILENAME
+        )
+
+    unsharded = run_on_files(sources, find_unused=True)
+    assert descriptions(unsharded) != []
+
+    results = []
+    for index in (1, 2):
+        output = tmp_path / f"shard{index}.pickle"
+        run_on_files(
+            sources, find_unused=True, shard=Shard(index, 2), shard_output=str(output)
+        )
+        results.append(ShardResult.read(output))
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs({})
+    merged = merge_results(results, checker=kwargs["checker"])
+    assert descriptions(merged) == descriptions(unsharded)
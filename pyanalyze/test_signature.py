@@ -1,5 +1,7 @@
 # static analysis: ignore
+import pickle
 from collections.abc import Sequence
+from typing import TypeVar
 
 from .implementation import assert_is_value
 from .signature import ELLIPSIS_PARAM, ConcreteSignature, OverloadedSignature, Signature
@@ -20,6 +22,7 @@ from .value import (
     TypedDictEntry,
     TypedDictValue,
     TypedValue,
+    TypeVarValue,
 )
 
 TupleInt = GenericValue(tuple, [TypedValue(int)])
@@ -47,6 +50,25 @@ def test_stringify() -> None:
     assert str(overload) == "overloaded (() -> str, (x: int) -> int)"
 
 
+def test_compact() -> None:
+    sig1 = Signature.make([P("self"), P("args", K.VAR_POSITIONAL)], TypedValue(int))
+    sig2 = Signature.make([P("self"), P("x", annotation=TypedValue(int))])
+    # Common parameters are shared between signatures
+    assert sig1.parameters["self"] is sig2.parameters["self"]
+    assert sig1.typevars_of_params is sig2.typevars_of_params
+    assert sig1.all_typevars is sig2.all_typevars
+    assert not sig1.all_typevars
+    assert pickle.loads(pickle.dumps(sig1)) == sig1
+    assert pickle.loads(pickle.dumps(OverloadedSignature([sig1, sig2]))) == (
+        OverloadedSignature([sig1, sig2])
+    )
+
+    T = TypeVar("T")
+    generic = Signature.make([P("x", annotation=TypeVarValue(T))], TypeVarValue(T))
+    assert generic.all_typevars == {T}
+    assert dict(generic.typevars_of_params) == {"x": [T], "%return": [T]}
+
+
 class TestCanAssign:
     def can(self, left: ConcreteSignature, right: ConcreteSignature) -> None:
         tv_map = left.can_assign(right, CTX)
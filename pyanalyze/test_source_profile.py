@@ -0,0 +1,94 @@
+# static analysis: ignore
+import ast
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from .source_profile import MODULE_LEVEL, SourceProfiler
+from .test_name_check_visitor import run_on_files, write_modules
+
+CODE = """
+class Capybara:
+    def eat(self, food):
+        return [
+            food
+        ]
+
+
+x = 1
+"""
+
+
+def test_sample(monkeypatch: pytest.MonkeyPatch) -> None:
+    tree = ast.parse(CODE)
+    cls = tree.body[0]
+    method = cls.body[0]
+    ret = method.body[0]
+    name = ret.value.elts[0]
+    assign = tree.body[1]
+    now = 0.0
+
+    def clock() -> float:
+        return now
+
+    monkeypatch.setattr("time.perf_counter", clock)
+    profiler = SourceProfiler()
+    visitor = SimpleNamespace(
+        filename="capybara.py",
+        node_context=SimpleNamespace(contexts=[tree, cls, method, ret, name]),
+    )
+    with profiler.checking(visitor):
+        now = 1.0
+        profiler.sample()
+        visitor.node_context.contexts = [tree, assign]
+        now = 1.5
+        profiler.sample()
+        # Only the module is being visited; there is no line to attribute.
+        visitor.node_context.contexts = [tree]
+        now = 1.75
+        profiler.sample()
+        # A nested check (e.g., of another module) does not end the outer one.
+        other = SimpleNamespace(
+            filename="other.py", node_context=SimpleNamespace(contexts=[tree, assign])
+        )
+        with profiler.checking(other):
+            now = 2.0
+            profiler.sample()
+        visitor.node_context.contexts = [tree, assign]
+        now = 2.5
+        profiler.sample()
+    # Not checking anything
+    now = 3.0
+    profiler.sample()
+
+    assert profiler.num_samples == 4
+    assert profiler.top_functions() == [
+        (("capybara.py", MODULE_LEVEL, 0), 1.0),
+        (("capybara.py", "Capybara.eat", 3), 1.0),
+        (("other.py", MODULE_LEVEL, 0), 0.25),
+    ]
+    assert profiler.top_lines(1) == [(("capybara.py", 5), 1.0)]
+
+
+def test_line_profile(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    # Make checking slow enough that we are sure to get some samples.
+    body = "".join(f"    x{i} = [x{i - 1}]\n" for i in range(1, 2000))
+    [source] = write_modules(
+        tmp_path,
+        monkeypatch,
+        {"line_profile_example": f"def slow():\n    x0 = 0\n{body}"},
+    )
+    output = tmp_path / "profile.json"
+
+    run_on_files([source], line_profile=str(output))
+
+    report = json.loads(output.read_text())
+    assert report["num_samples"] > 0
+    assert report["functions"][0]["name"] == "slow"
+    assert report["functions"][0]["filename"] == str(source)
+    assert report["lines"]
+    assert "Functions that took the longest to check:" in capsys.readouterr().out
@@ -0,0 +1,171 @@
+# static analysis: ignore
+from pathlib import Path
+from typing import List, Sequence
+
+import pytest
+
+from .node_visitor import Failure
+from .options import ConfigOption
+from .signature import Signature
+from .summaries import (
+    ImportGraph,
+    ReturnSummaries,
+    ReturnSummaryCacheDir,
+    decode_value,
+    encode_value,
+)
+from .test_name_check_visitor import run_on_files, write_modules
+from .value import (
+    AnySource,
+    AnyValue,
+    GenericValue,
+    KnownValue,
+    MultiValuedValue,
+    SequenceValue,
+    SubclassValue,
+    TypedValue,
+)
+
+PROVIDER = """
+def get_capybara():
+    return "capybara"
+
+
+class Hydrochoerus:
+    def weight(self):
+        return 42
+"""
+
+USER = """
+import summary_provider
+
+
+def use_function() -> int:
+    return summary_provider.get_capybara()
+
+
+def use_method() -> str:
+    return summary_provider.Hydrochoerus().weight()
+"""
+
+
+@pytest.fixture
+def modules(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Sequence[Path]:
+    return write_modules(
+        tmp_path, monkeypatch, {"summary_provider": PROVIDER, "summary_user": USER}
+    )
+
+
+def _run(files: Sequence[Path], *options: ConfigOption) -> List[Failure]:
+    return run_on_files(files, extra_options=options)
+
+
+def _lines(failures: List[Failure]) -> List[int]:
+    return sorted(failure["lineno"] for failure in failures)
+
+
+def test_return_summaries(modules: Sequence[Path], tmp_path: Path) -> None:
+    provider, user = modules
+    assert _run([user, provider]) == []
+
+    # The provider is checked first even if it comes later.
+    failures = _run([user, provider], ReturnSummaries(True))
+    assert _lines(failures) == [6, 10]
+    assert all(
+        failure["code"].name == "incompatible_return_value" for failure in failures
+    )
+
+    # Summaries are used in later runs if the provider does not change.
+    cache_dir = ReturnSummaryCacheDir(tmp_path / "cache")
+    _run([provider], ReturnSummaries(True), cache_dir)
+    assert _lines(_run([user], ReturnSummaries(True), cache_dir)) == [6, 10]
+    provider.write_text(PROVIDER + "\n")
+    assert _run([user], ReturnSummaries(True), cache_dir) == []
+
+
+MIDDLE = """
+import summary_provider
+
+
+def get_name():
+    return summary_provider.get_capybara()
+"""
+
+CONSUMER = """
+import summary_middle
+
+
+def use_middle() -> int:
+    return summary_middle.get_name()
+"""
+
+
+def test_dependency_outside_run(
+    modules: Sequence[Path], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    provider, _ = modules
+    middle, consumer = write_modules(
+        tmp_path, monkeypatch, {"summary_middle": MIDDLE, "summary_consumer": CONSUMER}
+    )
+    cache_dir = ReturnSummaryCacheDir(tmp_path / "cache")
+    _run([provider], ReturnSummaries(True), cache_dir)
+    # The summary for the middle module is computed from the provider's summary,
+    # which is loaded from disk.
+    assert _run([middle], ReturnSummaries(True), cache_dir) == []
+    assert _lines(_run([consumer], ReturnSummaries(True), cache_dir)) == [6]
+
+    # When the provider changes, the stored summary for the middle module is
+    # outdated.
+    provider.write_text(PROVIDER + "\n")
+    assert _run([consumer], ReturnSummaries(True), cache_dir) == []
+
+
+def test_import_graph(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.syspath_prepend(str(tmp_path))
+    package = tmp_path / "graph_pkg"
+    package.mkdir()
+    files = {
+        "__init__.py": "",
+        "a.py": "from . import b\n",
+        "b.py": "from .c import x\n",
+        "c.py": "import graph_pkg.a\nx = 1\n",
+        "d.py": "from graph_pkg import c\n",
+    }
+    for name, contents in files.items():
+        (package / name).write_text(contents)
+    paths = [str(package / name) for name in sorted(files, reverse=True)]
+    graph = ImportGraph.make(paths)
+    assert graph.dependencies["graph_pkg.c"] == {"graph_pkg", "graph_pkg.a"}
+    assert graph.dependencies["graph_pkg.d"] == {"graph_pkg", "graph_pkg.c"}
+    ordered = [Path(path).name for path in graph.ordered_files()]
+    assert ordered == ["__init__.py", "c.py", "b.py", "a.py", "d.py"]
+    assert set(graph.get_fingerprint("graph_pkg.d")) == {
+        "graph_pkg",
+        "graph_pkg.a",
+        "graph_pkg.b",
+        "graph_pkg.c",
+        "graph_pkg.d",
+    }
+
+
+def test_encode_value() -> None:
+    class Local:
+        pass
+
+    for value in [
+        AnyValue(AnySource.unannotated),
+        KnownValue(None),
+        KnownValue("x"),
+        TypedValue(int),
+        TypedValue(Signature),
+        GenericValue(list, [TypedValue(str)]),
+        SubclassValue(TypedValue(int)),
+        MultiValuedValue([KnownValue(1), KnownValue(True)]),
+    ]:
+        data = encode_value(value)
+        assert data is not None, value
+        assert decode_value(data) == value
+
+    assert encode_value(KnownValue(b"x")) is None
+    assert encode_value(TypedValue(Local)) is None
+    assert encode_value(SequenceValue(list, [])) is None
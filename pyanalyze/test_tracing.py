@@ -0,0 +1,96 @@
+# static analysis: ignore
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from .name_check_visitor import NameCheckVisitor
+from .test_name_check_visitor import run_on_files, write_modules
+from .tracing import FUNCTION, PHASE, Tracer, span
+
+CODE = """
+def capybara():
+    return 1
+
+
+class Hydrochoerus:
+    def eat(self):
+        return capybara()
+"""
+
+
+def test_tracer(tmp_path: Path) -> None:
+    tracer = Tracer()
+    with tracer.span("outer", PHASE, file="x.py"):
+        with span(tracer, "inner", FUNCTION):
+            pass
+    with span(None, "ignored", FUNCTION):
+        pass
+    assert [event["name"] for event in tracer.events] == ["inner", "outer"]
+    inner, outer = tracer.events
+    assert inner["ph"] == outer["ph"] == "X"
+    assert inner["pid"] == os.getpid()
+    assert outer["args"] == {"file": "x.py"}
+    assert "args" not in inner
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    other = Tracer()
+    with other.span("other", PHASE):
+        pass
+    tracer.merge(other)
+    assert len(tracer) == 3
+
+    output = tmp_path / "trace.json"
+    tracer.write(str(output))
+    data = json.loads(output.read_text())
+    assert [event["name"] for event in data["traceEvents"]] == [
+        "outer",
+        "inner",
+        "other",
+    ]
+
+
+@pytest.fixture
+def source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    [path] = write_modules(tmp_path, monkeypatch, {"tracing_example": CODE})
+    return path
+
+
+def _names(events: List[Dict[str, Any]], category: str) -> List[str]:
+    return [event["name"] for event in events if event["cat"] == category]
+
+
+def test_trace(source: Path, tmp_path: Path) -> None:
+    output = tmp_path / "trace.json"
+    run_on_files([source], trace_output=str(output))
+    events = json.loads(output.read_text())["traceEvents"]
+
+    assert _names(events, "file") == [str(source)]
+    assert _names(events, PHASE) == ["parse", "import", "collect", "check", "report"]
+    # Methods are visited only in the checking phase.
+    assert _names(events, FUNCTION) == ["capybara", "capybara", "eat"]
+    [check] = [event for event in events if event["name"] == "check"]
+    functions = [event for event in events if event["cat"] == FUNCTION]
+    assert [event["args"]["phase"] for event in functions] == [
+        "collect_names",
+        "check_names",
+        "check_names",
+    ]
+    assert check["ts"] <= functions[2]["ts"] <= check["ts"] + check["dur"]
+    assert functions[2]["args"]["lineno"] == 7
+
+
+def test_merge_from_workers(source: Path) -> None:
+    kwargs = NameCheckVisitor.prepare_constructor_kwargs({})
+    extra_data = []
+    for _ in range(2):
+        _, extra = NameCheckVisitor.check_file_in_worker(
+            str(source), tracer=Tracer(), **kwargs
+        )
+        extra_data.append(extra)
+    tracer = Tracer()
+    NameCheckVisitor.merge_extra_data(extra_data, tracer=tracer)
+    assert _names(tracer.events, "file") == [str(source)] * 2
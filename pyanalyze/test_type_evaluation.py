@@ -458,6 +458,8 @@ class TestValidation(TestNameCheckVisitorBase):
 
             if (is_provided,)[0](a):  # E: bad_evaluator
                 return None
+            if a:  # E: bad_evaluator
+                return None
             return None
 
         def bad_evaluator(a: int) -> None:
@@ -588,3 +590,19 @@ class TestExamples(TestNameCheckVisitorBase):
             safe_contains("x", lst)  # E: incompatible_call
             safe_contains(True, lst)
             safe_contains(o, lst)
+
+
+def test_evaluator_node_cache() -> None:
+    from .arg_spec import _get_evaluator_node
+    from .extensions import evaluated
+
+    @evaluated
+    def evaluator(x: int):
+        if is_provided(x):
+            return int
+        return str
+
+    node = _get_evaluator_node(evaluator)
+    assert node is not None
+    assert node.name == "evaluator"
+    assert _get_evaluator_node(evaluator) is node
@@ -7,6 +7,7 @@ from .value import (
     AnnotatedValue,
     AnySource,
     AnyValue,
+    CallableValue,
     GenericValue,
     KnownValue,
     MultiValuedValue,
@@ -423,3 +424,30 @@ class TestGenericClasses(TestNameCheckVisitorBase):
                 C(s)  # E: incompatible_argument
         """
         )
+
+
+def test_solver_cache() -> None:
+    from typing import TypeVar
+
+    from .checker import Checker
+    from .signature import Signature
+    from .typevar import SolverCache, resolve_bounds_map
+    from .value import LowerBound
+
+    T = TypeVar("T")
+    checker = Checker()
+    cache = checker.typevar_solver_cache
+    assert isinstance(cache, SolverCache)
+    bounds_map = {T: [LowerBound(T, TypedValue(int)), LowerBound(T, TypedValue(bool))]}
+    expected = ({T: TypedValue(int)}, [])
+    assert resolve_bounds_map(bounds_map, checker) == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert resolve_bounds_map(bounds_map, checker) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Bounds on callables are not cached, because equal signatures may have
+    # different implementations.
+    callable_bound = LowerBound(T, CallableValue(Signature.make([], TypedValue(int))))
+    resolve_bounds_map({T: [callable_bound]}, checker)
+    assert cache.uncacheable == 1
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -706,3 +706,54 @@ def test_can_overlap() -> None:
         TypedValue(str).can_overlap(KnownValue(None), CTX, OverlapMode.EQ),
         CanAssignError,
     )
+
+
+def test_structural_flags() -> None:
+    T = typing.TypeVar("T")
+    tv = value.TypeVarValue(T)
+    closed = GenericValue(
+        dict, [TypedValue(str), GenericValue(list, [TypedValue(int)])]
+    )
+    assert not closed.contains_typevars()
+    assert closed.substitute_typevars({T: TypedValue(int)}) is closed
+
+    generic = GenericValue(dict, [TypedValue(str), GenericValue(list, [tv])])
+    assert generic.contains_typevars()
+    assert generic.substitute_typevars({T: TypedValue(int)}) == closed
+
+    # substitute_typevars() on a KnownValue for a function records the typevars
+    assert SequenceValue(tuple, [(False, KnownValue(len))]).contains_typevars()
+    assert not SequenceValue(tuple, [(False, KnownValue(1))]).contains_typevars()
+
+    sig = Signature.make([], closed)
+    assert not CallableValue(sig).contains_typevars()
+    assert sig.substitute_typevars({T: TypedValue(int)}) is sig
+
+    assert not closed.contains_implicit_any()
+    assert not GenericValue(
+        list, [AnyValue(AnySource.explicit)]
+    ).contains_implicit_any()
+    unreachable = AnnotatedValue(
+        TypedValue(int), [GenericValue(list, [AnyValue(AnySource.unreachable)])]
+    )
+    assert unreachable.contains_implicit_any()
+    assert unreachable.contains_unreachable()
+    assert not closed.contains_unreachable()
+
+
+def test_large_union() -> None:
+    classes = [type(f"C{i}", (), {}) for i in range(20)]
+    subclass = type("Sub", (classes[5],), {})
+    members = [TypedValue(cls) for cls in classes] + [KnownValue(i) for i in range(20)]
+    union = MultiValuedValue(members)
+    reversed_union = MultiValuedValue(list(reversed(members)))
+    assert_can_assign(union, reversed_union)
+    assert_can_assign(union, TypedValue(subclass))
+    assert_can_assign(union, KnownValue(classes[3]()))
+    assert_can_assign(union, KnownValue(19))
+    assert_cannot_assign(union, KnownValue(True))
+    assert_cannot_assign(union, TypedValue(int))
+    assert_cannot_assign(union, KnownValue(20))
+
+    assert union == reversed_union
+    assert hash(union) == hash(reversed_union)
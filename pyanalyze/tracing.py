@@ -0,0 +1,87 @@
+"""
+
+Recording a timeline of the analysis.
+
+Pass ``--trace trace.json`` to record when each file is parsed, imported, visited
+in the collecting and checking phases, and reported on, and how long the body of
+each function takes to visit. In parallel runs, the events from all worker
+processes are combined, with the process id of each worker.
+
+The output uses the Chrome trace event format, which can be opened in
+https://ui.perfetto.dev or ``chrome://tracing``.
+
+When tracing is disabled, the visitor only checks whether it has a tracer at each
+of these points.
+
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Generator, List, Optional, Union
+
+# Categories of events
+FILE = "file"
+PHASE = "phase"
+FUNCTION = "function"
+
+
+@dataclass
+class Tracer:
+    """Collects trace events.
+
+    Each event records the start and duration of a span of work. Timestamps come
+    from :func:`time.perf_counter_ns`, which uses a clock shared between processes on
+    common platforms, so events from worker processes line up.
+
+    """
+
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, category: str, **args: Union[str, int]
+    ) -> Generator[None, None, None]:
+        """Records an event covering the body of the with block."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+            }
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+    def merge(self, other: "Tracer") -> None:
+        """Adds the events of another tracer, such as one from a worker process."""
+        self.events += other.events
+
+    def write(self, path: str) -> None:
+        """Writes the events as a Chrome trace event JSON file."""
+        events = sorted(self.events, key=lambda event: (event["pid"], event["ts"]))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+def span(
+    tracer: Optional[Tracer], name: str, category: str, **args: Union[str, int]
+) -> ContextManager[None]:
+    """Records an event if tracer is not None, and does nothing otherwise."""
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, category, **args)
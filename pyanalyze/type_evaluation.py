@@ -282,6 +282,15 @@ class EvalContext:
 class Evaluator:
     node: Union[ast.FunctionDef, ast.AsyncFunctionDef]
     return_annotation: Value
+    _compiled: Optional["CompiledStatement"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def get_compiled(self) -> "CompiledStatement":
+        """Returns the body of the evaluation function, compiled for evaluation."""
+        if self._compiled is None:
+            self._compiled = compile_statement(self.node)
+        return self._compiled
 
     def evaluate(self, ctx: EvalContext) -> Tuple[Value, Sequence[UserRaisedError]]:
         visitor = EvaluateVisitor(self, ctx)
@@ -344,7 +353,7 @@ class ConditionReturn:
 
 
 @dataclass
-class ConditionEvaluator(ast.NodeVisitor):
+class ConditionEvaluator:
     evaluator: Evaluator
     ctx: EvalContext
     validation_mode: bool = False
@@ -354,72 +363,6 @@ class ConditionEvaluator(ast.NodeVisitor):
         self.errors.append(InvalidEvaluation(message, node))
         return ConditionReturn(NullCondition())
 
-    def visit_Call(self, node: ast.Call) -> ConditionReturn:
-        if not isinstance(node.func, ast.Name):
-            return self.return_invalid("Unexpected call", node.func)
-        name = node.func.id
-        if name in ("is_provided", "is_positional", "is_keyword"):
-            if node.keywords or len(node.args) != 1:
-                return self.return_invalid(f"{name}() takes a single argument", node)
-            if not isinstance(node.args[0], ast.Name):
-                return self.return_invalid(
-                    f"Argument to {name}() must be a variable", node.args[0]
-                )
-            variable = node.args[0].id
-            try:
-                position = self.ctx.positions[variable]
-            except KeyError:
-                return self.return_invalid(
-                    f"{variable} is not a valid variable", node.args[0]
-                )
-            if name == "is_provided":
-                match = position is not DEFAULT and position is not UNKNOWN
-            elif name == "is_positional":
-                match = position is ARGS or isinstance(position, int)
-            elif name == "is_keyword":
-                match = position is KWARGS or isinstance(position, str)
-            else:
-                return self.return_invalid(name, node.func)
-            condition = ArgumentKindCondition(variable, name)
-            if match:
-                return ConditionReturn(left_varmap={}, condition=condition)
-            else:
-                return ConditionReturn(
-                    right_varmap={}, condition=NotCondition(condition)
-                )
-        elif name == "is_of_type":
-            if len(node.args) != 2:
-                return self.return_invalid(
-                    "is_of_type() takes two positional arguments", node
-                )
-            varname_node = node.args[0]
-            typ = self.evaluator.evaluate_generic_type(node.args[1], self.ctx)
-            exclude_any = True
-            for keyword in node.keywords:
-                if keyword.arg == "exclude_any":
-                    if isinstance(
-                        keyword.value, ast.Constant
-                    ) and keyword.value.value in (True, False):
-                        exclude_any = keyword.value.value
-                    else:
-                        return self.return_invalid(
-                            "exclude_any argument must be a literal bool", keyword.value
-                        )
-                else:
-                    # Before 3.9 keyword nodes don't have a lineno
-                    if sys.version_info >= (3, 9):
-                        error_node = keyword
-                    else:
-                        error_node = node
-                    return self.return_invalid(
-                        "Invalid keyword argument to is_of_type()", error_node
-                    )
-            return self.visit_is_of_type(
-                varname_node, typ, "is of type", exclude_any=exclude_any
-            )
-        else:
-            return self.return_invalid(f"Invalid function {name}", node.func)
-
     def visit_is_of_type(
         self,
         varname_node: ast.AST,
@@ -472,77 +415,172 @@ class ConditionEvaluator(ast.NodeVisitor):
                 condition=condition,
             )
 
-    def visit_UnaryOp(self, node: ast.UnaryOp) -> ConditionReturn:
-        if isinstance(node.op, ast.Not):
-            ret = self.visit(node.operand)
-            return ret.reverse()
+    def evaluate_literal(self, node: ast.expr) -> Optional[KnownValue]:
+        val = self.evaluator.evaluate_value(node)
+        if isinstance(val, SequenceValue):
+            val = val.make_known_value()
+        if isinstance(val, KnownValue):
+            return val
+        self.errors.append(InvalidEvaluation("Only literals supported", node))
+        return None
+
+    def get_name(self, node: ast.Name) -> Optional[Value]:
+        try:
+            return self.ctx.variables[node.id]
+        except KeyError:
+            self.errors.append(InvalidEvaluation(f"Invalid variable {node.id}", node))
+            return None
+
+
+class CompiledCondition:
+    """The test of an if statement in a type evaluation function.
+
+    Checks that depend only on the code are done when the test is compiled; the
+    rest happens in :meth:`evaluate`, which is called for each call to the
+    evaluated function.
+
+    """
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        raise NotImplementedError
+
+
+@dataclass
+class _InvalidCondition(CompiledCondition):
+    message: str
+    node: ast.AST
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        return evaluator.return_invalid(self.message, self.node)
+
+
+@dataclass
+class _ArgumentKindTest(CompiledCondition):
+    function: Literal["is_provided", "is_positional", "is_keyword"]
+    variable_node: ast.Name
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        variable = self.variable_node.id
+        try:
+            position = evaluator.ctx.positions[variable]
+        except KeyError:
+            return evaluator.return_invalid(
+                f"{variable} is not a valid variable", self.variable_node
+            )
+        if self.function == "is_provided":
+            match = position is not DEFAULT and position is not UNKNOWN
+        elif self.function == "is_positional":
+            match = position is ARGS or isinstance(position, int)
+        else:
+            match = position is KWARGS or isinstance(position, str)
+        condition = ArgumentKindCondition(variable, self.function)
+        if match:
+            return ConditionReturn(left_varmap={}, condition=condition)
         else:
-            return self.return_invalid("Unsupported unary operation", node)
+            return ConditionReturn(right_varmap={}, condition=NotCondition(condition))
 
-    def visit_Compare(self, node: ast.Compare) -> ConditionReturn:
-        if len(node.ops) != 1:
-            return self.return_invalid("Chained comparison is unsupported", node)
-        op = node.ops[0]
-        right = node.comparators[0]
-        right_operand = self.evaluate_literal(right)
+
+@dataclass
+class _IsOfTypeTest(CompiledCondition):
+    varname_node: ast.expr
+    type_node: ast.expr
+    exclude_any: bool = True
+    # Invalid keyword argument, reported after the type has been evaluated
+    invalid: Optional[_InvalidCondition] = None
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        typ = evaluator.evaluator.evaluate_generic_type(self.type_node, evaluator.ctx)
+        if self.invalid is not None:
+            return self.invalid.evaluate(evaluator)
+        return evaluator.visit_is_of_type(
+            self.varname_node, typ, "is of type", exclude_any=self.exclude_any
+        )
+
+
+@dataclass
+class _NotTest(CompiledCondition):
+    operand: CompiledCondition
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        return self.operand.evaluate(evaluator).reverse()
+
+
+@dataclass
+class _CompareTest(CompiledCondition):
+    node: ast.Compare
+    left: ast.expr
+    op: Type[ast.cmpop]
+    right: ast.expr
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        right_operand = evaluator.evaluate_literal(self.right)
         if right_operand is None:
             return ConditionReturn(NullCondition())
-        if isinstance(node.left, ast.Name) and isinstance(
-            op, (ast.Is, ast.IsNot, ast.Eq, ast.NotEq)
+        if isinstance(self.left, ast.Name) and self.op in (
+            ast.Is,
+            ast.IsNot,
+            ast.Eq,
+            ast.NotEq,
         ):
-            ret = self.visit_is_of_type(node.left, right_operand, type(op))
-            if isinstance(op, (ast.NotEq, ast.IsNot)):
+            ret = evaluator.visit_is_of_type(self.left, right_operand, self.op)
+            if self.op in (ast.NotEq, ast.IsNot):
                 return ret.reverse()
             return ret
 
-        if isinstance(node.left, ast.Attribute):
-            mod = self.evaluate_literal(node.left.value)
+        if isinstance(self.left, ast.Attribute):
+            mod = evaluator.evaluate_literal(self.left.value)
             if mod == KnownValue(sys):
-                if node.left.attr == "platform":
+                if self.left.attr == "platform":
                     left_operand = sys.platform
-                elif node.left.attr == "version_info":
+                elif self.left.attr == "version_info":
                     left_operand = sys.version_info
                 else:
-                    return self.return_invalid(
+                    return evaluator.return_invalid(
                         "Only comparisons on sys.platform and sys.version_info are"
                         " supported",
-                        node.left,
+                        self.left,
                     )
-                data = _OP_TO_DATA[type(op)]
+                data = _OP_TO_DATA[self.op]
                 try:
                     result = data.impl(left_operand, right_operand.val)
                 except Exception:
-                    return self.return_invalid(
-                        f"Invalid sys.{node.left.attr} comparison", node
+                    return evaluator.return_invalid(
+                        f"Invalid sys.{self.left.attr} comparison", self.node
                     )
-                if node.left.attr == "platform":
+                if self.left.attr == "platform":
                     condition = PlatformCondition(
-                        sys.platform, type(op), right_operand.val
+                        sys.platform, self.op, right_operand.val
                     )
                 else:
                     condition = VersionCondition(
-                        sys.version_info[:2], type(op), right_operand.val
+                        sys.version_info[:2], self.op, right_operand.val
                     )
                 if result:
                     return ConditionReturn(condition, left_varmap={})
                 else:
                     return ConditionReturn(condition, right_varmap={})
 
-        return self.return_invalid("Unsupported comparison operator", node)
+        return evaluator.return_invalid("Unsupported comparison operator", self.node)
+
 
-    def visit_BoolOp(self, node: ast.BoolOp) -> ConditionReturn:
-        if self.validation_mode:
-            for operand in node.values:
-                self.visit(operand)
+@dataclass
+class _BoolOpTest(CompiledCondition):
+    is_and: bool
+    operands: Sequence[CompiledCondition]
+
+    def evaluate(self, evaluator: ConditionEvaluator) -> ConditionReturn:
+        if evaluator.validation_mode:
+            for operand in self.operands:
+                operand.evaluate(evaluator)
             return ConditionReturn(NullCondition())
         active = []
-        is_and = isinstance(node.op, ast.And)
+        is_and = self.is_and
         remaining_varmaps = []
         narrowed_varmap = {}
         stack = contextlib.ExitStack()
         with stack:
-            for operand in node.values:
-                result = self.visit(operand)
+            for operand in self.operands:
+                result = operand.evaluate(evaluator)
                 active.append(result.condition)
                 if is_and:
                     if result.left_varmap is None:
@@ -555,13 +593,13 @@ class ConditionEvaluator(ast.NodeVisitor):
                         # Condition returns True
                         narrowed_varmap.update(result.left_varmap)
                         stack.enter_context(
-                            self.ctx.narrow_variables(result.left_varmap)
+                            evaluator.ctx.narrow_variables(result.left_varmap)
                         )
                     else:
                         # Condition matches partially
                         narrowed_varmap.update(result.left_varmap)
                         stack.enter_context(
-                            self.ctx.narrow_variables(result.left_varmap)
+                            evaluator.ctx.narrow_variables(result.left_varmap)
                         )
                         remaining_varmaps.append(result.right_varmap)
                 else:
@@ -569,7 +607,7 @@ class ConditionEvaluator(ast.NodeVisitor):
                         # Condition returns False
                         narrowed_varmap.update(result.right_varmap)
                         stack.enter_context(
-                            self.ctx.narrow_variables(result.right_varmap)
+                            evaluator.ctx.narrow_variables(result.right_varmap)
                         )
                     elif result.right_varmap is None:
                         # Condition returns True
@@ -581,7 +619,7 @@ class ConditionEvaluator(ast.NodeVisitor):
                         # Condition partially matches
                         narrowed_varmap.update(result.right_varmap)
                         stack.enter_context(
-                            self.ctx.narrow_variables(result.right_varmap)
+                            evaluator.ctx.narrow_variables(result.right_varmap)
                         )
                         remaining_varmaps.append(result.left_varmap)
 
@@ -599,25 +637,76 @@ class ConditionEvaluator(ast.NodeVisitor):
                 right_varmap=narrowed_varmap,
             )
 
-    def evaluate_literal(self, node: ast.expr) -> Optional[KnownValue]:
-        val = self.evaluator.evaluate_value(node)
-        if isinstance(val, SequenceValue):
-            val = val.make_known_value()
-        if isinstance(val, KnownValue):
-            return val
-        self.errors.append(InvalidEvaluation("Only literals supported", node))
-        return None
 
-    def get_name(self, node: ast.Name) -> Optional[Value]:
-        try:
-            return self.ctx.variables[node.id]
-        except KeyError:
-            self.errors.append(InvalidEvaluation(f"Invalid variable {node.id}", node))
-            return None
+def compile_condition(node: ast.expr) -> CompiledCondition:
+    """Compiles the test of an if statement in a type evaluation function."""
+    if isinstance(node, ast.Call):
+        return _compile_call_condition(node)
+    elif isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            return _NotTest(compile_condition(node.operand))
+        return _InvalidCondition("Unsupported unary operation", node)
+    elif isinstance(node, ast.Compare):
+        if len(node.ops) != 1:
+            return _InvalidCondition("Chained comparison is unsupported", node)
+        return _CompareTest(node, node.left, type(node.ops[0]), node.comparators[0])
+    elif isinstance(node, ast.BoolOp):
+        return _BoolOpTest(
+            isinstance(node.op, ast.And),
+            [compile_condition(operand) for operand in node.values],
+        )
+    else:
+        return _InvalidCondition("Unsupported condition", node)
+
+
+def _compile_call_condition(node: ast.Call) -> CompiledCondition:
+    if not isinstance(node.func, ast.Name):
+        return _InvalidCondition("Unexpected call", node.func)
+    name = node.func.id
+    if name in ("is_provided", "is_positional", "is_keyword"):
+        if node.keywords or len(node.args) != 1:
+            return _InvalidCondition(f"{name}() takes a single argument", node)
+        if not isinstance(node.args[0], ast.Name):
+            return _InvalidCondition(
+                f"Argument to {name}() must be a variable", node.args[0]
+            )
+        return _ArgumentKindTest(name, node.args[0])
+    elif name == "is_of_type":
+        if len(node.args) != 2:
+            return _InvalidCondition(
+                "is_of_type() takes two positional arguments", node
+            )
+        exclude_any = True
+        invalid = None
+        for keyword in node.keywords:
+            if keyword.arg == "exclude_any":
+                if isinstance(keyword.value, ast.Constant) and keyword.value.value in (
+                    True,
+                    False,
+                ):
+                    exclude_any = keyword.value.value
+                else:
+                    invalid = _InvalidCondition(
+                        "exclude_any argument must be a literal bool", keyword.value
+                    )
+                    break
+            else:
+                # Before 3.9 keyword nodes don't have a lineno
+                if sys.version_info >= (3, 9):
+                    error_node = keyword
+                else:
+                    error_node = node
+                invalid = _InvalidCondition(
+                    "Invalid keyword argument to is_of_type()", error_node
+                )
+                break
+        return _IsOfTypeTest(node.args[0], node.args[1], exclude_any, invalid)
+    else:
+        return _InvalidCondition(f"Invalid function {name}", node.func)
 
 
 @dataclass
-class EvaluateVisitor(ast.NodeVisitor):
+class EvaluateVisitor:
     evaluator: Evaluator
     ctx: EvalContext
     errors: List[EvaluateError] = field(default_factory=list)
@@ -625,7 +714,7 @@ class EvaluateVisitor(ast.NodeVisitor):
     validation_mode: bool = False
 
     def run(self) -> Value:
-        ret = self.visit(self.evaluator.node)
+        ret = self.evaluator.get_compiled().execute(self)
         return self._evaluate_ret(ret, self.evaluator.node)
 
     def _evaluate_ret(self, ret: EvalReturn, node: ast.AST) -> Value:
@@ -650,16 +739,28 @@ class EvaluateVisitor(ast.NodeVisitor):
             popped = self.active_conditions.pop()
             assert popped == condition
 
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> EvalReturn:
-        return self.visit_block(node.body)
 
-    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> EvalReturn:
-        return self.visit_block(node.body)
+class CompiledStatement:
+    """A statement in a type evaluation function, prepared for evaluation.
+
+    The body of an evaluation function is compiled once into a tree of these
+    objects, so that each call to the evaluated function only needs to do the
+    work that depends on the arguments.
+
+    """
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
+        raise NotImplementedError
+
+
+@dataclass
+class _Block(CompiledStatement):
+    statements: Sequence[CompiledStatement]
 
-    def visit_block(self, statements: Sequence[ast.stmt]) -> EvalReturn:
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
         possible_returns = []
-        for stmt in statements:
-            result = self.visit(stmt)
+        for stmt in self.statements:
+            result = stmt.execute(visitor)
             if result is None:
                 continue
             if isinstance(result, Value):
@@ -673,100 +774,101 @@ class EvaluateVisitor(ast.NodeVisitor):
                     ]
         return CombinedReturn.make(*possible_returns, None)
 
-    def visit_Pass(self, node: ast.Pass) -> EvalReturn:
+
+@dataclass
+class _InvalidStatement(CompiledStatement):
+    message: str
+    node: ast.AST
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
+        visitor.add_invalid(self.message, self.node)
         return None
 
-    def visit_Return(self, node: ast.Return) -> EvalReturn:
-        if node.value is None:
-            self.add_invalid("return statement must have a value", node)
-            return KnownValue(None)
-        return self.evaluator.evaluate_generic_type(node.value, self.ctx)
 
-    def visit_Expr(self, node: ast.Expr) -> EvalReturn:
-        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name):
-            name = node.value.func.id
-            if name == "show_error":
-                return self.visit_show_error(node.value)
-            elif name == "reveal_type":
-                return self.visit_reveal_type(node.value)
-        self.add_invalid("Invalid statement", node)
+class _PassStatement(CompiledStatement):
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
         return None
 
-    def visit_reveal_type(self, call: ast.Call) -> EvalReturn:
-        if len(call.args) != 1 or call.keywords:
-            self.add_invalid(
-                "reveal_type() takes exactly one positional argument", call
-            )
-            return None
-        arg = call.args[0]
-        if not isinstance(arg, ast.Name):
-            self.add_invalid("reveal_type() argument must be a variable name", arg)
-            return None
+
+@dataclass
+class _ReturnStatement(CompiledStatement):
+    node: ast.Return
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
+        if self.node.value is None:
+            visitor.add_invalid("return statement must have a value", self.node)
+            return KnownValue(None)
+        return visitor.evaluator.evaluate_generic_type(self.node.value, visitor.ctx)
+
+
+@dataclass
+class _RevealTypeStatement(CompiledStatement):
+    arg: ast.Name
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
         try:
-            val = self.ctx.variables[arg.id]
+            val = visitor.ctx.variables[self.arg.id]
         except KeyError:
-            self.errors.append(InvalidEvaluation(f"Invalid variable {arg.id}", arg))
+            visitor.errors.append(
+                InvalidEvaluation(f"Invalid variable {self.arg.id}", self.arg)
+            )
             return None
-        message = (
-            f"Type of {arg.id} is {self.ctx.can_assign_context.display_value(val)}"
-        )
-        self.errors.append(UserRaisedError(message, [], argument=arg.id))
+        message = f"Type of {self.arg.id} is {visitor.ctx.can_assign_context.display_value(val)}"
+        visitor.errors.append(UserRaisedError(message, [], argument=self.arg.id))
         return None
 
-    def visit_show_error(self, call: ast.Call) -> EvalReturn:
-        if len(call.args) != 1:
-            self.add_invalid("show_error() takes exactly one positional argument", call)
-            return None
-        arg = call.args[0]
-        if not isinstance(arg, ast.Constant) or not isinstance(arg.value, str):
-            self.add_invalid(
-                "show_error() message must be a string literal", call.args[0]
-            )
-            return None
-        message = arg.value
+
+@dataclass
+class _ShowErrorStatement(CompiledStatement):
+    message: str
+    argument_node: Optional[ast.Name] = None
+    # Invalid keyword argument, reported after the argument is validated
+    invalid: Optional[_InvalidStatement] = None
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
         argument = None
-        for keyword in call.keywords:
-            if keyword.arg == "argument":
-                if not isinstance(keyword.value, ast.Name):
-                    self.add_invalid("argument must be a name", keyword.value)
-                    return None
-                argument = keyword.value.id
-                if argument not in self.ctx.variables:
-                    self.add_invalid(
-                        f"{argument} is not a valid argument", keyword.value
-                    )
-                    return None
-            else:
-                # Before 3.9 keyword nodes don't have a lineno
-                if sys.version_info >= (3, 9):
-                    error_node = keyword
-                else:
-                    error_node = call
-                self.add_invalid("Invalid keyword argument to show_error()", error_node)
+        if self.argument_node is not None:
+            argument = self.argument_node.id
+            if argument not in visitor.ctx.variables:
+                visitor.add_invalid(
+                    f"{argument} is not a valid argument", self.argument_node
+                )
                 return None
-        self.errors.append(
-            UserRaisedError(message, list(self.active_conditions), argument)
+        if self.invalid is not None:
+            return self.invalid.execute(visitor)
+        visitor.errors.append(
+            UserRaisedError(self.message, list(visitor.active_conditions), argument)
         )
         return None
 
-    def visit_If(self, node: ast.If) -> EvalReturn:
-        visitor = ConditionEvaluator(self.evaluator, self.ctx, self.validation_mode)
-        condition = visitor.visit(node.test)
-        self.errors += visitor.errors
-        if self.validation_mode:
-            self.visit_block(node.body)
-            self.visit_block(node.orelse)
+
+@dataclass
+class _IfStatement(CompiledStatement):
+    node: ast.If
+    test: CompiledCondition
+    body: _Block
+    orelse: _Block
+
+    def execute(self, visitor: EvaluateVisitor) -> EvalReturn:
+        evaluator = ConditionEvaluator(
+            visitor.evaluator, visitor.ctx, visitor.validation_mode
+        )
+        condition = self.test.evaluate(evaluator)
+        visitor.errors += evaluator.errors
+        if visitor.validation_mode:
+            self.body.execute(visitor)
+            self.orelse.execute(visitor)
             return None
         if condition.left_varmap is not None:
-            with self.ctx.narrow_variables(
+            with visitor.ctx.narrow_variables(
                 condition.left_varmap
-            ), self.add_active_condition(condition.condition):
-                left_result = self.visit_block(node.body)
+            ), visitor.add_active_condition(condition.condition):
+                left_result = self.body.execute(visitor)
         else:
             left_result = None
         if condition.right_varmap is not None:
-            with self.ctx.narrow_variables(condition.right_varmap):
-                right_result = self.visit_block(node.orelse)
+            with visitor.ctx.narrow_variables(condition.right_varmap):
+                right_result = self.orelse.execute(visitor)
         else:
             right_result = None
         if condition.left_varmap is not None:
@@ -778,12 +880,84 @@ class EvaluateVisitor(ast.NodeVisitor):
             if condition.right_varmap is not None:
                 return right_result
             else:
-                self.add_invalid("Condition must either match or not match", node)
+                visitor.add_invalid(
+                    "Condition must either match or not match", self.node
+                )
                 return None
 
-    def generic_visit(self, node: ast.AST) -> Any:
-        self.add_invalid("Invalid code in type evaluator", node)
-        return None
+
+def compile_statement(node: ast.stmt) -> CompiledStatement:
+    """Compiles a statement in a type evaluation function."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return _compile_block(node.body)
+    elif isinstance(node, ast.Pass):
+        return _PassStatement()
+    elif isinstance(node, ast.Return):
+        return _ReturnStatement(node)
+    elif isinstance(node, ast.If):
+        return _IfStatement(
+            node,
+            compile_condition(node.test),
+            _compile_block(node.body),
+            _compile_block(node.orelse),
+        )
+    elif isinstance(node, ast.Expr):
+        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name):
+            name = node.value.func.id
+            if name == "show_error":
+                return _compile_show_error(node.value)
+            elif name == "reveal_type":
+                return _compile_reveal_type(node.value)
+        return _InvalidStatement("Invalid statement", node)
+    else:
+        return _InvalidStatement("Invalid code in type evaluator", node)
+
+
+def _compile_block(statements: Sequence[ast.stmt]) -> _Block:
+    return _Block([compile_statement(stmt) for stmt in statements])
+
+
+def _compile_reveal_type(call: ast.Call) -> CompiledStatement:
+    if len(call.args) != 1 or call.keywords:
+        return _InvalidStatement(
+            "reveal_type() takes exactly one positional argument", call
+        )
+    arg = call.args[0]
+    if not isinstance(arg, ast.Name):
+        return _InvalidStatement("reveal_type() argument must be a variable name", arg)
+    return _RevealTypeStatement(arg)
+
+
+def _compile_show_error(call: ast.Call) -> CompiledStatement:
+    if len(call.args) != 1:
+        return _InvalidStatement(
+            "show_error() takes exactly one positional argument", call
+        )
+    arg = call.args[0]
+    if not isinstance(arg, ast.Constant) or not isinstance(arg.value, str):
+        return _InvalidStatement(
+            "show_error() message must be a string literal", call.args[0]
+        )
+    statement = _ShowErrorStatement(arg.value)
+    for keyword in call.keywords:
+        if keyword.arg == "argument":
+            if not isinstance(keyword.value, ast.Name):
+                statement.invalid = _InvalidStatement(
+                    "argument must be a name", keyword.value
+                )
+                break
+            statement.argument_node = keyword.value
+        else:
+            # Before 3.9 keyword nodes don't have a lineno
+            if sys.version_info >= (3, 9):
+                error_node = keyword
+            else:
+                error_node = call
+            statement.invalid = _InvalidStatement(
+                "Invalid keyword argument to show_error()", error_node
+            )
+            break
+    return statement
 
 
 def decompose_union(
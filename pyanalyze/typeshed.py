@@ -195,6 +195,11 @@ class TypeshedFinder:
             return
         print(f"{message}: {obj!r}")
 
+    def trim_caches(self) -> None:
+        """Drops cached values computed from stubs."""
+        self._assignment_cache.clear()
+        self._attribute_cache.clear()
+
     def _get_sig_from_method_descriptor(
         self, obj: MethodDescriptorType, allow_call: bool
     ) -> Optional[ConcreteSignature]:
@@ -4,23 +4,33 @@ TypeVar solver.
 
 """
 
-from typing import Iterable, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Sequence, Tuple, Union
 
 import qcore
 
 from .safe import all_of_type, is_instance_of_typing_name
 from .value import (
+    AnnotatedValue,
     AnySource,
     AnyValue,
     Bound,
     BoundsMap,
     CanAssignContext,
     CanAssignError,
+    DictIncompleteValue,
+    GenericValue,
     IsOneOf,
+    KnownValue,
     LowerBound,
+    MultiValuedValue,
     OrBound,
+    SequenceValue,
+    SubclassValue,
+    TypedValue,
     TypeVarLike,
     TypeVarMap,
+    TypeVarValue,
     UpperBound,
     Value,
     unite_values,
@@ -38,13 +48,14 @@ def resolve_bounds_map(
 ) -> Tuple[TypeVarMap, Sequence[CanAssignError]]:
     tv_map = {tv: AnyValue(AnySource.generic_argument) for tv in all_typevars}
     errors = []
+    cache = ctx.get_typevar_solver_cache()
     for tv, bounds in bounds_map.items():
         bounds = tuple(dict.fromkeys(bounds))
-        if is_instance_of_typing_name(tv, "ParamSpec"):
-            # For ParamSpec, we use a simpler approach
-            solution = solve_paramspec(bounds, ctx)
+        is_paramspec = is_instance_of_typing_name(tv, "ParamSpec")
+        if cache is not None:
+            solution = cache.solve(bounds, ctx, is_paramspec=is_paramspec)
         else:
-            solution = solve(bounds, ctx)
+            solution = _solve(bounds, ctx, is_paramspec=is_paramspec)
         if isinstance(solution, CanAssignError):
             errors.append(solution)
             solution = AnyValue(AnySource.error)
@@ -52,6 +63,105 @@ def resolve_bounds_map(
     return tv_map, errors
 
 
+def _solve(
+    bounds: Sequence[Bound], ctx: CanAssignContext, *, is_paramspec: bool
+) -> Union[Value, CanAssignError]:
+    if is_paramspec:
+        # For ParamSpec, we use a simpler approach
+        return solve_paramspec(bounds, ctx)
+    return solve(bounds, ctx)
+
+
+# Values of these types compare equal only if they are interchangeable. Others,
+# such as CallableValue (whose Signature ignores the implementation function when
+# comparing), could make the cache return a subtly different solution.
+_CACHEABLE_VALUE_TYPES = frozenset(
+    {
+        AnnotatedValue,
+        AnyValue,
+        DictIncompleteValue,
+        GenericValue,
+        KnownValue,
+        MultiValuedValue,
+        SequenceValue,
+        SubclassValue,
+        TypedValue,
+        TypeVarValue,
+    }
+)
+
+
+def _is_cacheable(bounds: Sequence[Bound]) -> bool:
+    for bound in bounds:
+        if isinstance(bound, (LowerBound, UpperBound)):
+            values = [bound.value]
+        elif isinstance(bound, IsOneOf):
+            values = bound.constraints
+        else:
+            # OrBound does not affect the solution
+            continue
+        for value in values:
+            for subval in value.walk_values():
+                if type(subval) not in _CACHEABLE_VALUE_TYPES:
+                    return False
+    return True
+
+
+@dataclass
+class SolverCache:
+    """Bounded cache of solutions to the bounds on a TypeVar.
+
+    Generic functions are often called many times with arguments of the same
+    types, which produces the same bounds each time. A
+    :class:`pyanalyze.checker.Checker` keeps one of these so that it is shared
+    across files. When the cache is full, it is emptied.
+
+    """
+
+    max_size: int = 4096
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+    _solutions: Dict[
+        Tuple[bool, bool, Tuple[Bound, ...]], Tuple[Union[Value, CanAssignError], bool]
+    ] = field(default_factory=dict, repr=False)
+
+    def solve(
+        self, bounds: Tuple[Bound, ...], ctx: CanAssignContext, *, is_paramspec: bool
+    ) -> Union[Value, CanAssignError]:
+        if not _is_cacheable(bounds):
+            self.uncacheable += 1
+            return _solve(bounds, ctx, is_paramspec=is_paramspec)
+        key = (is_paramspec, ctx.should_exclude_any(), bounds)
+        try:
+            solution, used_any = self._solutions[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            if used_any:
+                ctx.record_any_used()
+            return solution
+        self.misses += 1
+        # Remember whether Any was used to find the solution, so we can record it
+        # again when the solution is reused.
+        with ctx.reset_any_used():
+            solution = _solve(bounds, ctx, is_paramspec=is_paramspec)
+            used_any = ctx.has_used_any_match()
+        if used_any:
+            ctx.record_any_used()
+        if len(self._solutions) >= self.max_size:
+            self._solutions.clear()
+        self._solutions[key] = (solution, used_any)
+        return solution
+
+    def clear(self) -> None:
+        self._solutions.clear()
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+
 def solve_paramspec(
     bounds: Sequence[Bound], ctx: CanAssignContext
 ) -> Union[Value, CanAssignError]:
@@ -95,11 +95,20 @@ class OverlapMode(enum.Enum):
     EQ = 3
 
 
+# Bits in the structural flags cached on Values; see Value.contains_typevars().
+_FLAG_TYPEVARS = 1
+_FLAG_IMPLICIT_ANY = 2
+_FLAG_UNREACHABLE = 4
+
+
 class Value:
     """Base class for all values."""
 
     __slots__ = ()
 
+    # Lazily computed by _get_structural_flags() and stored on the instance.
+    _structural_flags: int
+
     def can_assign(self, other: "Value", ctx: "CanAssignContext") -> "CanAssign":
         """Whether other can be assigned to self.
 
@@ -188,6 +197,51 @@ class Value:
         """
         return self
 
+    def contains_typevars(self) -> bool:
+        """Returns whether :meth:`substitute_typevars` may change this value.
+
+        This is true if the value contains a :class:`TypeVarValue`, but also for
+        some other values that record the substitution, such as a
+        :class:`KnownValue` for a function. If it is false, substituting
+        typevars returns the value itself.
+
+        """
+        return bool(self._get_structural_flags() & _FLAG_TYPEVARS)
+
+    def contains_implicit_any(self) -> bool:
+        """Returns whether this value contains an :class:`AnyValue` that was not
+        explicitly written by the user."""
+        return bool(self._get_structural_flags() & _FLAG_IMPLICIT_ANY)
+
+    def contains_unreachable(self) -> bool:
+        """Returns whether this value contains an unreachable :class:`AnyValue`."""
+        return bool(self._get_structural_flags() & _FLAG_UNREACHABLE)
+
+    def _get_structural_flags(self) -> int:
+        try:
+            return self._structural_flags
+        except AttributeError:
+            pass
+        flags = 0
+        for val in self.walk_values():
+            flags |= val._get_own_structural_flags()
+        try:
+            object.__setattr__(self, "_structural_flags", flags)
+        except AttributeError:
+            pass  # subclass with __slots__
+        return flags
+
+    def _get_own_structural_flags(self) -> int:
+        """Returns the structural flags of this value, ignoring its children.
+
+        By default, values whose substitute_typevars() does more than substitute
+        the children yielded by walk_values() are assumed to contain typevars.
+
+        """
+        if type(self).substitute_typevars in _STRUCTURAL_SUBSTITUTIONS:
+            return 0
+        return _FLAG_TYPEVARS
+
     def is_type(self, typ: type) -> bool:
         """Returns whether this value is an instance of the given type.
 
@@ -312,6 +366,10 @@ class CanAssignContext(Protocol):
         """Whether Any should be compatible only with itself."""
         return False
 
+    def get_typevar_solver_cache(self) -> Optional["pyanalyze.typevar.SolverCache"]:
+        """Return a cache for solutions to TypeVar bounds, or None to not cache them."""
+        return None
+
     def display_value(self, value: Value) -> str:
         """Provide a pretty, user-readable display of this value."""
         return str(value)
@@ -445,6 +503,13 @@ class AnyValue(Value):
     ) -> Optional[CanAssignError]:
         return None  # always overlaps
 
+    def _get_own_structural_flags(self) -> int:
+        if self.source is AnySource.explicit:
+            return 0
+        elif self.source is AnySource.unreachable:
+            return _FLAG_IMPLICIT_ANY | _FLAG_UNREACHABLE
+        return _FLAG_IMPLICIT_ANY
+
 
 UNRESOLVED_VALUE = AnyValue(AnySource.default)
 """The default instance of :class:`AnyValue`.
@@ -670,6 +735,9 @@ class KnownValue(Value):
             return self
         return KnownValueWithTypeVars(self.val, typevars)
 
+    def _get_own_structural_flags(self) -> int:
+        return _FLAG_TYPEVARS if callable(self.val) else 0
+
     def simplify(self) -> Value:
         val = replace_known_sequence_value(self)
         if isinstance(val, KnownValue):
@@ -1158,6 +1226,8 @@ class GenericValue(TypedValue):
             yield from arg.walk_values()
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return GenericValue(
             self.typ, [arg.substitute_typevars(typevars) for arg in self.args]
         )
@@ -1270,6 +1340,8 @@ class SequenceValue(GenericValue):
         return super().can_assign(other, ctx)
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return SequenceValue(
             self.typ,
             [
@@ -1366,6 +1438,8 @@ class DictIncompleteValue(GenericValue):
             yield from pair.value.walk_values()
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return DictIncompleteValue(
             self.typ, [pair.substitute_typevars(typevars) for pair in self.kv_pairs]
         )
@@ -1735,6 +1809,8 @@ class AsyncTaskIncompleteValue(GenericValue):
         self.value = value
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return AsyncTaskIncompleteValue(
             self.typ, self.value.substitute_typevars(typevars)
         )
@@ -1763,6 +1839,8 @@ class CallableValue(TypedValue):
         self.signature = signature
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return CallableValue(self.signature.substitute_typevars(typevars), self.typ)
 
     def walk_values(self) -> Iterable[Value]:
@@ -1854,6 +1932,8 @@ class SubclassValue(Value):
     """If True, represents exactly this class and not a subclass."""
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         return self.make(self.typ.substitute_typevars(typevars), exactly=self.exactly)
 
     def get_type_object(
@@ -1961,8 +2041,8 @@ class MultiValuedValue(Value):
     raw_vals: InitVar[Iterable[Value]]
     vals: Tuple[Value, ...] = field(init=False)
     """The underlying values of the union."""
-    _known_subvals: Optional[Tuple[Set[Tuple[object, type]], Sequence[Value]]] = field(
-        init=False, repr=False, hash=False, compare=False
+    _index: Optional["_UnionIndex"] = field(
+        default=None, init=False, repr=False, hash=False, compare=False
     )
 
     def __post_init__(self, raw_vals: Iterable[Value]) -> None:
@@ -1971,33 +2051,17 @@ class MultiValuedValue(Value):
             "vals",
             tuple(chain.from_iterable(flatten_values(val) for val in raw_vals)),
         )
-        object.__setattr__(self, "_known_subvals", self._get_known_subvals())
 
-    def _get_known_subvals(
-        self,
-    ) -> Optional[Tuple[Set[Tuple[object, type]], Sequence[Value]]]:
+    def _get_index(self) -> Optional["_UnionIndex"]:
         # Not worth it for small unions
-        if len(self.vals) < 10:
+        if len(self.vals) < _UNION_INDEX_MIN_SIZE:
             return None
-        # Optimization for comparing Unions containing large unions of literals.
-        try:
-            # Include the type to avoid e.g. 1 and True matching
-            known_values = {
-                (subval.val, type(subval.val))
-                for subval in self.vals
-                if isinstance(subval, KnownValue)
-            }
-        except TypeError:
-            return None  # not hashable
-        else:
-            # Make remaining check not consider the KnownValues again
-            remaining_vals = [
-                subval for subval in self.vals if not isinstance(subval, KnownValue)
-            ]
-            return known_values, remaining_vals
+        if self._index is None:
+            object.__setattr__(self, "_index", _UnionIndex.make(self.vals))
+        return self._index
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
-        if not self.vals or not typevars:
+        if not self.vals or not typevars or not self.contains_typevars():
             return self
         return MultiValuedValue(
             [val.substitute_typevars(typevars) for val in self.vals]
@@ -2024,15 +2088,13 @@ class MultiValuedValue(Value):
             return {}
         else:
             my_vals = self.vals
-            if isinstance(other, KnownValue) and self._known_subvals is not None:
-                known_values, my_vals = self._known_subvals
-                try:
-                    is_present = (other.val, type(other.val)) in known_values
-                except TypeError:
-                    pass  # not hashable
-                else:
-                    if is_present:
-                        return {}
+            index = self._get_index()
+            if index is not None:
+                if index.has_match(other, ctx):
+                    return {}
+                if isinstance(other, KnownValue) and index.known_values is not None:
+                    # Make remaining check not consider the KnownValues again
+                    my_vals = index.non_literal_vals
 
             bounds_maps = []
             errors = []
@@ -2082,6 +2144,10 @@ class MultiValuedValue(Value):
     def __ne__(self, other: Value) -> bool:
         return not (self == other)
 
+    def __hash__(self) -> int:
+        # Consistent with __eq__, which ignores the order of the members
+        return hash(frozenset(self.vals))
+
     def __str__(self) -> str:
         if not self.vals:
             return "Never"
@@ -2123,6 +2189,89 @@ class MultiValuedValue(Value):
 NO_RETURN_VALUE = MultiValuedValue([])
 """The empty union, equivalent to ``typing.Never``."""
 
+_UNION_INDEX_MIN_SIZE = 10
+
+
+@dataclass
+class _UnionIndex:
+    """Index of the members of a large union, used to speed up can_assign().
+
+    Without the index, checking whether a value is assignable to a union requires
+    checking it against every member, which makes assigning one large union to
+    another quadratic.
+
+    """
+
+    known_values: Optional[Set[Tuple[object, type]]]
+    """The hashable Literal members, or None if some are not hashable.
+
+    Includes the type to avoid e.g. 1 and True matching.
+
+    """
+    non_literal_vals: Sequence[Value]
+    """The members of the union that are not Literals."""
+    typed_values: Dict[Union[type, str], TypedValue]
+    """The plain, non-LiteralString TypedValue members, by type."""
+
+    @classmethod
+    def make(cls, vals: Sequence[Value]) -> "_UnionIndex":
+        known_values = set()
+        non_literal_vals = []
+        typed_values = {}
+        for val in vals:
+            if isinstance(val, KnownValue):
+                if known_values is not None:
+                    try:
+                        known_values.add((val.val, type(val.val)))
+                    except TypeError:
+                        known_values = None  # not hashable
+            else:
+                non_literal_vals.append(val)
+                # Exclude subclasses such as GenericValue
+                if (
+                    isinstance(val, TypedValue)
+                    and type(val) is TypedValue
+                    and not val.literal_only
+                ):
+                    try:
+                        typed_values.setdefault(val.typ, val)
+                    except TypeError:
+                        pass  # not hashable
+        if known_values is None:
+            non_literal_vals = list(vals)
+        return cls(known_values, non_literal_vals, typed_values)
+
+    def has_match(self, other: Value, ctx: CanAssignContext) -> bool:
+        """Returns whether other is assignable to one of the indexed members.
+
+        If this returns True, assigning other to the union succeeds without
+        constraining any TypeVars. If it returns False, other may still be
+        assignable to a member that is not in the index.
+
+        """
+        if isinstance(other, KnownValue):
+            if self.known_values is not None:
+                try:
+                    if (other.val, type(other.val)) in self.known_values:
+                        return True
+                except TypeError:
+                    pass  # not hashable
+        elif not isinstance(other, TypedValue):
+            return False
+        if not self.typed_values:
+            return False
+        other_tobj = other.get_type_object(ctx)
+        if other_tobj.is_protocol or not isinstance(other_tobj.typ, (type, str)):
+            return False
+        # Mirrors the check TypeObject.can_assign() does for non-protocol types.
+        for base in other_tobj.base_classes:
+            member = self.typed_values.get(base)
+            if member is not None:
+                member_tobj = member.get_type_object(ctx)
+                if not member_tobj.is_protocol and not member_tobj.is_thrift_enum:
+                    return True
+        return False
+
 
 @dataclass(frozen=True)
 class ReferencingValue(Value):
@@ -2607,9 +2756,22 @@ class AnnotatedValue(Value):
         return self.value.get_type_value()
 
     def substitute_typevars(self, typevars: TypeVarMap) -> Value:
+        if not self.contains_typevars():
+            return self
         metadata = tuple(val.substitute_typevars(typevars) for val in self.metadata)
         return AnnotatedValue(self.value.substitute_typevars(typevars), metadata)
 
+    def _get_own_structural_flags(self) -> int:
+        # Extensions are not yielded by walk_values(), so any extension that does
+        # its own substitution may depend on typevars.
+        for data in self.metadata:
+            if (
+                isinstance(data, Extension)
+                and type(data).substitute_typevars is not Extension.substitute_typevars
+            ):
+                return _FLAG_TYPEVARS
+        return 0
+
     def can_assign(self, other: Value, ctx: CanAssignContext) -> CanAssign:
         can_assign = self.value.can_assign(other, ctx)
         if isinstance(can_assign, CanAssignError):
@@ -3351,6 +3513,8 @@ def replace_known_sequence_value(value: Value) -> Value:
 
 
 def extract_typevars(value: Value) -> Iterable[TypeVarLike]:
+    if not value.contains_typevars():
+        return
     for val in value.walk_values():
         if isinstance(val, TypeVarValue):
             yield val.typevar
@@ -3374,6 +3538,23 @@ def stringify_object(obj: Any) -> str:
         return repr(obj)
 
 
+# Implementations of substitute_typevars() that only substitute the values yielded
+# by walk_values().
+_STRUCTURAL_SUBSTITUTIONS = frozenset(
+    {
+        Value.substitute_typevars,
+        GenericValue.substitute_typevars,
+        SequenceValue.substitute_typevars,
+        DictIncompleteValue.substitute_typevars,
+        AsyncTaskIncompleteValue.substitute_typevars,
+        CallableValue.substitute_typevars,
+        SubclassValue.substitute_typevars,
+        MultiValuedValue.substitute_typevars,
+        AnnotatedValue.substitute_typevars,
+    }
+)
+
+
 def can_assign_and_used_any(
     param_typ: Value, var_value: Value, ctx: CanAssignContext
 ) -> Tuple[CanAssign, bool]: